@@ -7,6 +7,9 @@ from .projekte import projekte_bp
 from .lager import lager_bp
 from .verkauf import verkauf_bp
 from .berichte import berichte_bp
+from .reservierungen import reservierungen_bp
+from .ereignisse import ereignisse_bp
+from .aenderungen import aenderungen_bp
 
 def register_blueprints(app: Flask):
     """Registriert alle API-Blueprints mit der Flask-App"""
@@ -23,4 +26,7 @@ def register_blueprints(app: Flask):
     # Operational APIs
     app.register_blueprint(lager_bp, url_prefix='/api/lager')
     app.register_blueprint(verkauf_bp, url_prefix='/api/verkauf')
-    app.register_blueprint(berichte_bp, url_prefix='/api/berichte')
\ No newline at end of file
+    app.register_blueprint(reservierungen_bp, url_prefix='/api/reservierungen')
+    app.register_blueprint(berichte_bp, url_prefix='/api/berichte')
+    app.register_blueprint(ereignisse_bp, url_prefix='/api/ereignisse')
+    app.register_blueprint(aenderungen_bp, url_prefix='/api/aenderungen')
\ No newline at end of file
@@ -0,0 +1,35 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from config import get_config
+from inventory_manager import InventoryManager
+from exceptions import ValidationError
+
+aenderungen_bp = Blueprint('aenderungen', __name__)
+inventory = InventoryManager()
+
+@aenderungen_bp.route('', methods=['GET'])
+@jwt_required()
+def get_aenderungen():
+    """Änderungs-Feed aus der Outbox, seitenweise ab einer Sequenznummer"""
+    seite_max = get_config().OUTBOX_SEITE_MAX
+    seit = request.args.get('since', 0, type=int)
+    limit = request.args.get('limit', seite_max, type=int)
+    if limit > seite_max:
+        raise ValidationError(f"'limit' darf höchstens {seite_max} sein")
+    
+    aenderungen = inventory.aenderungen_seit(seit, limit)
+    # Erst nach dem Lesen prüfen: eine zwischendurch laufende Bereinigung fällt so auf
+    luecke, letzte_seq = inventory.outbox_luecke(seit)
+    if luecke:
+        return jsonify({
+            'aenderungen': [],
+            'letzte_seq': letzte_seq,
+            'mehr': False,
+            'luecke': True
+        })
+    return jsonify({
+        'aenderungen': aenderungen,
+        'letzte_seq': aenderungen[-1]['seq'] if aenderungen else seit,
+        'mehr': len(aenderungen) == limit,
+        'luecke': False
+    })
@@ -1,8 +1,10 @@
+import io
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from inventory_manager import InventoryManager
 from logger_config import app_logger
 from exceptions import ValidationError, NotFoundError
+from katalog import format_erkennen, zeilen_lesen
 
 artikel_bp = Blueprint('artikel', __name__)
 inventory = InventoryManager()
@@ -46,6 +48,45 @@ def create_artikel():
         'mindestmenge': mindestmenge
     }), 201
 
+@artikel_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_katalog():
+    """Sammelimport eines Katalogs als CSV, JSON Lines oder JSON; der Body wird zeilenweise gelesen"""
+    format = format_erkennen(content_type=request.content_type or 'text/csv')
+    ab_zeile = request.args.get('ab_zeile', 0, type=int)
+    lieferanten_anlegen = request.args.get('lieferanten_anlegen', 'true').lower() == 'true'
+    
+    datei = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+    try:
+        bericht = inventory.katalog_importieren(zeilen_lesen(datei, format), ab_zeile, lieferanten_anlegen)
+    except UnicodeDecodeError as e:
+        raise ValidationError(f"Katalog ist nicht UTF-8-kodiert: {e}")
+    return jsonify(bericht)
+
+@artikel_bp.route('/suche', methods=['GET'])
+@jwt_required()
+def search_artikel():
+    limit = request.args.get('limit', 20, type=int)
+    if limit > 100:
+        raise ValidationError("'limit' darf höchstens 100 sein")
+    
+    treffer = inventory.artikel_suchen(request.args.get('q', ''), limit)
+    return jsonify([{
+        'artikelnummer': a[0],
+        'bezeichnung': a[1],
+        'lieferant_name': a[2],
+        'mindestmenge': a[3]
+    } for a in treffer])
+
+@artikel_bp.route('/autocomplete', methods=['GET'])
+@jwt_required()
+def autocomplete_artikel():
+    limit = request.args.get('limit', 10, type=int)
+    if limit > 100:
+        raise ValidationError("'limit' darf höchstens 100 sein")
+    
+    return jsonify(inventory.artikelnummern_vervollstaendigen(request.args.get('q', ''), limit))
+
 @artikel_bp.route('/<artikelnummer>', methods=['GET'])
 @jwt_required()
 def get_artikel_detail(artikelnummer):
@@ -58,4 +99,41 @@ def get_artikel_detail(artikelnummer):
         'bezeichnung': artikel.bezeichnung,
         'lieferant_id': artikel.lieferant_id,
         'mindestmenge': artikel.mindestmenge
-    })
\ No newline at end of file
+    })
+
+@artikel_bp.route('/<artikelnummer>', methods=['PUT'])
+@jwt_required()
+def put_artikel(artikelnummer):
+    """Legt den Artikel an oder aktualisiert ihn (201 bzw. 200)"""
+    data = request.get_json(force=True, silent=True)
+    if data is None:
+        raise ValidationError('JSON-Daten erforderlich')
+    if not data or not all(field in data for field in ('bezeichnung', 'lieferant_id')):
+        raise ValidationError('Bezeichnung und Lieferant-ID sind erforderlich')
+    
+    artikel = inventory.artikel_speichern(artikelnummer, data['bezeichnung'], data['lieferant_id'],
+                                          data.get('mindestmenge'))
+    return jsonify(artikel), 201 if artikel['aktion'] == 'angelegt' else 200
+
+@artikel_bp.route('/<artikelnummer>/mindestmenge', methods=['PUT'])
+@jwt_required()
+def update_artikel_mindestmenge(artikelnummer):
+    data = request.get_json(force=True, silent=True)
+    if data is None:
+        raise ValidationError('JSON-Daten erforderlich')
+    if 'mindestmenge' not in data:
+        raise ValidationError('Mindestmenge ist erforderlich')
+    
+    inventory.mindestmenge_aendern(artikelnummer, data['mindestmenge'])
+    return jsonify({
+        'artikelnummer': artikelnummer,
+        'mindestmenge': data['mindestmenge']
+    })
+
+@artikel_bp.route('/<artikelnummer>/verfuegbarkeit', methods=['GET'])
+@jwt_required()
+def get_artikel_verfuegbarkeit(artikelnummer):
+    verfuegbarkeit = inventory.verfuegbarkeit(artikelnummer)
+    if not verfuegbarkeit:
+        raise NotFoundError('Artikel nicht gefunden')
+    return jsonify(verfuegbarkeit)
\ No newline at end of file
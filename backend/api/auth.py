@@ -39,7 +39,7 @@ def login():
     if not data.get('password'):
         raise ValidationError('Passwort ist erforderlich')
     
-    user = auth_service.authenticate_user(data['username'], data['password'])
+    user = auth_service.authenticate_user(data['username'], data['password'], request.remote_addr)
     if not user:
         app_logger.warning(f"Login fehlgeschlagen für Username: {data['username']}")
         return jsonify({
@@ -69,10 +69,10 @@ def refresh():
 def logout():
     """User Logout - Token zur Blacklist hinzufügen"""
     app_logger.debug("DELETE /api/auth/logout aufgerufen")
-    jti = get_jwt()['jti']
+    token = get_jwt()
     current_user_id = get_jwt_identity()
     
-    auth_service.blacklist_token(jti)
+    auth_service.blacklist_token(token['jti'], token.get('exp'))
     app_logger.info(f"User {current_user_id} erfolgreich ausgeloggt")
     
     return jsonify({
@@ -22,22 +22,29 @@ def get_lagerbestand_detailliert():
 @berichte_bp.route('/projekte', methods=['GET'])
 @jwt_required()
 def get_alle_projekte_bericht():
-    projekte = reports.alle_projekte_uebersicht()
+    projekte = reports.alle_projekte_uebersicht(request.args.get('von'), request.args.get('bis'))
     return jsonify(projekte)
 
 @berichte_bp.route('/gewinn', methods=['GET'])
 @jwt_required()
 def get_gewinn_analyse():
     projekt_id = request.args.get('projekt_id', type=int)
-    analyse = reports.gewinn_analyse(projekt_id)
+    analyse = reports.gewinn_analyse(projekt_id, request.args.get('von'), request.args.get('bis'))
     return jsonify(analyse)
 
 @berichte_bp.route('/lagerumschlag', methods=['GET'])
 @jwt_required()
 def get_lagerumschlag():
-    umschlag = reports.lagerumschlag()
+    umschlag = reports.lagerumschlag(request.args.get('von'), request.args.get('bis'))
     return jsonify(umschlag)
 
+@berichte_bp.route('/monatlich', methods=['GET'])
+@jwt_required()
+def get_monatsbericht():
+    projekt_id = request.args.get('projekt_id', type=int)
+    bericht = reports.monatsbericht(request.args.get('von'), request.args.get('bis'), projekt_id)
+    return jsonify(bericht)
+
 @berichte_bp.route('/mindestmenge', methods=['GET'])
 @jwt_required()
 def get_artikel_unter_mindestmenge():
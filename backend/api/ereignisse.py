@@ -0,0 +1,50 @@
+import time
+from flask import Blueprint, Response, request, jsonify
+from flask_jwt_extended import jwt_required
+from config import get_config
+from events import event_broker
+from exceptions import KapazitaetError
+
+ereignisse_bp = Blueprint('ereignisse', __name__)
+
+def _stream(abo, heartbeat: float, max_dauer: float):
+    ende = time.monotonic() + max_dauer
+    try:
+        # Wartezeit des Clients vor dem Wiederverbinden in Millisekunden
+        yield "retry: 3000\n\n"
+        while True:
+            rest = ende - time.monotonic()
+            if rest <= 0:
+                return
+            ereignis = abo.naechstes(min(heartbeat, rest))
+            if ereignis is not None:
+                yield ereignis.sse()
+            elif abo.abgehaengt:
+                # Queue ist leer gelaufen; der Client setzt mit Last-Event-ID wieder auf
+                return
+            else:
+                yield ": keepalive\n\n"
+    finally:
+        abo.abbestellen()
+
+@ereignisse_bp.route('/stream', methods=['GET'])
+# EventSource kann keine Header setzen, deshalb nimmt nur diese Route das Token auch als ?jwt= an
+@jwt_required(locations=['headers', 'query_string'])
+def get_ereignis_stream():
+    """Bestandsänderungen und Mindestmengen-Wechsel als text/event-stream"""
+    config = get_config()
+    letzte_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        abo = event_broker.abonnieren(letzte_id, config.SSE_MAX_CLIENTS)
+    except KapazitaetError:
+        response = jsonify({'error': 'Zu viele verbundene Clients', 'type': 'unavailable'})
+        response.headers['Retry-After'] = str(int(config.SSE_HEARTBEAT_SECONDS))
+        return response, 503
+
+    response = Response(_stream(abo, config.SSE_HEARTBEAT_SECONDS, config.SSE_MAX_STREAM_SECONDS),
+                        mimetype='text/event-stream')
+    # Auch eine nie gelesene Antwort gibt ihren Platz beim Schließen frei
+    response.call_on_close(abo.abbestellen)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -46,4 +46,10 @@ def get_kunde_detail(kunde_id):
         'id': kunde.id,
         'name': kunde.name,
         'kontakt': kunde.kontakt
-    })
\ No newline at end of file
+    })
+
+@kunden_bp.route('/<int:kunde_id>', methods=['DELETE'])
+@jwt_required()
+def delete_kunde(kunde_id):
+    inventory.kunde_loeschen(kunde_id)
+    return jsonify({'message': 'Kunde erfolgreich gelöscht'})
\ No newline at end of file
@@ -60,4 +60,23 @@ def get_artikel_lagerbestand(artikelnummer):
         'verfuegbare_menge': b.verfuegbare_menge,
         'einkaufspreis': b.einkaufspreis,
         'einlagerungsdatum': b.einlagerungsdatum
-    } for b in bestaende])
\ No newline at end of file
+    } for b in bestaende])
+
+@lager_bp.route('/verfuegbarkeit', methods=['POST'])
+@jwt_required()
+def verfuegbarkeit_pruefen():
+    data = request.get_json(force=True, silent=True)
+    if data is None:
+        raise ValidationError('JSON-Daten erforderlich')
+    
+    positionen = data.get('positionen') if isinstance(data, dict) else None
+    if not isinstance(positionen, list) or not all(
+            isinstance(p, dict) and 'artikelnummer' in p and 'menge' in p for p in positionen):
+        raise ValidationError('Positionen mit Artikelnummer und Menge sind erforderlich')
+    
+    ergebnis = inventory.verfuegbarkeit_pruefen([(p['artikelnummer'], p['menge']) for p in positionen])
+    return jsonify({
+        'positionen': ergebnis,
+        'vollstaendig_lieferbar': all(p['fehlmenge'] == 0 for p in ergebnis),
+        'wareneinsatz_gesamt': round(sum(p['wareneinsatz'] for p in ergebnis), 2)
+    })
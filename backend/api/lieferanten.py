@@ -32,6 +32,11 @@ def create_lieferant():
     if not data or 'name' not in data:
         raise ValidationError('Name ist erforderlich')
     
+    # Mit ?upsert=true wird ein bestehender Lieferant gleichen Namens aktualisiert statt abgelehnt
+    if request.args.get('upsert', 'false').lower() == 'true':
+        lieferant = inventory.lieferant_speichern(data['name'], data.get('kontakt', ''))
+        return jsonify(lieferant), 201 if lieferant['aktion'] == 'angelegt' else 200
+    
     lieferant_id = inventory.lieferant_hinzufuegen(
         data['name'], 
         data.get('kontakt', '')
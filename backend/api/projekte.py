@@ -48,8 +48,14 @@ def create_projekt():
 @projekte_bp.route('/<int:projekt_id>', methods=['GET'])
 @jwt_required()
 def get_projekt_detail(projekt_id):
-    uebersicht = reports.projekt_uebersicht(projekt_id)
+    uebersicht = reports.projekt_uebersicht(projekt_id, request.args.get('von'), request.args.get('bis'))
     if not uebersicht:
         raise NotFoundError('Projekt nicht gefunden')
     
-    return jsonify(uebersicht)
\ No newline at end of file
+    return jsonify(uebersicht)
+
+@projekte_bp.route('/<int:projekt_id>', methods=['DELETE'])
+@jwt_required()
+def delete_projekt(projekt_id):
+    inventory.projekt_loeschen(projekt_id)
+    return jsonify({'message': 'Projekt erfolgreich gelöscht'})
\ No newline at end of file
@@ -0,0 +1,58 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from inventory_manager import InventoryManager
+from exceptions import ValidationError, NotFoundError
+
+reservierungen_bp = Blueprint('reservierungen', __name__)
+inventory = InventoryManager()
+
+def _reservierung_dict(r):
+    return {
+        'id': r.id,
+        'projekt_id': r.projekt_id,
+        'artikelnummer': r.artikelnummer,
+        'menge': r.menge,
+        'erstellt_am': r.erstellt_am,
+        'gueltig_bis': r.gueltig_bis,
+        'status': r.status
+    }
+
+@reservierungen_bp.route('', methods=['GET'])
+@jwt_required()
+def get_reservierungen():
+    projekt_id = request.args.get('projekt_id', type=int)
+    return jsonify([_reservierung_dict(r) for r in inventory.reservierungen_auflisten(projekt_id)])
+
+@reservierungen_bp.route('', methods=['POST'])
+@jwt_required()
+def create_reservierung():
+    data = request.get_json(force=True, silent=True)
+    if data is None:
+        raise ValidationError('JSON-Daten erforderlich')
+    
+    required_fields = ['projekt_id', 'artikelnummer', 'menge']
+    if not all(field in data for field in required_fields):
+        raise ValidationError('Projekt-ID, Artikelnummer und Menge sind erforderlich')
+    
+    reservierung_id = inventory.reservieren(
+        data['projekt_id'],
+        data['artikelnummer'],
+        data['menge'],
+        data.get('gueltig_bis')
+    )
+    
+    return jsonify(_reservierung_dict(inventory.reservierung_finden(reservierung_id))), 201
+
+@reservierungen_bp.route('/<int:reservierung_id>', methods=['GET'])
+@jwt_required()
+def get_reservierung(reservierung_id):
+    reservierung = inventory.reservierung_finden(reservierung_id)
+    if not reservierung:
+        raise NotFoundError('Reservierung nicht gefunden')
+    return jsonify(_reservierung_dict(reservierung))
+
+@reservierungen_bp.route('/<int:reservierung_id>', methods=['DELETE'])
+@jwt_required()
+def delete_reservierung(reservierung_id):
+    inventory.reservierung_stornieren(reservierung_id)
+    return jsonify({'message': 'Reservierung storniert'})
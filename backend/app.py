@@ -1,8 +1,11 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required, verify_jwt_in_request
+import hmac
+import math
 import os
 import sys
+import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
@@ -11,9 +14,14 @@ from auth_service import AuthService
 from logger_config import app_logger
 from exceptions import (
     LagerverwaltungError, LieferantError, ArtikelError, LagerError, 
-    VerkaufError, ValidationError, NotFoundError, IntegrityError
+    VerkaufError, ValidationError, NotFoundError, IntegrityError, RateLimitError
 )
 from api import register_blueprints
+import api.reservierungen
+import api.aenderungen
+import api.artikel
+from metrics import registry
+from scheduler import MaintenanceScheduler
 
 # Load configuration
 config = get_config()
@@ -30,8 +38,64 @@ auth_service = AuthService()
 
 # Register all API blueprints
 register_blueprints(app)
+
+# Wartungsjobs außerhalb des Request-Pfads
+maintenance = MaintenanceScheduler()
+maintenance.add_job('token_blacklist', config.TOKEN_PRUNE_INTERVAL_SECONDS,
+                    lambda: auth_service.cleanup_blacklisted_tokens(config.TOKEN_PRUNE_BATCH_SIZE))
+maintenance.add_job('reservierungen', config.RESERVATION_SWEEP_INTERVAL_SECONDS,
+                    lambda: api.reservierungen.inventory.abgelaufene_reservierungen_freigeben())
+maintenance.add_job('outbox', config.OUTBOX_PRUNE_INTERVAL_SECONDS,
+                    lambda: api.aenderungen.inventory.outbox_bereinigen(config.OUTBOX_AUFBEWAHRUNG_TAGE))
+maintenance.add_job('autocomplete', config.AUTOCOMPLETE_REFRESH_INTERVAL_SECONDS,
+                    lambda: api.artikel.inventory.artikelnummer_index.aufbauen())
+if config.MAINTENANCE_ENABLED:
+    maintenance.start()
+
+# Index der Autovervollständigung vor dem ersten Request laden
+api.artikel.inventory.artikelnummer_index.aufbauen()
 app_logger.info("API-Server erfolgreich initialisiert")
 
+# Request-Metriken
+http_request_duration = registry.histogram(
+    'lager_http_request_duration_seconds',
+    'Latenz der HTTP-Requests pro Blueprint und Endpoint',
+    ('blueprint', 'endpoint', 'method')
+)
+http_requests_total = registry.counter(
+    'lager_http_requests_total',
+    'Anzahl HTTP-Requests pro Endpoint und Statuscode',
+    ('endpoint', 'method', 'status')
+)
+http_requests_in_flight = registry.gauge(
+    'lager_http_requests_in_flight',
+    'Aktuell laufende HTTP-Requests'
+)
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    http_requests_in_flight.inc()
+
+@app.after_request
+def count_request(response):
+    http_requests_total.inc(endpoint=request.endpoint or 'unbekannt', method=request.method,
+                            status=str(response.status_code))
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    start = g.pop('request_start', None)
+    if start is None:
+        return
+    http_requests_in_flight.dec()
+    http_request_duration.observe(
+        time.perf_counter() - start,
+        blueprint=request.blueprint or 'app',
+        endpoint=request.endpoint or 'unbekannt',
+        method=request.method
+    )
+
 # JWT Callbacks
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
@@ -75,6 +139,12 @@ def handle_integrity_error(error):
     app_logger.warning(f"Integritätsfehler: {error.message}")
     return jsonify({'error': error.message, 'type': 'integrity_error'}), 409
 
+@app.errorhandler(RateLimitError)
+def handle_rate_limit_error(error):
+    response = jsonify({'error': error.message, 'type': 'rate_limit_error'})
+    response.headers['Retry-After'] = str(max(1, math.ceil(min(error.retry_after, 3600))))
+    return response, 429
+
 @app.errorhandler(LagerverwaltungError)
 def handle_lagerverwaltung_error(error):
     app_logger.error(f"Anwendungsfehler: {error.message}")
@@ -99,5 +169,24 @@ def get_status():
         'version': '1.0'
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prozess-Metriken im Prometheus-Textformat, nur mit METRICS_TOKEN oder JWT"""
+    if not config.METRICS_ENABLED:
+        return jsonify({'error': 'Endpoint nicht gefunden'}), 404
+    if config.METRICS_TOKEN:
+        angegeben = request.headers.get('Authorization', '').encode('utf-8')
+        if not hmac.compare_digest(angegeben, f"Bearer {config.METRICS_TOKEN}".encode('utf-8')):
+            return jsonify({'error': 'Ungültiger Metrik-Token', 'type': 'invalid_token'}), 401
+    else:
+        verify_jwt_in_request()
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/wartung', methods=['GET'])
+@jwt_required()
+def get_wartung_status():
+    """Letzte Läufe und Ergebnisse der Wartungsjobs"""
+    return jsonify(maintenance.status())
+
 if __name__ == '__main__':
     app.run(debug=config.DEBUG, host=config.HOST, port=config.PORT)
\ No newline at end of file
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+ASGI-Betrieb der Lagerverwaltung API
+
+Verbindungen, Keep-Alive und das Einlesen der Request-Bodies laufen auf der
+asyncio-Eventloop des ASGI-Servers. Erst der vollständige Request wird auf
+einem eigenen ThreadPoolExecutor an die Flask-App übergeben; dort laufen
+auch alle Database-Aufrufe. Jeder Executor-Thread behält seine gepoolte
+SQLite-Verbindung, so dass die Pool-Größe der Thread-Anzahl entspricht.
+Leerlaufende Clients belegen damit keinen Thread, nur laufende Requests.
+Ein Ereignis-Stream läuft dagegen dauerhaft auf einem Executor-Thread;
+deshalb bleibt SSE_MAX_CLIENTS unter der Thread-Anzahl.
+
+Start (uvicorn ist optional und nicht in requirements.txt):
+    pip install uvicorn
+    python asgi.py
+oder
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import concurrent.futures
+import io
+import sys
+import threading
+from config import get_config
+from logger_config import app_logger
+from metrics import registry
+from app import app
+
+asgi_requests_waiting = registry.gauge(
+    'lager_asgi_requests_waiting',
+    'Requests, die auf einen freien Thread des Datenbank-Executors warten'
+)
+asgi_requests_running = registry.gauge(
+    'lager_asgi_requests_running',
+    'Requests, die gerade auf dem Datenbank-Executor laufen'
+)
+
+_ENDE = object()
+
+
+class WsgiToAsgi:
+    """Adapter, der eine WSGI-App als ASGI-App auf einem festen Thread-Pool ausführt"""
+
+    def __init__(self, wsgi_app, max_threads: int):
+        self.wsgi_app = wsgi_app
+        self.max_threads = max_threads
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix='db')
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Nicht unterstützter ASGI-Scope: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.executor
+                app_logger.info(f"ASGI-Betrieb gestartet, Datenbank-Executor mit {self.max_threads} Threads")
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.extend(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+
+        loop = asyncio.get_running_loop()
+        # Begrenzte Queue: der Executor-Thread wartet, bis der Client Chunks abnimmt
+        queue = asyncio.Queue(maxsize=8)
+        abgebrochen = threading.Event()
+        environ = self._environ(scope, bytes(body))
+
+        asgi_requests_waiting.inc()
+        future = loop.run_in_executor(self.executor, self._run_wsgi, environ, loop, queue, abgebrochen)
+        try:
+            gestartet = False
+            while True:
+                item = await queue.get()
+                if item is _ENDE:
+                    break
+                if not gestartet:
+                    status, headers = item
+                    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+                    gestartet = True
+                else:
+                    await send({'type': 'http.response.body', 'body': item, 'more_body': True})
+            if gestartet:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            # Bei Verbindungsabbruch oder Fehler beendet der Thread die Antwort vorzeitig
+            abgebrochen.set()
+            await future
+
+    def _run_wsgi(self, environ, loop, queue, abgebrochen):
+        asgi_requests_waiting.dec()
+        asgi_requests_running.inc()
+
+        def put(item):
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    return future.result(timeout=0.5)
+                except concurrent.futures.TimeoutError:
+                    if abgebrochen.is_set():
+                        future.cancel()
+                        return
+
+        antwort = {}
+        gesendet = False
+
+        def start_response(status, headers, exc_info=None):
+            antwort['status'] = int(status.split(' ', 1)[0])
+            antwort['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+        try:
+            iterable = self.wsgi_app(environ, start_response)
+            try:
+                for chunk in iterable:
+                    if not gesendet:
+                        put((antwort['status'], antwort['headers']))
+                        gesendet = True
+                    if chunk:
+                        put(chunk)
+                    if abgebrochen.is_set():
+                        break
+                if not gesendet:
+                    put((antwort['status'], antwort['headers']))
+                    gesendet = True
+            finally:
+                if hasattr(iterable, 'close'):
+                    iterable.close()
+        except Exception as e:
+            app_logger.error(f"Fehler im ASGI-Adapter: {e}")
+            if not gesendet:
+                put((500, [(b'content-type', b'text/plain; charset=utf-8')]))
+                put('Interner Serverfehler'.encode('utf-8'))
+        finally:
+            asgi_requests_running.dec()
+            put(_ENDE)
+
+    @staticmethod
+    def _environ(scope, body: bytes) -> dict:
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = f'HTTP_{name}'
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+
+def _sse_begrenzen(config):
+    """Jeder Ereignis-Stream hält einen Executor-Thread; ohne Grenze blockieren sie alle anderen Requests"""
+    grenze = config.ASGI_DB_THREADS // 2
+    if config.SSE_MAX_CLIENTS > grenze:
+        app_logger.warning(f"SSE_MAX_CLIENTS={config.SSE_MAX_CLIENTS} bei {config.ASGI_DB_THREADS} "
+                           f"Executor-Threads, begrenze auf {grenze} Ereignis-Streams")
+        config.SSE_MAX_CLIENTS = grenze
+
+
+_sse_begrenzen(get_config())
+application = WsgiToAsgi(app, get_config().ASGI_DB_THREADS)
+
+
+def main():
+    try:
+        import uvicorn
+    except ImportError:
+        print("Für den ASGI-Betrieb wird uvicorn benötigt: pip install uvicorn", file=sys.stderr)
+        return 1
+    config = get_config()
+    uvicorn.run(application, host=config.HOST, port=config.PORT, lifespan='on')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
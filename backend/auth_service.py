@@ -1,15 +1,34 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from database import Database
+from cache import TTLCache
+from ratelimit import TokenBucketLimiter
+from metrics import registry
+from config import get_config
+from statements import sql
 from models import User
 from logger_config import app_logger
-from exceptions import ValidationError, NotFoundError, LagerverwaltungError
+from exceptions import ValidationError, NotFoundError, LagerverwaltungError, RateLimitError
 from flask_jwt_extended import create_access_token, create_refresh_token, get_jti
 
+login_throttled = registry.counter(
+    'lager_login_throttled_total',
+    'Vor der Passwortprüfung abgewiesene Login-Versuche',
+    ('grund',)
+)
+
 
 class AuthService:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db if db is not None else Database()
+        config = get_config()
+        # Aktive User nach ('id', id) und ('name', username); nur Treffer werden gecacht
+        self.user_cache = TTLCache('user', config.USER_CACHE_SIZE, config.USER_CACHE_TTL_SECONDS)
+        # Drosselung vor bcrypt, damit Login-Fluten keine CPU für Verkäufe kosten
+        self.login_limit_user = TokenBucketLimiter(config.LOGIN_USER_PER_MINUTE / 60.0, config.LOGIN_USER_BURST,
+                                                   config.LOGIN_THROTTLE_MAX_KEYS)
+        self.login_limit_ip = TokenBucketLimiter(config.LOGIN_IP_PER_MINUTE / 60.0, config.LOGIN_IP_BURST,
+                                                 config.LOGIN_THROTTLE_MAX_KEYS)
         app_logger.info("AuthService initialisiert")
     
     # User Management
@@ -23,23 +42,27 @@ class AuthService:
         username = username.strip().lower()
         app_logger.info(f"Erstelle User: {username}")
         
-        # Prüfen ob Username bereits existiert
-        existing_user = self.find_user_by_username(username)
-        if existing_user:
+        # Vorhandene User ohne das teure Hashen abweisen (Cache, sonst ein Index-Lookup)
+        if self.find_user_by_username(username) is not None:
             raise ValidationError(f"Username '{username}' existiert bereits")
         
-        # Passwort hashen und User erstellen
+        # Passwort hashen und User erstellen; ein gleichzeitig vergebener Username fügt keine Zeile ein
         password_hash = User.hash_password(password)
         created_at = datetime.now().isoformat()
         
         try:
-            query = "INSERT INTO users (username, password_hash, created_at, active) VALUES (?, ?, ?, ?)"
-            user_id = self.db.execute_insert(query, (username, password_hash, created_at, True))
-            app_logger.info(f"User '{username}' erfolgreich erstellt mit ID {user_id}")
-            return user_id
+            zeilen = self.db.write(lambda conn: self.db.execute_in(
+                conn, sql('user.einfuegen'), (username, password_hash, created_at, True)).fetchall())
         except Exception as e:
             app_logger.error(f"Fehler beim Erstellen von User '{username}': {e}")
             raise LagerverwaltungError(f"Fehler beim Erstellen des Users: {e}")
+        if not zeilen:
+            raise ValidationError(f"Username '{username}' existiert bereits")
+        
+        user_id = zeilen[0][0]
+        app_logger.info(f"User '{username}' erfolgreich erstellt mit ID {user_id}")
+        self._cache_user(User(user_id, username, password_hash, created_at, True))
+        return user_id
     
     def find_user_by_username(self, username: str) -> Optional[User]:
         """Finde User anhand Username"""
@@ -47,49 +70,54 @@ class AuthService:
             return None
         
         username = username.strip().lower()
+        user = self.user_cache.get(('name', username))
+        if user is not None:
+            return user
         try:
-            query = "SELECT id, username, password_hash, created_at, active FROM users WHERE username = ? AND active = 1"
-            results = self.db.execute_query(query, (username,))
-            
-            if results:
-                row = results[0]
-                return User(
-                    id=row[0],
-                    username=row[1], 
-                    password_hash=row[2],
-                    created_at=row[3],
-                    active=bool(row[4])
-                )
-            return None
+            results = self.db.execute_query(sql('user.nach_name'), (username,), row_factory=User.row_factory)
+            if not results:
+                return None
+            self._cache_user(results[0])
+            return results[0]
         except Exception as e:
             app_logger.error(f"Fehler beim Suchen von User '{username}': {e}")
             return None
     
     def find_user_by_id(self, user_id: int) -> Optional[User]:
         """Finde User anhand ID"""
+        user = self.user_cache.get(('id', user_id))
+        if user is not None:
+            return user
         try:
-            query = "SELECT id, username, password_hash, created_at, active FROM users WHERE id = ? AND active = 1"
-            results = self.db.execute_query(query, (user_id,))
-            
-            if results:
-                row = results[0]
-                return User(
-                    id=row[0],
-                    username=row[1],
-                    password_hash=row[2], 
-                    created_at=row[3],
-                    active=bool(row[4])
-                )
-            return None
+            results = self.db.execute_query(sql('user.nach_id'), (user_id,), row_factory=User.row_factory)
+            if not results:
+                return None
+            self._cache_user(results[0])
+            return results[0]
         except Exception as e:
             app_logger.error(f"Fehler beim Suchen von User ID {user_id}: {e}")
             return None
     
+    def deactivate_user(self, user_id: int) -> bool:
+        """Deaktiviere User; bestehende Tokens werden beim nächsten Lookup abgewiesen"""
+        user = self.find_user_by_id(user_id)
+        if not user:
+            raise NotFoundError(f"User mit ID {user_id} nicht gefunden")
+        
+        self.db.execute_query(sql('user.deaktivieren'), (user_id,))
+        self.user_cache.invalidate(('id', user.id), ('name', user.username))
+        app_logger.info(f"User '{user.username}' deaktiviert")
+        return True
+    
+    def _cache_user(self, user: User):
+        if user.active:
+            self.user_cache.put(('id', user.id), user)
+            self.user_cache.put(('name', user.username), user)
+    
     def list_users(self) -> list:
         """Liste alle aktiven User"""
         try:
-            query = "SELECT id, username, created_at, active FROM users WHERE active = 1 ORDER BY username"
-            results = self.db.execute_query(query)
+            results = self.db.execute_query(sql('user.auflisten'))
             
             users = []
             for row in results:
@@ -105,12 +133,18 @@ class AuthService:
             return []
     
     # Authentication
-    def authenticate_user(self, username: str, password: str) -> Optional[User]:
-        """Authentifiziere User mit Username/Password"""
+    def authenticate_user(self, username: str, password: str, client_ip: str = None) -> Optional[User]:
+        """Authentifiziere User mit Username/Password
+        
+        Versuche werden pro Username und pro Client-IP gedrosselt, bevor
+        das Passwort geprüft wird; bei Überschreitung folgt RateLimitError.
+        """
         if not username or not password:
             app_logger.warning("Login-Versuch mit leeren Credentials")
             return None
         
+        self._login_drosseln(username.strip().lower(), client_ip)
+        
         user = self.find_user_by_username(username)
         if not user:
             app_logger.warning(f"Login-Versuch mit unbekanntem Username: {username}")
@@ -123,6 +157,16 @@ class AuthService:
         app_logger.info(f"Erfolgreiche Authentifizierung für User: {username}")
         return user
     
+    def _login_drosseln(self, username: str, client_ip: Optional[str]):
+        for grund, limiter, key in (('ip', self.login_limit_ip, client_ip), ('username', self.login_limit_user, username)):
+            if key is None:
+                continue
+            wartezeit = limiter.versuchen(key)
+            if wartezeit > 0:
+                login_throttled.inc(grund=grund)
+                app_logger.warning(f"Login gedrosselt ({grund}) für Username: {username}")
+                raise RateLimitError("Zu viele Login-Versuche, bitte später erneut versuchen", wartezeit)
+    
     def create_tokens(self, user: User) -> dict:
         """Erstelle JWT Access und Refresh Token für User"""
         try:
@@ -160,12 +204,20 @@ class AuthService:
             raise LagerverwaltungError(f"Fehler beim Erstellen der Tokens: {e}")
     
     # Token Blacklisting
-    def blacklist_token(self, jti: str):
-        """Füge Token zur Blacklist hinzu (für Logout)"""
+    def blacklist_token(self, jti: str, expires_at: Optional[int] = None):
+        """Füge Token zur Blacklist hinzu (für Logout)
+        
+        expires_at ist der exp-Claim des Tokens (Unix-Zeit). Nach diesem
+        Zeitpunkt wird der Token ohnehin abgelehnt und der Eintrag kann
+        entfernt werden. Ohne Angabe gilt die längste Token-Laufzeit.
+        """
         try:
-            created_at = datetime.now().isoformat()
-            query = "INSERT OR IGNORE INTO blacklisted_tokens (jti, created_at) VALUES (?, ?)"
-            self.db.execute_insert(query, (jti, created_at))
+            jetzt = datetime.now()
+            if expires_at is None:
+                ablauf = jetzt + timedelta(days=7)
+            else:
+                ablauf = datetime.fromtimestamp(expires_at)
+            self.db.execute_insert(sql('token.sperren'), (jti, jetzt.isoformat(), ablauf.isoformat()))
             app_logger.info(f"Token zur Blacklist hinzugefügt: {jti[:8]}...")
         except Exception as e:
             app_logger.error(f"Fehler beim Blacklisting von Token: {e}")
@@ -173,19 +225,26 @@ class AuthService:
     def is_token_blacklisted(self, jti: str) -> bool:
         """Prüfe ob Token auf der Blacklist steht"""
         try:
-            query = "SELECT COUNT(*) FROM blacklisted_tokens WHERE jti = ?"
-            results = self.db.execute_query(query, (jti,))
+            results = self.db.execute_query(sql('token.gesperrt'), (jti,))
             return results[0][0] > 0
         except Exception as e:
             app_logger.error(f"Fehler beim Prüfen der Token-Blacklist: {e}")
             return False
     
-    def cleanup_blacklisted_tokens(self, days_old: int = 30):
-        """Lösche alte Blacklist-Einträge (Cleanup-Job)"""
-        try:
-            cutoff_date = (datetime.now() - timedelta(days=days_old)).isoformat()
-            query = "DELETE FROM blacklisted_tokens WHERE created_at < ?"
-            self.db.execute_query(query, (cutoff_date,))
-            app_logger.info(f"Alte Blacklist-Tokens (älter als {days_old} Tage) gelöscht")
-        except Exception as e:
-            app_logger.error(f"Fehler beim Cleanup der Blacklist: {e}")
\ No newline at end of file
+    def cleanup_blacklisted_tokens(self, batch_size: int = 500) -> int:
+        """Lösche Blacklist-Einträge abgelaufener Tokens (Cleanup-Job)
+        
+        Gelöscht wird in kurzen Transaktionen zu je batch_size Einträgen,
+        damit Logout und Token-Prüfung währenddessen nicht warten müssen.
+        Gibt die Anzahl gelöschter Einträge zurück.
+        """
+        jetzt = datetime.now().isoformat()
+        geloescht = 0
+        while True:
+            with self.db.transaction() as conn:
+                anzahl = self.db.execute_in(conn, sql('token.abgelaufene_loeschen'), (jetzt, batch_size)).rowcount
+            geloescht += anzahl
+            if anzahl < batch_size:
+                break
+        app_logger.info(f"{geloescht} abgelaufene Tokens aus der Blacklist gelöscht")
+        return geloescht
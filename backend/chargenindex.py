@@ -0,0 +1,201 @@
+"""
+FIFO-Index der offenen Chargen im Speicher
+
+Pro Artikel hält der Index die Chargen mit Restmenge in FIFO-Reihenfolge
+(einlagerungsdatum, id) als deque zusammen mit der laufenden Gesamtmenge.
+Ein Artikel wird beim ersten Zugriff aus lagerbestand geladen; danach
+beantwortet der Index "sind 12 Stück von X da?" ohne SELECT und liefert die
+Chargen für die FIFO-Planung.
+
+Kohärenz: Schreibende Aufrufer melden sich mit schreiben() an und tragen
+ihre Änderung nach dem COMMIT ein. Ein Ladevorgang, während dem eine
+Schreiboperation auf denselben Artikel lief, wird nicht übernommen. Der
+Index gilt nur für den eigenen Prozess; Änderungen anderer Prozesse
+erkennt erst die bedingte Entnahme beim Verkauf, die den Artikel dann
+verwirft.
+"""
+
+import bisect
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from metrics import cache_requests
+from models import Lagerbestand
+
+
+def fifo_planen(chargen, menge: int) -> Optional[List[Tuple[Lagerbestand, int]]]:
+    """Verteilt menge auf die ältesten Chargen; None, wenn die Gesamtmenge nicht reicht"""
+    entnahmen = []
+    verbleibend = menge
+    for charge in chargen:
+        if verbleibend <= 0:
+            break
+        entnahme = min(charge.verfuegbare_menge, verbleibend)
+        entnahmen.append((charge, entnahme))
+        verbleibend -= entnahme
+    return entnahmen if verbleibend <= 0 else None
+
+
+class _ArtikelChargen:
+    __slots__ = ('chargen', 'nach_id', 'summe')
+
+    def __init__(self, chargen: List[Lagerbestand]):
+        self.chargen = deque()
+        self.nach_id: Dict[int, Lagerbestand] = {}
+        self.summe = 0
+        for charge in chargen:
+            self.einfuegen(charge)
+
+    @staticmethod
+    def _schluessel(charge: Lagerbestand) -> tuple:
+        return (charge.einlagerungsdatum, charge.id)
+
+    def einfuegen(self, charge: Lagerbestand):
+        if charge.id in self.nach_id or charge.verfuegbare_menge <= 0:
+            return
+        schluessel = self._schluessel(charge)
+        if not self.chargen or self._schluessel(self.chargen[-1]) <= schluessel:
+            self.chargen.append(charge)
+        else:
+            # Nachträglich erfasster Eingang mit älterem Datum
+            position = bisect.bisect_right([self._schluessel(c) for c in self.chargen], schluessel)
+            self.chargen.insert(position, charge)
+        self.nach_id[charge.id] = charge
+        self.summe += charge.verfuegbare_menge
+
+    def entnehmen(self, charge_id: int, menge: int) -> bool:
+        charge = self.nach_id.get(charge_id)
+        if charge is None or charge.verfuegbare_menge < menge:
+            return False
+        charge.verfuegbare_menge -= menge
+        self.summe -= menge
+        if charge.verfuegbare_menge == 0:
+            del self.nach_id[charge_id]
+            if self.chargen[0] is charge:
+                self.chargen.popleft()
+            else:
+                self.chargen.remove(charge)
+        return True
+
+
+class ChargenIndex:
+    """Thread-sicherer FIFO-Index der offenen Chargen, höchstens maxsize Artikel (LRU)"""
+
+    def __init__(self, laden: Callable[[str], List[Lagerbestand]], maxsize: int = 10000):
+        self._laden = laden
+        self.maxsize = maxsize
+        self._artikel: "OrderedDict[str, _ArtikelChargen]" = OrderedDict()
+        self._laufend: Dict[str, int] = {}
+        self._epoche: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _auswerten(self, artikelnummer: str, geladen: Callable, ungeladen: Callable):
+        """Wertet den Eintrag des Artikels unter dem Lock aus oder lädt die Chargen aus der Datenbank"""
+        with self._lock:
+            eintrag = self._artikel.get(artikelnummer)
+            if eintrag is not None:
+                self._artikel.move_to_end(artikelnummer)
+                cache_requests.inc(cache='fifo_index', result='hit')
+                return geladen(eintrag)
+            ladbar = not self._laufend.get(artikelnummer)
+            epoche = self._epoche.get(artikelnummer, 0)
+        cache_requests.inc(cache='fifo_index', result='miss')
+
+        chargen = self._laden(artikelnummer)
+        with self._lock:
+            # Nur übernehmen, wenn währenddessen niemand die Chargen des Artikels geändert hat
+            if (ladbar and not self._laufend.get(artikelnummer)
+                    and self._epoche.get(artikelnummer, 0) == epoche
+                    and artikelnummer not in self._artikel and self.maxsize > 0):
+                self._artikel[artikelnummer] = _ArtikelChargen([self._kopie(c) for c in chargen])
+                while len(self._artikel) > self.maxsize:
+                    self._artikel.popitem(last=False)
+        return ungeladen(chargen)
+
+    @staticmethod
+    def _kopie(charge: Lagerbestand) -> Lagerbestand:
+        return Lagerbestand(charge.id, charge.artikelnummer, charge.verfuegbare_menge,
+                            charge.einkaufspreis, charge.einlagerungsdatum)
+
+    def menge(self, artikelnummer: str) -> int:
+        """Gesamte Restmenge aller Chargen des Artikels"""
+        return self._auswerten(artikelnummer,
+                               lambda eintrag: eintrag.summe,
+                               lambda chargen: sum(c.verfuegbare_menge for c in chargen))
+
+    def planen(self, artikelnummer: str, menge: int) -> Optional[List[Tuple[Lagerbestand, int]]]:
+        """FIFO-Entnahmen für menge als Kopien der Chargen; None, wenn nicht genug vorhanden ist"""
+        def aus_index(eintrag):
+            if eintrag.summe < menge:
+                return None
+            return [(self._kopie(charge), entnahme) for charge, entnahme in fifo_planen(eintrag.chargen, menge)]
+        return self._auswerten(artikelnummer, aus_index, lambda chargen: fifo_planen(chargen, menge))
+
+    @contextmanager
+    def schreiben(self, artikelnummer: str):
+        """Klammert eine Schreiboperation auf die Chargen eines Artikels"""
+        with self._lock:
+            self._laufend[artikelnummer] = self._laufend.get(artikelnummer, 0) + 1
+            self._epoche[artikelnummer] = self._epoche.get(artikelnummer, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._laufend[artikelnummer] -= 1
+                if not self._laufend[artikelnummer]:
+                    del self._laufend[artikelnummer]
+                self._epoche[artikelnummer] += 1
+
+    def eingelagert(self, charge: Lagerbestand):
+        """Trägt eine neu gebuchte Charge ein, falls der Artikel geladen ist"""
+        with self._lock:
+            eintrag = self._artikel.get(charge.artikelnummer)
+            if eintrag is not None:
+                eintrag.einfuegen(self._kopie(charge))
+
+    def entnommen(self, artikelnummer: str, entnahmen: List[Tuple[Lagerbestand, int]]):
+        """Trägt gebuchte Entnahmen ein; passt eine nicht zum Index, wird der Artikel verworfen"""
+        with self._lock:
+            eintrag = self._artikel.get(artikelnummer)
+            if eintrag is None:
+                return
+            for charge, menge in entnahmen:
+                if not eintrag.entnehmen(charge.id, menge):
+                    del self._artikel[artikelnummer]
+                    return
+
+    def verwerfen(self, artikelnummer: str = None):
+        with self._lock:
+            if artikelnummer is None:
+                self._artikel.clear()
+            else:
+                self._artikel.pop(artikelnummer, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._artikel)
+
+
+class ChargenIndizes:
+    """Ein Index pro Datenbankdatei, gemeinsam für alle InventoryManager des Prozesses"""
+
+    def __init__(self):
+        self._indizes: Dict[str, ChargenIndex] = {}
+        self._lock = threading.Lock()
+
+    def fuer(self, db_path: str, laden: Callable[[str], List[Lagerbestand]], maxsize: int) -> ChargenIndex:
+        with self._lock:
+            index = self._indizes.get(db_path)
+            if index is None:
+                index = self._indizes[db_path] = ChargenIndex(laden, maxsize)
+            return index
+
+    def verwerfen(self, db_path: str):
+        with self._lock:
+            index = self._indizes.pop(db_path, None)
+        if index is not None:
+            index.verwerfen()
+
+
+chargen_indizes = ChargenIndizes()
@@ -13,12 +13,75 @@ class Config:
     
     # Database Configuration
     DATABASE_URL = os.getenv('DATABASE_URL', 'lagerverwaltung.db')
+    DB_BUSY_RETRIES = int(os.getenv('DB_BUSY_RETRIES', '3'))
+    DB_BUSY_BACKOFF = float(os.getenv('DB_BUSY_BACKOFF', '0.05'))  # Sekunden, wächst linear
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '256'))
+    # Bestandsänderungen über einen Schreib-Thread mit gemeinsamen COMMITs
+    DB_SINGLE_WRITER = os.getenv('DB_SINGLE_WRITER', 'false').lower() == 'true'
+    DB_WRITER_BATCH_SIZE = int(os.getenv('DB_WRITER_BATCH_SIZE', '64'))
+    # FIFO-Index der offenen Chargen im Speicher (nur bei einem einzelnen Prozess pro Datenbank)
+    FIFO_INDEX_ENABLED = os.getenv('FIFO_INDEX_ENABLED', 'false').lower() == 'true'
+    FIFO_INDEX_MAX_ARTIKEL = int(os.getenv('FIFO_INDEX_MAX_ARTIKEL', '10000'))
+    
+    # Archivierung aufgebrauchter Chargen (Aufbewahrung nach Einlagerungsdatum)
+    ARCHIV_AUFBEWAHRUNG_TAGE = int(os.getenv('ARCHIV_AUFBEWAHRUNG_TAGE', '365'))
+    ARCHIV_BATCH_GROESSE = int(os.getenv('ARCHIV_BATCH_GROESSE', '500'))
+    
+    # Cache aktiver User für Token-Refresh und /me (Größe 0 schaltet ihn ab)
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '1024'))
+    USER_CACHE_TTL_SECONDS = float(os.getenv('USER_CACHE_TTL_SECONDS', '60'))
+    
+    # Login-Drosselung (Token-Bucket: sofort erlaubte Versuche und Nachlauf pro Minute)
+    LOGIN_USER_BURST = int(os.getenv('LOGIN_USER_BURST', '5'))
+    LOGIN_USER_PER_MINUTE = float(os.getenv('LOGIN_USER_PER_MINUTE', '5'))
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', '20'))
+    LOGIN_IP_PER_MINUTE = float(os.getenv('LOGIN_IP_PER_MINUTE', '20'))
+    LOGIN_THROTTLE_MAX_KEYS = int(os.getenv('LOGIN_THROTTLE_MAX_KEYS', '10000'))
+    
+    # Ereignis-Stream (Server-Sent Events); jeder verbundene Client belegt einen Thread.
+    # Im ASGI-Betrieb begrenzt asgi.py auf die Hälfte von ASGI_DB_THREADS, falls höher
+    SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', '16'))
+    SSE_PUFFER_GROESSE = int(os.getenv('SSE_PUFFER_GROESSE', '1000'))  # Ereignisse zum Wiederaufsetzen
+    SSE_CLIENT_QUEUE_GROESSE = int(os.getenv('SSE_CLIENT_QUEUE_GROESSE', '100'))
+    SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+    SSE_MAX_STREAM_SECONDS = float(os.getenv('SSE_MAX_STREAM_SECONDS', '300'))  # danach verbindet der Client neu
+    
+    # Outbox-Änderungs-Feed
+    OUTBOX_AUFBEWAHRUNG_TAGE = int(os.getenv('OUTBOX_AUFBEWAHRUNG_TAGE', '30'))
+    OUTBOX_SEITE_MAX = int(os.getenv('OUTBOX_SEITE_MAX', '1000'))  # Einträge pro Abruf
+    
+    # Reservierungen ohne Angabe von gueltig_bis
+    RESERVIERUNG_STANDARD_TAGE = int(os.getenv('RESERVIERUNG_STANDARD_TAGE', '14'))
+    VERFUEGBARKEIT_MAX_POSITIONEN = int(os.getenv('VERFUEGBARKEIT_MAX_POSITIONEN', '1000'))  # pro Sammelabfrage
+    
+    # Sammelimport von Lieferantenkatalogen
+    IMPORT_CHUNK_GROESSE = int(os.getenv('IMPORT_CHUNK_GROESSE', '500'))  # Zeilen pro Transaktion
+    IMPORT_MAX_FEHLERMELDUNGEN = int(os.getenv('IMPORT_MAX_FEHLERMELDUNGEN', '1000'))  # abgelehnte Zeilen im Bericht
+    
+    # Wartungsjobs im Hintergrund
+    MAINTENANCE_ENABLED = os.getenv('MAINTENANCE_ENABLED', 'true').lower() == 'true'
+    RESERVATION_SWEEP_INTERVAL_SECONDS = int(os.getenv('RESERVATION_SWEEP_INTERVAL_SECONDS', '300'))
+    TOKEN_PRUNE_INTERVAL_SECONDS = int(os.getenv('TOKEN_PRUNE_INTERVAL_SECONDS', '3600'))
+    TOKEN_PRUNE_BATCH_SIZE = int(os.getenv('TOKEN_PRUNE_BATCH_SIZE', '500'))
+    OUTBOX_PRUNE_INTERVAL_SECONDS = int(os.getenv('OUTBOX_PRUNE_INTERVAL_SECONDS', '3600'))
+    # Neuaufbau des Artikelnummern-Index, übernimmt Artikel aus anderen Prozessen
+    AUTOCOMPLETE_REFRESH_INTERVAL_SECONDS = int(os.getenv('AUTOCOMPLETE_REFRESH_INTERVAL_SECONDS', '600'))
+    
+    # Slow-Query-Log (Schwelle < 0 schaltet das Log ab)
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+    SLOW_QUERY_LOG_PER_MINUTE = int(os.getenv('SLOW_QUERY_LOG_PER_MINUTE', '20'))
     
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_DIR = os.getenv('LOG_DIR', 'logs')
     
+    # Metrics Configuration
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    # Bearer-Token für Prometheus; ohne Token verlangt /api/metrics ein gültiges JWT
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    
     # Server Configuration
+    ASGI_DB_THREADS = int(os.getenv('ASGI_DB_THREADS', '8'))  # Executor-Threads im ASGI-Betrieb
     DEBUG = os.getenv('FLASK_ENV', 'production') == 'development'
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', '5000'))
@@ -46,6 +109,7 @@ class ProductionConfig(Config):
 class TestConfig(Config):
     DEBUG = True
     DATABASE_URL = ':memory:'  # In-memory database for tests
+    MAINTENANCE_ENABLED = False  # Keine Hintergrund-Threads in Tests
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
 
 # Configuration factory
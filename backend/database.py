@@ -1,12 +1,127 @@
 import sqlite3
 import os
+import time
+import threading
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
-from logger_config import app_logger
+from config import get_config
+from logger_config import app_logger, slow_query_logger
 from exceptions import DatabaseError
+from metrics import registry
+from statements import STATEMENTS
+from writer import SingleWriter, WriterGestoppt, schreib_threads
+from chargenindex import chargen_indizes
+from nummernindex import artikelnummer_indizes
+
+db_connections_in_use = registry.gauge(
+    'lager_db_connections_in_use',
+    'Aktuell für Statements belegte SQLite-Verbindungen'
+)
+db_pool_connections = registry.gauge(
+    'lager_db_pool_connections',
+    'Offene gepoolte SQLite-Verbindungen (eine pro Thread und Database-Instanz)'
+)
+db_busy_retries = registry.counter(
+    'lager_db_busy_retries_total',
+    'Wiederholungen nach SQLITE_BUSY / database is locked'
+)
+
+db_statement_duration = registry.histogram(
+    'lager_db_statement_duration_seconds',
+    'Ausführungsdauer von SQL-Statements',
+    ('operation',)
+)
+db_slow_queries = registry.counter(
+    'lager_db_slow_queries_total',
+    'Statements über der Slow-Query-Schwelle'
+)
+
+def _is_busy_error(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+def _params_shape(params) -> str:
+    """Beschreibt Parameter nur über Anzahl und Typen, ohne Werte zu loggen"""
+    if not params:
+        return "()"
+    typen = [type(p).__name__ for p in params]
+    if len(typen) > 10:
+        return f"({len(typen)} Parameter: {', '.join(sorted(set(typen)))})"
+    return "(" + ", ".join(typen) + ")"
+
+class SlowQueryLog:
+    """Schreibt langsame Statements mit Query-Plan ins Slow-Query-Log, begrenzt pro Minute"""
+    
+    def __init__(self, max_per_minute: int):
+        self.max_per_minute = max_per_minute
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._logged = 0
+        self._suppressed = 0
+    
+    def _acquire(self):
+        """Gibt (darf_loggen, Anzahl unterdrückter Einträge im letzten Fenster) zurück"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._window_start >= 60:
+                suppressed = self._suppressed
+                self._window_start = now
+                self._logged = 0
+                self._suppressed = 0
+            else:
+                suppressed = 0
+            if self._logged >= self.max_per_minute:
+                self._suppressed += 1
+                return False, suppressed
+            self._logged += 1
+            return True, suppressed
+    
+    def record(self, conn, query: str, params, duration: float):
+        db_slow_queries.inc()
+        allowed, suppressed = self._acquire()
+        if suppressed:
+            slow_query_logger.warning(f"{suppressed} weitere langsame Statements in der letzten Minute nicht protokolliert")
+        if not allowed:
+            return
+        try:
+            plan_rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
+            plan = "\n".join(f"    {row[0]}|{row[1]}|{row[3]}" for row in plan_rows)
+        except sqlite3.Error as e:
+            plan = f"    (kein Query-Plan verfügbar: {e})"
+        sql = " ".join(query.split())
+        slow_query_logger.warning(
+            f"Langsames Statement: {duration * 1000:.1f} ms, Parameter {_params_shape(params)}\n"
+            f"  SQL: {sql}\n"
+            f"  Query-Plan:\n{plan}"
+        )
+
+# Ein gemeinsames Rate-Limit für alle Database-Instanzen des Prozesses
+slow_query_log = SlowQueryLog(get_config().SLOW_QUERY_LOG_PER_MINUTE)
+
+class _PooledConnection(sqlite3.Connection):
+    """SQLite-Verbindung, deren Lebensdauer in den Pool-Metriken erfasst wird"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        db_pool_connections.inc()
+        weakref.finalize(self, db_pool_connections.dec)
 
 class Database:
     def __init__(self, db_path="lagerverwaltung.db"):
         self.db_path = db_path
+        config = get_config()
+        # Alle registrierten Statements plus Reserve für dynamisches SQL im Cache halten
+        self.statement_cache_size = max(config.DB_STATEMENT_CACHE_SIZE, len(STATEMENTS) + 32)
+        self._local = threading.local()
+        self._generation = 0
+        self.busy_retries = config.DB_BUSY_RETRIES
+        self.busy_backoff = config.DB_BUSY_BACKOFF
+        self.slow_query_threshold = config.SLOW_QUERY_THRESHOLD_MS / 1000.0
+        self.slow_query_log = slow_query_log
+        self.single_writer = config.DB_SINGLE_WRITER
+        self.writer_batch_size = config.DB_WRITER_BATCH_SIZE
+        self.volltextsuche = False
         app_logger.info(f"Initialisiere Datenbank: {db_path}")
         try:
             self.init_database()
@@ -15,19 +130,120 @@ class Database:
             app_logger.error(f"Fehler bei Datenbank-Initialisierung: {e}")
             raise DatabaseError(f"Datenbank-Initialisierung fehlgeschlagen: {e}")
     
+    def _volltextsuche_einrichten(self, cursor) -> bool:
+        """Legt den FTS5-Index artikel_suche samt Triggern an; False, wenn SQLite ohne FTS5 gebaut ist"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'artikel_suche'")
+        if cursor.fetchone() is None:
+            try:
+                cursor.execute('''
+                    CREATE VIRTUAL TABLE artikel_suche USING fts5 (
+                        artikelnummer, bezeichnung, lieferant_name,
+                        tokenize = 'unicode61 remove_diacritics 2'
+                    )
+                ''')
+            except sqlite3.OperationalError as e:
+                app_logger.warning(f"FTS5 nicht verfügbar, Artikelsuche nutzt LIKE: {e}")
+                return False
+            cursor.execute(STATEMENTS['suche.neu_aufbauen'])
+        
+        # rowid des Suchindex ist artikel.id
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_artikel_suche_einfuegen AFTER INSERT ON artikel
+            BEGIN
+                INSERT INTO artikel_suche (rowid, artikelnummer, bezeichnung, lieferant_name)
+                VALUES (NEW.id, NEW.artikelnummer, NEW.bezeichnung,
+                        (SELECT name FROM lieferanten WHERE id = NEW.lieferant_id));
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_artikel_suche_aendern
+            AFTER UPDATE OF artikelnummer, bezeichnung, lieferant_id ON artikel
+            BEGIN
+                DELETE FROM artikel_suche WHERE rowid = OLD.id;
+                INSERT INTO artikel_suche (rowid, artikelnummer, bezeichnung, lieferant_name)
+                VALUES (NEW.id, NEW.artikelnummer, NEW.bezeichnung,
+                        (SELECT name FROM lieferanten WHERE id = NEW.lieferant_id));
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_artikel_suche_loeschen AFTER DELETE ON artikel
+            BEGIN
+                DELETE FROM artikel_suche WHERE rowid = OLD.id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_lieferant_suche_aendern AFTER UPDATE OF name ON lieferanten
+            BEGIN
+                UPDATE artikel_suche SET lieferant_name = NEW.name
+                WHERE rowid IN (SELECT id FROM artikel WHERE lieferant_id = NEW.id);
+            END
+        ''')
+        return True
+    
     def get_connection(self):
+        """Gepoolte Verbindung des aktuellen Threads
+        
+        Jeder Thread behält seine Verbindung, solange sich db_path nicht
+        ändert und close_connections() nicht aufgerufen wurde. Dadurch
+        bleibt der Statement-Cache von sqlite3 über Requests hinweg erhalten,
+        sofern der Server seine Threads wiederverwendet (ASGI-Executor,
+        Thread-Pools von WSGI-Servern). Der Entwicklungsserver von app.run()
+        startet pro Request einen neuen Thread und damit eine neue Verbindung;
+        dort bringt der Pool keine Wiederverwendung des Statement-Caches.
+        """
+        local = self._local
+        key = (self.db_path, self._generation)
+        conn = getattr(local, 'conn', None)
+        if conn is not None and local.key == key:
+            return conn
+        if conn is not None:
+            local.conn = None
+            conn.close()
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(self.db_path, cached_statements=self.statement_cache_size,
+                                   factory=_PooledConnection)
             conn.execute("PRAGMA foreign_keys = ON")
-            return conn
         except sqlite3.Error as e:
             app_logger.error(f"Datenbankverbindung fehlgeschlagen: {e}")
             raise DatabaseError(f"Datenbankverbindung fehlgeschlagen: {e}")
+        local.conn = conn
+        local.key = key
+        return conn
+    
+    def close_connections(self):
+        """Verwirft alle gepoolten Verbindungen; andere Threads öffnen beim nächsten Zugriff neu"""
+        self._generation += 1
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+    
+    def zuruecksetzen(self):
+        """Verwirft zusätzlich den prozessweiten Zustand der Datei, etwa bevor sie ersetzt oder gelöscht wird
+        
+        Beendet den gemeinsamen Schreib-Thread und leert FIFO- und
+        Artikelnummern-Index. Neue Database-Instanzen auf dieselbe Datei
+        lassen diesen Zustand dagegen unangetastet.
+        """
+        self.close_connections()
+        self._prozesszustand_verwerfen()
+    
+    def _prozesszustand_verwerfen(self):
+        schreib_threads.beenden(self.db_path)
+        chargen_indizes.verwerfen(self.db_path)
+        artikelnummer_indizes.verwerfen(self.db_path)
     
     def init_database(self):
+        # Datei kann seit dem letzten Öffnen ersetzt worden sein
+        self.close_connections()
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            # Eine neu angelegte Datei unter einem bekannten Pfad: Indizes und Schreib-Thread gehören zur alten
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master")
+            if cursor.fetchone()[0] == 0:
+                self._prozesszustand_verwerfen()
+            
             # Lieferanten Tabelle
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS lieferanten (
@@ -40,7 +256,8 @@ class Database:
             # Artikel Tabelle
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS artikel (
-                    artikelnummer TEXT PRIMARY KEY,
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    artikelnummer TEXT NOT NULL UNIQUE,
                     bezeichnung TEXT NOT NULL,
                     lieferant_id INTEGER NOT NULL,
                     mindestmenge INTEGER DEFAULT 1,
@@ -77,11 +294,11 @@ class Database:
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS lagerbestand (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    artikelnummer TEXT NOT NULL,
+                    artikel_id INTEGER NOT NULL,
                     verfuegbare_menge INTEGER NOT NULL,
                     einkaufspreis REAL NOT NULL,
                     einlagerungsdatum TEXT NOT NULL,
-                    FOREIGN KEY (artikelnummer) REFERENCES artikel (artikelnummer)
+                    FOREIGN KEY (artikel_id) REFERENCES artikel (id)
                 )
             ''')
             
@@ -90,12 +307,13 @@ class Database:
                 CREATE TABLE IF NOT EXISTS verkaeufe (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     projekt_id INTEGER NOT NULL,
-                    artikelnummer TEXT NOT NULL,
+                    artikel_id INTEGER NOT NULL,
                     verkaufte_menge INTEGER NOT NULL,
                     verkaufspreis REAL NOT NULL,
                     verkaufsdatum TEXT NOT NULL,
+                    wareneinsatz REAL,
                     FOREIGN KEY (projekt_id) REFERENCES projekte (id),
-                    FOREIGN KEY (artikelnummer) REFERENCES artikel (artikelnummer)
+                    FOREIGN KEY (artikel_id) REFERENCES artikel (id)
                 )
             ''')
             
@@ -115,25 +333,371 @@ class Database:
                 CREATE TABLE IF NOT EXISTS blacklisted_tokens (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     jti TEXT NOT NULL UNIQUE,
-                    created_at TEXT NOT NULL
+                    created_at TEXT NOT NULL,
+                    expires_at TEXT
                 )
             ''')
             
+            # Migration: Ablaufzeitpunkt gesperrter Tokens; Altbestand mit maximaler Token-Laufzeit
+            cursor.execute("PRAGMA table_info(blacklisted_tokens)")
+            columns = [column[1] for column in cursor.fetchall()]
+            if 'expires_at' not in columns:
+                cursor.execute("ALTER TABLE blacklisted_tokens ADD COLUMN expires_at TEXT")
+                cursor.execute("UPDATE blacklisted_tokens SET expires_at = strftime('%Y-%m-%dT%H:%M:%S', created_at, '+7 days')")
+            
+            conn.commit()
+            
+            # Migration: Artikel-Surrogatschlüssel für Lagerbestand und Verkäufe
+            cursor.execute("PRAGMA table_info(artikel)")
+            columns = [column[1] for column in cursor.fetchall()]
+            if 'id' not in columns:
+                self._migriere_artikel_id(conn)
+            
+            # Migration: FIFO-Wareneinsatz je Verkauf (bei Altdaten NULL)
+            cursor.execute("PRAGMA table_info(verkaeufe)")
+            columns = [column[1] for column in cursor.fetchall()]
+            if 'wareneinsatz' not in columns:
+                cursor.execute("ALTER TABLE verkaeufe ADD COLUMN wareneinsatz REAL")
+            
+            # Archiv für aufgebrauchte Chargen; hält lagerbestand klein für FIFO und Berichte
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS lagerbestand_archiv (
+                    id INTEGER PRIMARY KEY,
+                    artikel_id INTEGER NOT NULL,
+                    verfuegbare_menge INTEGER NOT NULL,
+                    einkaufspreis REAL NOT NULL,
+                    einlagerungsdatum TEXT NOT NULL,
+                    archiviert_am TEXT NOT NULL,
+                    FOREIGN KEY (artikel_id) REFERENCES artikel (id)
+                )
+            ''')
+            
+            # Reservierungen von Projekten mit Ablaufdatum
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS reservierungen (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    projekt_id INTEGER NOT NULL,
+                    artikel_id INTEGER NOT NULL,
+                    menge INTEGER NOT NULL,
+                    erstellt_am TEXT NOT NULL,
+                    gueltig_bis TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'offen',
+                    FOREIGN KEY (projekt_id) REFERENCES projekte (id),
+                    FOREIGN KEY (artikel_id) REFERENCES artikel (id)
+                )
+            ''')
+            
+            # Bestand und Reservierungen je Artikel; verfügbar = bestand - reserviert
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'artikel_bestand'")
+            bestand_neu = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS artikel_bestand (
+                    artikel_id INTEGER PRIMARY KEY,
+                    bestand INTEGER NOT NULL DEFAULT 0,
+                    reserviert INTEGER NOT NULL DEFAULT 0,
+                    unter_mindestmenge INTEGER NOT NULL DEFAULT 0,
+                    FOREIGN KEY (artikel_id) REFERENCES artikel (id)
+                )
+            ''')
+            # Migration: Kennzeichen für Bestand unter Mindestmenge
+            cursor.execute("PRAGMA table_info(artikel_bestand)")
+            if 'unter_mindestmenge' not in [column[1] for column in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE artikel_bestand ADD COLUMN unter_mindestmenge INTEGER NOT NULL DEFAULT 0")
+                cursor.execute(STATEMENTS['bestand.leeren'])
+                bestand_neu = True
+            if bestand_neu:
+                cursor.execute(STATEMENTS['bestand.neu_aufbauen'])
+            
+            # Neue Artikel und geänderte Mindestmengen halten das Kennzeichen aktuell
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_artikel_bestand_anlegen AFTER INSERT ON artikel
+                BEGIN
+                    INSERT OR IGNORE INTO artikel_bestand (artikel_id, bestand, reserviert, unter_mindestmenge)
+                    VALUES (NEW.id, 0, 0, COALESCE(NEW.mindestmenge, 0) > 0);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_artikel_mindestmenge AFTER UPDATE OF mindestmenge ON artikel
+                BEGIN
+                    UPDATE artikel_bestand SET unter_mindestmenge = bestand < COALESCE(NEW.mindestmenge, 0)
+                    WHERE artikel_id = NEW.id;
+                END
+            ''')
+            
+            # Volltextsuche über Artikelnummer, Bezeichnung und Lieferantenname
+            self.volltextsuche = self._volltextsuche_einrichten(cursor)
+            
+            # Outbox: jede Änderung von InventoryManager, in derselben Transaktion geschrieben
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS outbox (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    erstellt_am TEXT NOT NULL,
+                    entitaet TEXT NOT NULL,
+                    schluessel TEXT NOT NULL,
+                    aktion TEXT NOT NULL,
+                    daten TEXT NOT NULL
+                )
+            ''')
+            
+            # Monatliche Verkaufsverdichtung je Artikel und Projekt
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'verkaeufe_monat'")
+            rollup_neu = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS verkaeufe_monat (
+                    monat TEXT NOT NULL,
+                    artikel_id INTEGER NOT NULL,
+                    projekt_id INTEGER NOT NULL,
+                    menge INTEGER NOT NULL,
+                    umsatz REAL NOT NULL,
+                    wareneinsatz REAL NOT NULL,
+                    anzahl_verkaeufe INTEGER NOT NULL,
+                    PRIMARY KEY (monat, artikel_id, projekt_id)
+                ) WITHOUT ROWID
+            ''')
+            if rollup_neu:
+                # Bestehende Verkäufe einmalig verdichten
+                cursor.execute(STATEMENTS['monat.neu_aufbauen'])
+            
+            # Indizes für FIFO-Zugriff und Joins über den Surrogatschlüssel;
+            # Datumsspalten am Ende, damit Zeitraum-Berichte Bereichs-Scans nutzen
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_lagerbestand_artikel ON lagerbestand (artikel_id, einlagerungsdatum)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_lagerbestand_archiv_artikel ON lagerbestand_archiv (artikel_id, einlagerungsdatum)")
+            # Nur aufgebrauchte Chargen; Grundlage für die Archivierung
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_lagerbestand_leer ON lagerbestand (einlagerungsdatum) WHERE verfuegbare_menge = 0")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_outbox_erstellt ON outbox (erstellt_am)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_artikel_bestand_niedrig ON artikel_bestand (artikel_id) WHERE unter_mindestmenge = 1")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_verkaeufe_datum ON verkaeufe (verkaufsdatum)")
+            # Nur offene Reservierungen: Ablauf-Sweeper und Einlösen beim Verkauf
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservierungen_ablauf ON reservierungen (gueltig_bis) WHERE status = 'offen'")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservierungen_projekt ON reservierungen (projekt_id, artikel_id) WHERE status = 'offen'")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_blacklisted_tokens_ablauf ON blacklisted_tokens (expires_at)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_verkaeufe_artikel_datum ON verkaeufe (artikel_id, verkaufsdatum)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_verkaeufe_projekt_datum ON verkaeufe (projekt_id, verkaufsdatum)")
+            # Abhängigkeitsprüfung beim Löschen und Fremdschlüssel-Prüfung auf der Elternseite
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_artikel_lieferant ON artikel (lieferant_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_projekte_kunde ON projekte (kunde_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservierungen_projekt_alle ON reservierungen (projekt_id)")
+            # Durch die Datums-Indizes ersetzt
+            cursor.execute("DROP INDEX IF EXISTS idx_verkaeufe_artikel")
+            cursor.execute("DROP INDEX IF EXISTS idx_verkaeufe_projekt")
+            
             conn.commit()
     
-    def execute_query(self, query, params=None):
+    def _migriere_artikel_id(self, conn):
+        """Baut artikel, lagerbestand und verkaeufe mit INTEGER-Schlüssel artikel_id neu auf
+        
+        Ältere Datenbanken referenzieren Artikel über die TEXT-Artikelnummer.
+        SQLite kann Primär- und Fremdschlüssel nicht per ALTER TABLE ändern,
+        daher werden die Tabellen in einer Transaktion kopiert und ersetzt.
+        """
+        app_logger.info("Migriere Artikel-Referenzen auf INTEGER-Schlüssel artikel_id")
+        conn.execute("PRAGMA foreign_keys = OFF")
         try:
-            app_logger.debug(f"Führe Query aus: {query[:100]}..." + ("" if len(query) <= 100 else ""))
+            conn.execute("BEGIN")
+            conn.execute('''
+                CREATE TABLE artikel_neu (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    artikelnummer TEXT NOT NULL UNIQUE,
+                    bezeichnung TEXT NOT NULL,
+                    lieferant_id INTEGER NOT NULL,
+                    mindestmenge INTEGER DEFAULT 1,
+                    FOREIGN KEY (lieferant_id) REFERENCES lieferanten (id)
+                )
+            ''')
+            conn.execute('''
+                INSERT INTO artikel_neu (artikelnummer, bezeichnung, lieferant_id, mindestmenge)
+                SELECT artikelnummer, bezeichnung, lieferant_id, mindestmenge FROM artikel ORDER BY rowid
+            ''')
+            conn.execute('''
+                CREATE TABLE lagerbestand_neu (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    artikel_id INTEGER NOT NULL,
+                    verfuegbare_menge INTEGER NOT NULL,
+                    einkaufspreis REAL NOT NULL,
+                    einlagerungsdatum TEXT NOT NULL,
+                    FOREIGN KEY (artikel_id) REFERENCES artikel (id)
+                )
+            ''')
+            conn.execute('''
+                INSERT INTO lagerbestand_neu (id, artikel_id, verfuegbare_menge, einkaufspreis, einlagerungsdatum)
+                SELECT l.id, a.id, l.verfuegbare_menge, l.einkaufspreis, l.einlagerungsdatum
+                FROM lagerbestand l JOIN artikel_neu a ON a.artikelnummer = l.artikelnummer
+            ''')
+            conn.execute('''
+                CREATE TABLE verkaeufe_neu (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    projekt_id INTEGER NOT NULL,
+                    artikel_id INTEGER NOT NULL,
+                    verkaufte_menge INTEGER NOT NULL,
+                    verkaufspreis REAL NOT NULL,
+                    verkaufsdatum TEXT NOT NULL,
+                    FOREIGN KEY (projekt_id) REFERENCES projekte (id),
+                    FOREIGN KEY (artikel_id) REFERENCES artikel (id)
+                )
+            ''')
+            conn.execute('''
+                INSERT INTO verkaeufe_neu (id, projekt_id, artikel_id, verkaufte_menge, verkaufspreis, verkaufsdatum)
+                SELECT v.id, v.projekt_id, a.id, v.verkaufte_menge, v.verkaufspreis, v.verkaufsdatum
+                FROM verkaeufe v JOIN artikel_neu a ON a.artikelnummer = v.artikelnummer
+            ''')
+            
+            for tabelle in ('lagerbestand', 'verkaeufe'):
+                alt = conn.execute(f"SELECT COUNT(*) FROM {tabelle}").fetchone()[0]
+                neu = conn.execute(f"SELECT COUNT(*) FROM {tabelle}_neu").fetchone()[0]
+                if alt != neu:
+                    raise DatabaseError(f"Migration artikel_id: {alt - neu} Zeilen in {tabelle} ohne gültigen Artikel")
+            
+            for tabelle in ('verkaeufe', 'lagerbestand', 'artikel'):
+                conn.execute(f"DROP TABLE {tabelle}")
+            for tabelle in ('artikel', 'lagerbestand', 'verkaeufe'):
+                conn.execute(f"ALTER TABLE {tabelle}_neu RENAME TO {tabelle}")
+            
+            verletzungen = conn.execute("PRAGMA foreign_key_check").fetchall()
+            if verletzungen:
+                raise DatabaseError(f"Migration artikel_id verletzt Fremdschlüssel: {verletzungen[:5]}")
+            conn.execute("COMMIT")
+            app_logger.info("Migration auf artikel_id abgeschlossen")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.execute("PRAGMA foreign_keys = ON")
+    
+    def _retry_busy(self, operation):
+        """Führt eine Operation aus und wiederholt sie bei SQLITE_BUSY mit wachsender Pause"""
+        versuch = 0
+        while True:
+            try:
+                return operation()
+            except sqlite3.OperationalError as e:
+                if not _is_busy_error(e) or versuch >= self.busy_retries:
+                    raise
+                versuch += 1
+                db_busy_retries.inc()
+                app_logger.warning(f"Datenbank gesperrt, Wiederholung {versuch}/{self.busy_retries}: {e}")
+                time.sleep(self.busy_backoff * versuch)
+    
+    def _run(self, operation):
+        """Führt eine Operation auf einer Verbindung aus und wiederholt sie bei SQLITE_BUSY"""
+        def auf_verbindung():
             with self.get_connection() as conn:
+                return operation(conn)
+        
+        db_connections_in_use.inc()
+        try:
+            return self._retry_busy(auf_verbindung)
+        finally:
+            db_connections_in_use.dec()
+    
+    @contextmanager
+    def transaction(self):
+        """Schreibtransaktion auf der gepoolten Verbindung des aktuellen Threads
+        
+        BEGIN IMMEDIATE holt die Schreibsperre sofort, Lese- und Schreibzugriffe
+        im Block sehen daher einen stabilen Stand. Bei einer Ausnahme wird die
+        Transaktion zurückgerollt; SQL-Fehler werden als DatabaseError gemeldet.
+        """
+        conn = self.get_connection()
+        db_connections_in_use.inc()
+        try:
+            self._retry_busy(lambda: conn.execute("BEGIN IMMEDIATE"))
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        except sqlite3.IntegrityError as e:
+            app_logger.error(f"Integritätsfehler in Transaktion: {e}")
+            raise DatabaseError(f"Integritätsfehler: {e}")
+        except sqlite3.Error as e:
+            app_logger.error(f"SQL-Fehler in Transaktion: {e}")
+            raise DatabaseError(f"Datenbankfehler: {e}")
+        finally:
+            db_connections_in_use.dec()
+    
+    def write(self, operation):
+        """Führt eine Schreiboperation operation(conn) atomar aus
+        
+        Mit DB_SINGLE_WRITER läuft sie auf dem Schreib-Thread, der wartende
+        Operationen zu einem gemeinsamen COMMIT bündelt; sonst in einer
+        eigenen transaction() auf der Verbindung des aufrufenden Threads.
+        """
+        if not self.single_writer:
+            with self.transaction() as conn:
+                return operation(conn)
+        
+        writer = self._get_writer()
+        if writer.is_writer_thread:
+            return operation(writer.conn)
+        try:
+            try:
+                return writer.submit(operation)
+            except WriterGestoppt:
+                # Gleichzeitig zurückgesetzt; der nächste Schreib-Thread übernimmt
+                return self._get_writer().submit(operation)
+        except sqlite3.IntegrityError as e:
+            app_logger.error(f"Integritätsfehler im Schreib-Thread: {e}")
+            raise DatabaseError(f"Integritätsfehler: {e}")
+        except sqlite3.Error as e:
+            app_logger.error(f"SQL-Fehler im Schreib-Thread: {e}")
+            raise DatabaseError(f"Datenbankfehler: {e}")
+    
+    def _get_writer(self) -> SingleWriter:
+        try:
+            return schreib_threads.fuer(self)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Schreib-Thread konnte nicht gestartet werden: {e}")
+    
+    def execute_in(self, conn, query, params=(), row_factory=None):
+        """Führt ein Statement innerhalb von transaction() aus und liefert den Cursor"""
+        cursor = conn.cursor()
+        if row_factory is not None:
+            cursor.row_factory = row_factory
+        self._timed(conn, 'transaction', query, params, lambda: cursor.execute(query, params))
+        return cursor
+    
+    def execute_many_in(self, conn, query, seq_of_params):
+        """Führt ein Statement innerhalb von transaction() für alle Parameterzeilen per executemany aus"""
+        seq_of_params = list(seq_of_params)
+        cursor = conn.cursor()
+        self._timed(conn, 'transaction', query, seq_of_params[0] if seq_of_params else (),
+                    lambda: cursor.executemany(query, seq_of_params))
+        return cursor
+    
+    def _timed(self, conn, operation_name, query, params, execute):
+        """Misst ein Statement und protokolliert es oberhalb der Slow-Query-Schwelle"""
+        start = time.perf_counter()
+        result = execute()
+        duration = time.perf_counter() - start
+        db_statement_duration.observe(duration, operation=operation_name)
+        if 0 <= self.slow_query_threshold <= duration:
+            self.slow_query_log.record(conn, query, params, duration)
+        return result
+    
+    def execute_query(self, query, params=None, row_factory=None):
+        try:
+            app_logger.debug(f"Führe Query aus: {query[:100]}..." + ("" if len(query) <= 100 else ""))
+            
+            def operation(conn):
                 cursor = conn.cursor()
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
+                if row_factory is not None:
+                    cursor.row_factory = row_factory
+                
+                def execute():
+                    if params:
+                        cursor.execute(query, params)
+                    else:
+                        cursor.execute(query)
+                    return cursor.fetchall()
+                
+                result = self._timed(conn, 'query', query, params, execute)
                 conn.commit()
-                result = cursor.fetchall()
-                app_logger.debug(f"Query erfolgreich, {len(result)} Zeilen zurückgegeben")
                 return result
+            
+            result = self._run(operation)
+            app_logger.debug(f"Query erfolgreich, {len(result)} Zeilen zurückgegeben")
+            return result
         except sqlite3.IntegrityError as e:
             app_logger.error(f"Integritätsfehler bei Query: {e}")
             raise DatabaseError(f"Integritätsfehler: {e}")
@@ -147,13 +711,16 @@ class Database:
     def execute_insert(self, query, params):
         try:
             app_logger.debug(f"Führe Insert aus: {query[:100]}..." + ("" if len(query) <= 100 else ""))
-            with self.get_connection() as conn:
+            
+            def operation(conn):
                 cursor = conn.cursor()
-                cursor.execute(query, params)
+                self._timed(conn, 'insert', query, params, lambda: cursor.execute(query, params))
                 conn.commit()
-                lastrowid = cursor.lastrowid
-                app_logger.debug(f"Insert erfolgreich, ID: {lastrowid}")
-                return lastrowid
+                return cursor.lastrowid
+            
+            lastrowid = self._run(operation)
+            app_logger.debug(f"Insert erfolgreich, ID: {lastrowid}")
+            return lastrowid
         except sqlite3.IntegrityError as e:
             app_logger.error(f"Integritätsfehler bei Insert: {e}")
             raise DatabaseError(f"Integritätsfehler: {e}")
@@ -0,0 +1,165 @@
+"""
+Ereignisse für Server-Sent Events
+
+InventoryManager veröffentlicht nach jedem COMMIT Bestandsänderungen und
+Über- bzw. Unterschreitungen der Mindestmenge. Der Broker nummeriert sie,
+hält die letzten in einem Ringpuffer und verteilt sie an die Abonnenten.
+
+Jeder Abonnent hat eine begrenzte Queue. Ist sie voll, wird der Abonnent
+abgehängt statt den Schreibpfad zu bremsen; der Client verbindet sich neu
+und holt verpasste Ereignisse über Last-Event-ID aus dem Ringpuffer nach.
+Die Ereignis-ID enthält eine Kennung des Prozessstarts, damit ein Client
+nach einem Neustart oder zu altem Stand ein 'reset' erhält und den
+vollständigen Zustand neu lädt.
+
+Der Broker lebt im Speicher des Prozesses: Clients erhalten nur Ereignisse
+aus Schreibvorgängen desselben Prozesses. Läuft die API mit mehreren
+Worker-Prozessen, sehen Clients Änderungen der anderen Worker erst über
+den Änderungs-Feed (/api/aenderungen) bzw. beim Neuladen.
+"""
+
+import json
+import queue
+import threading
+import uuid
+from collections import deque
+from typing import List, Optional
+from config import get_config
+from exceptions import KapazitaetError
+from metrics import registry
+
+sse_clients = registry.gauge(
+    'lager_sse_clients',
+    'Verbundene Clients des Ereignis-Streams'
+)
+sse_events = registry.counter(
+    'lager_sse_events_total',
+    'Veröffentlichte Ereignisse nach Typ',
+    ('typ',)
+)
+sse_clients_dropped = registry.counter(
+    'lager_sse_clients_dropped_total',
+    'Clients, die wegen voller Queue abgehängt wurden'
+)
+
+
+class Ereignis:
+    __slots__ = ('id', 'typ', 'daten')
+
+    def __init__(self, id: str, typ: str, daten: dict):
+        self.id = id
+        self.typ = typ
+        self.daten = daten
+
+    def sse(self) -> str:
+        """Ereignis im text/event-stream-Format"""
+        zeilen = [f"id: {self.id}"] if self.id else []
+        zeilen.append(f"event: {self.typ}")
+        zeilen.append(f"data: {json.dumps(self.daten, ensure_ascii=False)}")
+        return "\n".join(zeilen) + "\n\n"
+
+
+class Abonnement:
+    """Begrenzte Ereignis-Queue eines Clients"""
+
+    def __init__(self, broker: "EventBroker", queue_groesse: int):
+        self._broker = broker
+        self._queue: "queue.Queue[Ereignis]" = queue.Queue(maxsize=queue_groesse)
+        self.abgehaengt = False
+
+    def _zustellen(self, ereignis: Ereignis) -> bool:
+        try:
+            self._queue.put_nowait(ereignis)
+            return True
+        except queue.Full:
+            self.abgehaengt = True
+            return False
+
+    def naechstes(self, timeout: float) -> Optional[Ereignis]:
+        """Nächstes Ereignis oder None nach timeout Sekunden bzw. wenn der Client abgehängt wurde"""
+        try:
+            return self._queue.get(timeout=timeout) if not self.abgehaengt else self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def abbestellen(self):
+        self._broker._entfernen(self)
+
+
+class EventBroker:
+    """Verteilt Ereignisse an Abonnenten, mit Ringpuffer zum Wiederaufsetzen"""
+
+    def __init__(self, puffer_groesse: int = 1000, queue_groesse: int = 100):
+        self.queue_groesse = queue_groesse
+        self.kennung = uuid.uuid4().hex[:8]
+        self._puffer: "deque[Ereignis]" = deque(maxlen=puffer_groesse)
+        self._abonnenten: List[Abonnement] = []
+        self._nummer = 0
+        self._lock = threading.Lock()
+
+    def veroeffentlichen(self, typ: str, daten: dict) -> str:
+        with self._lock:
+            self._nummer += 1
+            ereignis = Ereignis(f"{self.kennung}-{self._nummer}", typ, daten)
+            self._puffer.append(ereignis)
+            abgehaengt = [abo for abo in self._abonnenten if not abo._zustellen(ereignis)]
+            for abo in abgehaengt:
+                self._abonnenten.remove(abo)
+        sse_events.inc(typ=typ)
+        if abgehaengt:
+            sse_clients_dropped.inc(len(abgehaengt))
+            sse_clients.dec(len(abgehaengt))
+        return ereignis.id
+
+    def abonnieren(self, letzte_id: str = None, max_abonnenten: int = None) -> Abonnement:
+        """Neues Abonnement; mit letzte_id werden verpasste Ereignisse zuerst zugestellt
+        
+        Mit max_abonnenten wird unter demselben Lock geprüft und eingetragen,
+        so dass gleichzeitige Verbindungen die Grenze nicht überschreiten.
+        """
+        abo = Abonnement(self, self.queue_groesse)
+        with self._lock:
+            if max_abonnenten is not None and len(self._abonnenten) >= max_abonnenten:
+                raise KapazitaetError(f"Höchstens {max_abonnenten} verbundene Clients")
+            if letzte_id:
+                nachholen = self._seit(letzte_id)
+                if nachholen is None:
+                    abo._zustellen(Ereignis('', 'reset', {'grund': 'Stand nicht mehr verfügbar, bitte neu laden'}))
+                else:
+                    # Passt der Rückstand nicht in die Queue, holt der Client den Rest beim nächsten Verbinden
+                    for ereignis in nachholen:
+                        if not abo._zustellen(ereignis):
+                            break
+            if abo.abgehaengt:
+                return abo
+            self._abonnenten.append(abo)
+        sse_clients.inc()
+        return abo
+
+    def _seit(self, letzte_id: str) -> Optional[List[Ereignis]]:
+        """Ereignisse nach letzte_id aus dem Ringpuffer oder None, wenn die Lücke nicht schließbar ist"""
+        kennung, _, nummer = letzte_id.partition('-')
+        if kennung != self.kennung or not nummer.isdigit():
+            return None
+        nummer = int(nummer)
+        if nummer > self._nummer:
+            return None
+        aelteste = self._nummer - len(self._puffer) + 1
+        if nummer + 1 < aelteste:
+            return None
+        return list(self._puffer)[nummer + 1 - aelteste:]
+
+    def _entfernen(self, abo: Abonnement):
+        with self._lock:
+            if abo not in self._abonnenten:
+                return
+            self._abonnenten.remove(abo)
+        sse_clients.dec()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._abonnenten)
+
+
+# Ein Broker für alle InventoryManager-Instanzen des Prozesses
+event_broker = EventBroker(get_config().SSE_PUFFER_GROESSE, get_config().SSE_CLIENT_QUEUE_GROESSE)
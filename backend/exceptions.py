@@ -35,4 +35,14 @@ class NotFoundError(LagerverwaltungError):
 
 class IntegrityError(LagerverwaltungError):
     """Referentielle Integrität verletzt"""
-    pass
\ No newline at end of file
+    pass
+
+class KapazitaetError(LagerverwaltungError):
+    """Kapazitätsgrenze erreicht, später erneut versuchen"""
+    pass
+
+class RateLimitError(LagerverwaltungError):
+    """Zu viele Versuche in kurzer Zeit"""
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
\ No newline at end of file
@@ -1,19 +1,119 @@
-from datetime import datetime
-from typing import List, Optional
+import json
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
 from database import Database
-from models import Lieferant, Artikel, Kunde, Projekt, Lagerbestand, Verkauf
+from config import get_config
+from statements import sql
+from models import Lieferant, Artikel, Kunde, Projekt, Lagerbestand, Verkauf, Reservierung
 from logger_config import app_logger
+from metrics import registry
+from chargenindex import chargen_indizes, fifo_planen
+from nummernindex import artikelnummer_indizes
+from events import event_broker
+from zeitraeume import datum_pruefen
 from exceptions import (
     LieferantError, ArtikelError, LagerError, VerkaufError, 
     ValidationError, NotFoundError, IntegrityError, DatabaseError
 )
 
+# Neue Planungsrunden, wenn eine Charge zwischen Lesen und Entnahme verändert wurde
+FIFO_MAX_VERSUCHE = 5
+
+fifo_konflikte = registry.counter(
+    'lager_fifo_conflicts_total',
+    'FIFO-Entnahmen, die wegen gleichzeitiger Änderung einer Charge neu geplant wurden'
+)
+
+class _ChargeVeraendert(Exception):
+    """Bedingte Entnahme hat keine Zeile getroffen; die Transaktion wird zurückgerollt"""
+
+class _NichtVerfuegbar(Exception):
+    """Menge ist durch Reservierungen anderer Projekte gebunden"""
+
+def _menge_pruefen(menge, bezeichnung: str):
+    # bool ist eine Unterklasse von int, True darf aber nicht als Menge 1 durchgehen
+    if isinstance(menge, bool) or not isinstance(menge, int) or menge <= 0:
+        raise ValidationError(f"{bezeichnung} muss eine positive ganze Zahl sein")
+
 class InventoryManager:
-    def __init__(self):
+    def __init__(self, db: Optional[Database] = None):
         app_logger.info("Initialisiere InventoryManager")
-        self.db = Database()
+        # Ohne db die Datei aus der Konfiguration; Wartungsbefehle übergeben ihre eigene
+        self.db = db if db is not None else Database()
+        config = get_config()
+        self.fifo_index_aktiv = config.FIFO_INDEX_ENABLED
+        self.fifo_index_max_artikel = config.FIFO_INDEX_MAX_ARTIKEL
         app_logger.info("InventoryManager erfolgreich initialisiert")
     
+    @property
+    def chargen_index(self):
+        """Gemeinsamer FIFO-Index für die aktuelle Datenbank oder None, wenn abgeschaltet"""
+        if not self.fifo_index_aktiv:
+            return None
+        db = self.db
+        return chargen_indizes.fuer(
+            db.db_path,
+            lambda artikelnummer: db.execute_query(sql('lager.fifo_offen'), (artikelnummer,),
+                                                   row_factory=Lagerbestand.row_factory),
+            self.fifo_index_max_artikel)
+    
+    @property
+    def artikelnummer_index(self):
+        """Gemeinsamer Index der Artikelnummern für die Autovervollständigung"""
+        db = self.db
+        return artikelnummer_indizes.fuer(
+            db.db_path, lambda: (row[0] for row in db.execute_query(sql('artikel.nummern'))))
+    
+    def _chargen_schreiben(self, artikelnummer: str):
+        index = self.chargen_index
+        return index.schreiben(artikelnummer) if index is not None else nullcontext()
+    
+    def _aenderung(self, conn, entitaet: str, schluessel, aktion: str, daten: dict):
+        """Hängt eine Änderung in derselben Transaktion an die Outbox an"""
+        self.db.execute_in(conn, sql('outbox.anhaengen'),
+                           (datetime.now().isoformat(timespec='seconds'), entitaet, str(schluessel), aktion,
+                            json.dumps(daten, ensure_ascii=False)))
+    
+    def aenderungen_seit(self, seit: int = 0, limit: int = 500) -> List[dict]:
+        """Outbox-Einträge mit Sequenznummer größer als seit, aufsteigend"""
+        if seit < 0:
+            raise ValidationError("'since' darf nicht negativ sein")
+        if limit <= 0:
+            raise ValidationError("'limit' muss positiv sein")
+        return [{
+            'seq': seq,
+            'erstellt_am': erstellt_am,
+            'entitaet': entitaet,
+            'schluessel': schluessel,
+            'aktion': aktion,
+            'daten': json.loads(daten)
+        } for seq, erstellt_am, entitaet, schluessel, aktion, daten in
+            self.db.execute_query(sql('outbox.seit'), (seit, limit))]
+    
+    def outbox_luecke(self, seit: int) -> Tuple[bool, int]:
+        """Ob Einträge nach seit schon bereinigt sind, und die zuletzt vergebene Sequenznummer
+        
+        Nach einer Lücke muss das Folgesystem den vollständigen Stand neu laden
+        und kann danach ab der zurückgegebenen Sequenznummer weiterlesen.
+        """
+        aelteste, letzte = self.db.execute_query(sql('outbox.stand'))[0]
+        if aelteste is None:
+            aelteste = letzte + 1
+        return seit + 1 < aelteste, letzte
+    
+    def outbox_bereinigen(self, aufbewahrung_tage: int, batch_groesse: int = 500) -> int:
+        """Löscht Outbox-Einträge, die älter als die Aufbewahrungsfrist sind (Wartungsjob)"""
+        stichtag = (datetime.now() - timedelta(days=aufbewahrung_tage)).isoformat(timespec='seconds')
+        gesamt = 0
+        while True:
+            anzahl = self.db.write(lambda conn: self.db.execute_in(
+                conn, sql('outbox.bereinigen'), (stichtag, batch_groesse)).rowcount)
+            gesamt += anzahl
+            if anzahl < batch_groesse:
+                break
+        return gesamt
+    
     # Lieferanten Management
     def lieferant_hinzufuegen(self, name: str, kontakt: str = "") -> int:
         if not name or not name.strip():
@@ -22,28 +122,54 @@ class InventoryManager:
         name = name.strip()
         app_logger.info(f"Füge Lieferant hinzu: {name}")
         
+        def anlegen(conn):
+            zeilen = self.db.execute_in(conn, sql('lieferant.einfuegen'), (name, kontakt)).fetchall()
+            if not zeilen:
+                raise LieferantError(f"Lieferant '{name}' existiert bereits")
+            lieferant_id = zeilen[0][0]
+            self._aenderung(conn, 'lieferant', lieferant_id, 'angelegt',
+                            {'id': lieferant_id, 'name': name, 'kontakt': kontakt})
+            return lieferant_id
+        
         try:
-            query = "INSERT INTO lieferanten (name, kontakt) VALUES (?, ?)"
-            lieferant_id = self.db.execute_insert(query, (name, kontakt))
+            lieferant_id = self.db.write(anlegen)
             app_logger.info(f"Lieferant erfolgreich hinzugefügt: ID {lieferant_id}")
             return lieferant_id
         except DatabaseError as e:
-            if "UNIQUE constraint failed" in str(e):
-                raise LieferantError(f"Lieferant '{name}' existiert bereits")
             raise LieferantError(f"Fehler beim Hinzufügen des Lieferanten: {e}")
     
+    def lieferant_speichern(self, name: str, kontakt: str = "") -> dict:
+        """Legt den Lieferanten mit diesem Namen an oder aktualisiert seinen Kontakt
+        
+        'aktion' im Ergebnis ist 'angelegt', 'geaendert' oder 'unveraendert'.
+        """
+        if not name or not name.strip():
+            raise ValidationError("Lieferantenname darf nicht leer sein")
+        
+        name = name.strip()
+        
+        def speichern(conn):
+            vorher = self.db.execute_in(conn, sql('lieferant.nach_name'), (name,)).fetchone()
+            if vorher is not None and vorher[2] == kontakt:
+                return vorher[0], 'unveraendert'
+            lieferant_id = self.db.execute_in(conn, sql('lieferant.speichern'), (name, kontakt)).fetchall()[0][0]
+            aktion = 'angelegt' if vorher is None else 'geaendert'
+            self._aenderung(conn, 'lieferant', lieferant_id, aktion, {'id': lieferant_id, 'name': name, 'kontakt': kontakt})
+            return lieferant_id, aktion
+        
+        try:
+            lieferant_id, aktion = self.db.write(speichern)
+        except DatabaseError as e:
+            raise LieferantError(f"Fehler beim Speichern des Lieferanten: {e}")
+        app_logger.info(f"Lieferant '{name}' gespeichert ({aktion}): ID {lieferant_id}")
+        return {'id': lieferant_id, 'name': name, 'kontakt': kontakt, 'aktion': aktion}
+    
     def lieferanten_auflisten(self) -> List[Lieferant]:
-        query = "SELECT id, name, kontakt FROM lieferanten ORDER BY name"
-        results = self.db.execute_query(query)
-        return [Lieferant(id=row[0], name=row[1], kontakt=row[2]) for row in results]
+        return self.db.execute_query(sql('lieferant.auflisten'), row_factory=Lieferant.row_factory)
     
     def lieferant_finden(self, lieferant_id: int) -> Optional[Lieferant]:
-        query = "SELECT id, name, kontakt FROM lieferanten WHERE id = ?"
-        results = self.db.execute_query(query, (lieferant_id,))
-        if results:
-            row = results[0]
-            return Lieferant(id=row[0], name=row[1], kontakt=row[2])
-        return None
+        results = self.db.execute_query(sql('lieferant.finden'), (lieferant_id,), row_factory=Lieferant.row_factory)
+        return results[0] if results else None
     
     def lieferant_aktualisieren(self, lieferant_id: int, name: str, kontakt: str = "") -> bool:
         if not name or not name.strip():
@@ -54,18 +180,19 @@ class InventoryManager:
         name = name.strip()
         app_logger.info(f"Aktualisiere Lieferant ID {lieferant_id}: {name}")
         
-        # Prüfen ob Lieferant existiert
-        if not self.lieferant_finden(lieferant_id):
-            raise NotFoundError(f"Lieferant mit ID {lieferant_id} nicht gefunden")
+        def aktualisieren(conn):
+            if self.db.execute_in(conn, sql('lieferant.aktualisieren'), (name, kontakt, lieferant_id)).rowcount != 1:
+                if not self.db.execute_in(conn, sql('lieferant.finden'), (lieferant_id,)).fetchall():
+                    raise NotFoundError(f"Lieferant mit ID {lieferant_id} nicht gefunden")
+                raise LieferantError(f"Lieferant '{name}' existiert bereits")
+            self._aenderung(conn, 'lieferant', lieferant_id, 'geaendert',
+                            {'id': lieferant_id, 'name': name, 'kontakt': kontakt})
         
         try:
-            query = "UPDATE lieferanten SET name = ?, kontakt = ? WHERE id = ?"
-            self.db.execute_query(query, (name, kontakt, lieferant_id))
+            self.db.write(aktualisieren)
             app_logger.info(f"Lieferant ID {lieferant_id} erfolgreich aktualisiert")
             return True
         except DatabaseError as e:
-            if "UNIQUE constraint failed" in str(e):
-                raise LieferantError(f"Lieferant '{name}' existiert bereits")
             raise LieferantError(f"Fehler beim Aktualisieren des Lieferanten: {e}")
     
     def lieferant_loeschen(self, lieferant_id: int) -> bool:
@@ -74,21 +201,21 @@ class InventoryManager:
         
         app_logger.info(f"Lösche Lieferant ID {lieferant_id}")
         
-        # Prüfen ob Lieferant existiert
-        if not self.lieferant_finden(lieferant_id):
-            raise NotFoundError(f"Lieferant mit ID {lieferant_id} nicht gefunden")
+        # Existenz- und Abhängigkeitsprüfung in derselben Transaktion wie das Löschen
+        def loeschen(conn):
+            existiert, hat_artikel = self.db.execute_in(
+                conn, sql('lieferant.loeschpruefung'), (lieferant_id, lieferant_id)).fetchone()
+            if not existiert:
+                raise NotFoundError(f"Lieferant mit ID {lieferant_id} nicht gefunden")
+            if hat_artikel:
+                # Zählen nur im Fehlerfall, für die Meldung
+                anzahl = self.db.execute_in(conn, sql('lieferant.artikel_zaehlen'), (lieferant_id,)).fetchone()[0]
+                raise IntegrityError(f"Lieferant kann nicht gelöscht werden: {anzahl} Artikel sind zugeordnet")
+            self.db.execute_in(conn, sql('lieferant.loeschen'), (lieferant_id,))
+            self._aenderung(conn, 'lieferant', lieferant_id, 'geloescht', {'id': lieferant_id})
         
         try:
-            # Prüfen ob Artikel mit diesem Lieferanten existieren
-            artikel_check = self.db.execute_query(
-                "SELECT COUNT(*) FROM artikel WHERE lieferant_id = ?", 
-                (lieferant_id,)
-            )
-            if artikel_check[0][0] > 0:
-                raise IntegrityError(f"Lieferant kann nicht gelöscht werden: {artikel_check[0][0]} Artikel sind zugeordnet")
-            
-            query = "DELETE FROM lieferanten WHERE id = ?"
-            self.db.execute_query(query, (lieferant_id,))
+            self.db.write(loeschen)
             app_logger.info(f"Lieferant ID {lieferant_id} erfolgreich gelöscht")
             return True
         except DatabaseError as e:
@@ -109,184 +236,747 @@ class InventoryManager:
         bezeichnung = bezeichnung.strip()
         app_logger.info(f"Füge Artikel hinzu: {artikelnummer} - {bezeichnung}")
         
-        # Prüfen ob Lieferant existiert
-        if not self.lieferant_finden(lieferant_id):
-            raise NotFoundError(f"Lieferant mit ID {lieferant_id} nicht gefunden")
+        def anlegen(conn):
+            if not self.db.execute_in(conn, sql('artikel.einfuegen'),
+                                      (artikelnummer, bezeichnung, mindestmenge, lieferant_id)).fetchall():
+                # Nichts eingefügt: Lieferant fehlt oder Artikelnummer ist vergeben
+                if not self.db.execute_in(conn, sql('lieferant.finden'), (lieferant_id,)).fetchall():
+                    raise NotFoundError(f"Lieferant mit ID {lieferant_id} nicht gefunden")
+                raise ArtikelError(f"Artikel '{artikelnummer}' existiert bereits")
+            self._aenderung(conn, 'artikel', artikelnummer, 'angelegt', {
+                'artikelnummer': artikelnummer, 'bezeichnung': bezeichnung,
+                'lieferant_id': lieferant_id, 'mindestmenge': mindestmenge
+            })
         
         try:
-            query = "INSERT INTO artikel (artikelnummer, bezeichnung, lieferant_id, mindestmenge) VALUES (?, ?, ?, ?)"
-            self.db.execute_insert(query, (artikelnummer, bezeichnung, lieferant_id, mindestmenge))
+            self.db.write(anlegen)
+            self.artikelnummer_index.hinzufuegen(artikelnummer)
             app_logger.info(f"Artikel {artikelnummer} erfolgreich hinzugefügt")
             return True
         except DatabaseError as e:
-            if "UNIQUE constraint failed" in str(e):
-                raise ArtikelError(f"Artikel '{artikelnummer}' existiert bereits")
             raise ArtikelError(f"Fehler beim Hinzufügen des Artikels: {e}")
     
+    def artikel_speichern(self, artikelnummer: str, bezeichnung: str, lieferant_id: int,
+                          mindestmenge: int = None) -> dict:
+        """Legt den Artikel an oder aktualisiert ihn
+        
+        Ohne mindestmenge bleibt die bisherige erhalten, neue Artikel erhalten 1.
+        'aktion' im Ergebnis ist 'angelegt', 'geaendert' oder 'unveraendert'.
+        """
+        if not artikelnummer or not artikelnummer.strip():
+            raise ValidationError("Artikelnummer darf nicht leer sein")
+        if not isinstance(bezeichnung, str) or not bezeichnung.strip():
+            raise ValidationError("Artikelbezeichnung darf nicht leer sein")
+        if isinstance(lieferant_id, bool) or not isinstance(lieferant_id, int) or lieferant_id <= 0:
+            raise ValidationError("Ungültige Lieferanten-ID")
+        if mindestmenge is not None and (isinstance(mindestmenge, bool) or not isinstance(mindestmenge, int)
+                                         or mindestmenge < 0):
+            raise ValidationError("Mindestmenge muss eine nicht-negative ganze Zahl sein")
+        
+        artikelnummer = artikelnummer.strip()
+        bezeichnung = bezeichnung.strip()
+        
+        def speichern(conn):
+            vorher = self.db.execute_in(conn, sql('artikel.finden'), (artikelnummer,),
+                                        row_factory=Artikel.row_factory).fetchone()
+            menge = mindestmenge if mindestmenge is not None else (vorher.mindestmenge if vorher else 1)
+            if vorher is not None and (vorher.bezeichnung, vorher.lieferant_id, vorher.mindestmenge) == (
+                    bezeichnung, lieferant_id, menge):
+                return 'unveraendert', menge, None
+            # Wie bei mindestmenge_aendern: ein Wechsel des Mindestmengen-Kennzeichens wird gemeldet
+            pruefen = vorher is not None and vorher.mindestmenge != menge
+            kennzeichen = self.db.execute_in(conn, sql('bestand.kennzeichen'), (artikelnummer,)).fetchall() if pruefen else None
+            if not self.db.execute_in(conn, sql('artikel.speichern'),
+                                      (artikelnummer, bezeichnung, menge, lieferant_id)).fetchall():
+                raise NotFoundError(f"Lieferant mit ID {lieferant_id} nicht gefunden")
+            aktion = 'angelegt' if vorher is None else 'geaendert'
+            self._aenderung(conn, 'artikel', artikelnummer, aktion, {
+                'artikelnummer': artikelnummer, 'bezeichnung': bezeichnung,
+                'lieferant_id': lieferant_id, 'mindestmenge': menge
+            })
+            if pruefen:
+                kennzeichen = (kennzeichen, self.db.execute_in(conn, sql('bestand.kennzeichen'), (artikelnummer,)).fetchall())
+            return aktion, menge, kennzeichen
+        
+        try:
+            aktion, menge, kennzeichen = self.db.write(speichern)
+        except DatabaseError as e:
+            raise ArtikelError(f"Fehler beim Speichern des Artikels: {e}")
+        if aktion == 'angelegt':
+            self.artikelnummer_index.hinzufuegen(artikelnummer)
+        if kennzeichen is not None:
+            vorher, nachher = kennzeichen
+            if vorher and nachher and vorher[0][1] != nachher[0][1]:
+                self._mindestmenge_melden(artikelnummer, nachher[0][1], nachher[0][0], menge)
+        app_logger.info(f"Artikel {artikelnummer} gespeichert ({aktion})")
+        return {'artikelnummer': artikelnummer, 'bezeichnung': bezeichnung, 'lieferant_id': lieferant_id,
+                'mindestmenge': menge, 'aktion': aktion}
+    
+    def mindestmenge_aendern(self, artikelnummer: str, mindestmenge: int) -> bool:
+        if isinstance(mindestmenge, bool) or not isinstance(mindestmenge, int) or mindestmenge < 0:
+            raise ValidationError("Mindestmenge muss eine nicht-negative ganze Zahl sein")
+        
+        # Der Trigger auf artikel bewertet das Kennzeichen in derselben Transaktion neu
+        def aendern(conn):
+            vorher = self.db.execute_in(conn, sql('bestand.kennzeichen'), (artikelnummer,)).fetchall()
+            cursor = self.db.execute_in(conn, sql('artikel.mindestmenge_setzen'), (mindestmenge, artikelnummer))
+            if cursor.rowcount != 1:
+                return None
+            self._aenderung(conn, 'artikel', artikelnummer, 'geaendert',
+                            {'artikelnummer': artikelnummer, 'mindestmenge': mindestmenge})
+            return vorher, self.db.execute_in(conn, sql('bestand.kennzeichen'), (artikelnummer,)).fetchall()
+        
+        ergebnis = self.db.write(aendern)
+        if ergebnis is None:
+            raise NotFoundError(f"Artikel {artikelnummer} nicht gefunden")
+        app_logger.info(f"Mindestmenge von {artikelnummer} auf {mindestmenge} gesetzt")
+        
+        vorher, nachher = ergebnis
+        if vorher and nachher and vorher[0][1] != nachher[0][1]:
+            self._mindestmenge_melden(artikelnummer, nachher[0][1], nachher[0][0], mindestmenge)
+        return True
+    
     def artikel_auflisten(self) -> List[tuple]:
-        query = """
-        SELECT a.artikelnummer, a.bezeichnung, l.name as lieferant_name, a.mindestmenge
-        FROM artikel a
-        JOIN lieferanten l ON a.lieferant_id = l.id
-        ORDER BY a.artikelnummer
+        return self.db.execute_query(sql('artikel.auflisten'))
+    
+    def artikel_suchen(self, begriff: str, limit: int = 20) -> List[tuple]:
+        """Volltextsuche über Artikelnummer, Bezeichnung und Lieferant, nach Relevanz sortiert
+        
+        Jedes Wort muss als Wortanfang vorkommen, Akzente und Umlaute werden
+        ignoriert: "buro schw" findet "Bürostuhl schwarz".
         """
-        return self.db.execute_query(query)
+        if not begriff or not begriff.strip():
+            raise ValidationError("Suchbegriff darf nicht leer sein")
+        if limit <= 0:
+            raise ValidationError("'limit' muss positiv sein")
+        
+        if not self.db.volltextsuche:
+            # % und _ im Suchbegriff sind Text, keine Platzhalter
+            muster = begriff.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            return self.db.execute_query(sql('artikel.suche_like'), (f"%{muster}%", limit))
+        
+        # Jedes Wort als Phrase mit Präfix-Suche; Operatoren der FTS5-Syntax werden so neutralisiert
+        woerter = [w.replace('"', '""') for w in begriff.split() if any(z.isalnum() for z in w)]
+        if not woerter:
+            return []
+        ausdruck = " ".join(f'"{w}"*' for w in woerter)
+        return self.db.execute_query(sql('artikel.suche'), (ausdruck, limit))
+    
+    def artikelnummern_vervollstaendigen(self, praefix: str, limit: int = 10) -> List[str]:
+        """Artikelnummern mit dem Präfix aus dem Index im Speicher, alphabetisch"""
+        if limit <= 0:
+            raise ValidationError("'limit' muss positiv sein")
+        return self.artikelnummer_index.vorschlaege(praefix.strip(), limit)
     
     def artikel_finden(self, artikelnummer: str) -> Optional[Artikel]:
-        query = "SELECT artikelnummer, bezeichnung, lieferant_id, mindestmenge FROM artikel WHERE artikelnummer = ?"
-        results = self.db.execute_query(query, (artikelnummer,))
-        if results:
-            row = results[0]
-            return Artikel(artikelnummer=row[0], bezeichnung=row[1], lieferant_id=row[2], mindestmenge=row[3])
-        return None
+        results = self.db.execute_query(sql('artikel.finden'), (artikelnummer,), row_factory=Artikel.row_factory)
+        return results[0] if results else None
+    
+    @staticmethod
+    def _katalogzeile(daten) -> dict:
+        """Prüft eine Katalogzeile und liefert die bereinigten Felder"""
+        if not isinstance(daten, dict):
+            raise ValidationError("Zeile ist kein Objekt mit Feldern")
+        zeile = {}
+        for feld in ('artikelnummer', 'bezeichnung', 'lieferant'):
+            wert = daten.get(feld)
+            if not isinstance(wert, str) or not wert.strip():
+                raise ValidationError(f"Feld '{feld}' fehlt oder ist leer")
+            zeile[feld] = wert.strip()
+        
+        mindestmenge = daten.get('mindestmenge')
+        if isinstance(mindestmenge, str):
+            mindestmenge = mindestmenge.strip() or None
+            if mindestmenge is not None:
+                if not mindestmenge.isdigit():
+                    raise ValidationError("Mindestmenge muss eine nicht-negative ganze Zahl sein")
+                mindestmenge = int(mindestmenge)
+        elif mindestmenge is not None and (isinstance(mindestmenge, bool) or not isinstance(mindestmenge, int)
+                                           or mindestmenge < 0):
+            raise ValidationError("Mindestmenge muss eine nicht-negative ganze Zahl sein")
+        zeile['mindestmenge'] = mindestmenge
+        kontakt = daten.get('lieferant_kontakt')
+        zeile['lieferant_kontakt'] = kontakt.strip() if isinstance(kontakt, str) else ''
+        return zeile
+    
+    def katalog_importieren(self, zeilen: Iterable[Tuple[int, object]], ab_zeile: int = 0,
+                            lieferanten_anlegen: bool = True, chunk_groesse: int = None,
+                            fortschritt: Callable[[int], None] = None) -> dict:
+        """Legt Artikel eines Lieferantenkatalogs an oder aktualisiert sie
+        
+        zeilen liefert (Zeilennummer, Datensatz), siehe katalog.zeilen_lesen.
+        Je chunk_groesse Zeilen werden die Lieferanten über ihren Namen
+        aufgelöst und die Artikel per executemany in einer Transaktion
+        geschrieben; ungültige Zeilen werden einzeln abgelehnt. Nach jedem
+        COMMIT erhält fortschritt die letzte verarbeitete Zeilennummer, mit
+        ab_zeile setzt ein abgebrochener Import danach wieder auf.
+        """
+        config = get_config()
+        if chunk_groesse is None:
+            chunk_groesse = config.IMPORT_CHUNK_GROESSE
+        if chunk_groesse <= 0:
+            raise ValidationError("Chunk-Größe muss positiv sein")
+        if ab_zeile < 0:
+            raise ValidationError("'ab_zeile' darf nicht negativ sein")
+        
+        bericht = {'angelegt': 0, 'aktualisiert': 0, 'unveraendert': 0, 'abgelehnt': 0,
+                   'lieferanten_angelegt': 0, 'letzte_zeile': ab_zeile, 'fehler': []}
+        lieferanten = {}  # Name -> ID, nur bereits committete
+        
+        def ablehnen(nummer, artikelnummer, fehler):
+            bericht['abgelehnt'] += 1
+            if len(bericht['fehler']) < config.IMPORT_MAX_FEHLERMELDUNGEN:
+                bericht['fehler'].append({'zeile': nummer, 'artikelnummer': artikelnummer, 'fehler': fehler})
+        
+        def abschliessen(chunk, bis_zeile):
+            if chunk:
+                self._katalog_chunk_buchen(chunk, lieferanten, lieferanten_anlegen, bericht, ablehnen)
+            bericht['letzte_zeile'] = bis_zeile
+            if fortschritt is not None:
+                fortschritt(bis_zeile)
+        
+        app_logger.info(f"Starte Katalogimport ab Zeile {ab_zeile + 1}")
+        chunk = []
+        gelesen = 0
+        gelesen_bis = ab_zeile
+        for nummer, daten in zeilen:
+            if nummer <= ab_zeile:
+                continue
+            gelesen += 1
+            gelesen_bis = nummer
+            try:
+                chunk.append((nummer, self._katalogzeile(daten)))
+            except ValidationError as e:
+                ablehnen(nummer, daten.get('artikelnummer') if isinstance(daten, dict) else None, e.message)
+            if gelesen % chunk_groesse == 0:
+                abschliessen(chunk, gelesen_bis)
+                chunk = []
+        if chunk or gelesen_bis != bericht['letzte_zeile']:
+            abschliessen(chunk, gelesen_bis)
+        bericht['fehler'].sort(key=lambda fehler: fehler['zeile'])
+        
+        app_logger.info(f"Katalogimport bis Zeile {gelesen_bis}: {bericht['angelegt']} angelegt, "
+                        f"{bericht['aktualisiert']} aktualisiert, {bericht['abgelehnt']} abgelehnt")
+        return bericht
+    
+    def _katalog_chunk_buchen(self, chunk: list, lieferanten: dict, lieferanten_anlegen: bool,
+                              bericht: dict, ablehnen: Callable):
+        def buchen(conn):
+            neue_lieferanten, angelegte_lieferanten, abgelehnt = {}, 0, []
+            offen = {zeile['lieferant'] for _, zeile in chunk} - lieferanten.keys()
+            if offen:
+                for lieferant_id, name in self.db.execute_in(conn, sql('lieferant.nach_namen'),
+                                                             (json.dumps(sorted(offen)),)):
+                    neue_lieferanten[name] = lieferant_id
+            if lieferanten_anlegen:
+                for _, zeile in chunk:
+                    name = zeile['lieferant']
+                    if name in lieferanten or name in neue_lieferanten:
+                        continue
+                    kontakt = zeile['lieferant_kontakt']
+                    lieferant_id = self.db.execute_in(conn, sql('lieferant.einfuegen'), (name, kontakt)).fetchall()[0][0]
+                    self._aenderung(conn, 'lieferant', lieferant_id, 'angelegt',
+                                    {'id': lieferant_id, 'name': name, 'kontakt': kontakt})
+                    neue_lieferanten[name] = lieferant_id
+                    angelegte_lieferanten += 1
+            
+            # Mehrfach vorkommende Artikelnummern: die letzte Zeile gilt
+            artikel = {}
+            for nummer, zeile in chunk:
+                lieferant_id = lieferanten.get(zeile['lieferant'], neue_lieferanten.get(zeile['lieferant']))
+                if lieferant_id is None:
+                    abgelehnt.append((nummer, zeile['artikelnummer'], f"Lieferant '{zeile['lieferant']}' nicht gefunden"))
+                    continue
+                artikel.pop(zeile['artikelnummer'], None)
+                artikel[zeile['artikelnummer']] = (zeile['bezeichnung'], lieferant_id, zeile['mindestmenge'])
+            
+            bestehend = {row[0]: tuple(row[1:]) for row in self.db.execute_in(
+                conn, sql('artikel.nach_nummern'), (json.dumps(list(artikel)),))}
+            angelegt, geaendert = [], []
+            for artikelnummer, (bezeichnung, lieferant_id, mindestmenge) in artikel.items():
+                vorher = bestehend.get(artikelnummer)
+                if mindestmenge is None:
+                    mindestmenge = vorher[2] if vorher is not None else 1
+                werte = (artikelnummer, bezeichnung, lieferant_id, mindestmenge)
+                if vorher is None:
+                    angelegt.append(werte)
+                elif vorher != werte[1:]:
+                    geaendert.append(werte)
+            
+            # Eine neue Mindestmenge kann das Kennzeichen im Bestand umschalten (Trigger)
+            mindestmenge_neu = {werte[0]: werte[3] for werte in geaendert if bestehend[werte[0]][2] != werte[3]}
+            kennzeichen_vorher = {artikelnummer: self.db.execute_in(conn, sql('bestand.kennzeichen'),
+                                                                    (artikelnummer,)).fetchall()
+                                  for artikelnummer in mindestmenge_neu}
+            
+            self.db.execute_many_in(conn, sql('artikel.upsert'), angelegt + geaendert)
+            
+            wechsel = []
+            for artikelnummer, mindestmenge in mindestmenge_neu.items():
+                vorher = kennzeichen_vorher[artikelnummer]
+                nachher = self.db.execute_in(conn, sql('bestand.kennzeichen'), (artikelnummer,)).fetchall()
+                if vorher and nachher and vorher[0][1] != nachher[0][1]:
+                    wechsel.append((artikelnummer, nachher[0][1], nachher[0][0], mindestmenge))
+            jetzt = datetime.now().isoformat(timespec='seconds')
+            self.db.execute_many_in(conn, sql('outbox.anhaengen'), [
+                (jetzt, 'artikel', werte[0], aktion, json.dumps({
+                    'artikelnummer': werte[0], 'bezeichnung': werte[1],
+                    'lieferant_id': werte[2], 'mindestmenge': werte[3]
+                }, ensure_ascii=False))
+                for aktion, liste in (('angelegt', angelegt), ('geaendert', geaendert)) for werte in liste
+            ])
+            return (neue_lieferanten, angelegte_lieferanten, abgelehnt,
+                    [werte[0] for werte in angelegt], len(geaendert), len(artikel), wechsel)
+        
+        try:
+            (neue_lieferanten, angelegte_lieferanten, abgelehnt,
+             angelegt, geaendert, gesamt, wechsel) = self.db.write(buchen)
+        except DatabaseError as e:
+            raise ArtikelError(f"Katalogimport nach Zeile {bericht['letzte_zeile']} abgebrochen: {e}")
+        lieferanten.update(neue_lieferanten)
+        for fehler in abgelehnt:
+            ablehnen(*fehler)
+        if angelegt:
+            self.artikelnummer_index.hinzufuegen(*angelegt)
+        for artikelnummer, unter_mindestmenge, bestand, mindestmenge in wechsel:
+            self._mindestmenge_melden(artikelnummer, unter_mindestmenge, bestand, mindestmenge)
+        bericht['angelegt'] += len(angelegt)
+        bericht['aktualisiert'] += geaendert
+        bericht['unveraendert'] += gesamt - len(angelegt) - geaendert
+        bericht['lieferanten_angelegt'] += angelegte_lieferanten
     
     # Kunden Management
     def kunde_hinzufuegen(self, name: str, kontakt: str = "") -> int:
-        query = "INSERT INTO kunden (name, kontakt) VALUES (?, ?)"
-        return self.db.execute_insert(query, (name, kontakt))
+        def anlegen(conn):
+            kunde_id = self.db.execute_in(conn, sql('kunde.einfuegen'), (name, kontakt)).lastrowid
+            self._aenderung(conn, 'kunde', kunde_id, 'angelegt', {'id': kunde_id, 'name': name, 'kontakt': kontakt})
+            return kunde_id
+        return self.db.write(anlegen)
     
     def kunden_auflisten(self) -> List[Kunde]:
-        query = "SELECT id, name, kontakt FROM kunden ORDER BY name"
-        results = self.db.execute_query(query)
-        return [Kunde(id=row[0], name=row[1], kontakt=row[2]) for row in results]
+        return self.db.execute_query(sql('kunde.auflisten'), row_factory=Kunde.row_factory)
     
     def kunde_finden(self, kunde_id: int) -> Optional[Kunde]:
-        query = "SELECT id, name, kontakt FROM kunden WHERE id = ?"
-        results = self.db.execute_query(query, (kunde_id,))
-        if results:
-            row = results[0]
-            return Kunde(id=row[0], name=row[1], kontakt=row[2])
-        return None
+        results = self.db.execute_query(sql('kunde.finden'), (kunde_id,), row_factory=Kunde.row_factory)
+        return results[0] if results else None
+    
+    def kunde_loeschen(self, kunde_id: int) -> bool:
+        if kunde_id <= 0:
+            raise ValidationError("Ungültige Kunden-ID")
+        
+        app_logger.info(f"Lösche Kunde ID {kunde_id}")
+        
+        def loeschen(conn):
+            existiert, hat_projekte = self.db.execute_in(
+                conn, sql('kunde.loeschpruefung'), (kunde_id, kunde_id)).fetchone()
+            if not existiert:
+                raise NotFoundError(f"Kunde mit ID {kunde_id} nicht gefunden")
+            if hat_projekte:
+                raise IntegrityError("Kunde kann nicht gelöscht werden: Projekte sind zugeordnet")
+            self.db.execute_in(conn, sql('kunde.loeschen'), (kunde_id,))
+            self._aenderung(conn, 'kunde', kunde_id, 'geloescht', {'id': kunde_id})
+        
+        self.db.write(loeschen)
+        app_logger.info(f"Kunde ID {kunde_id} erfolgreich gelöscht")
+        return True
     
     # Projekt Management
     def projekt_hinzufuegen(self, projektname: str, kunde_id: int) -> int:
-        query = "INSERT INTO projekte (projektname, kunde_id) VALUES (?, ?)"
-        return self.db.execute_insert(query, (projektname, kunde_id))
+        def anlegen(conn):
+            projekt_id = self.db.execute_in(conn, sql('projekt.einfuegen'), (projektname, kunde_id)).lastrowid
+            self._aenderung(conn, 'projekt', projekt_id, 'angelegt',
+                            {'id': projekt_id, 'projektname': projektname, 'kunde_id': kunde_id})
+            return projekt_id
+        return self.db.write(anlegen)
     
     def projekte_auflisten(self) -> List[tuple]:
-        query = """
-        SELECT p.id, p.projektname, k.name as kunde_name
-        FROM projekte p
-        JOIN kunden k ON p.kunde_id = k.id
-        ORDER BY p.projektname
-        """
-        return self.db.execute_query(query)
+        return self.db.execute_query(sql('projekt.auflisten'))
+    
+    def projekt_loeschen(self, projekt_id: int) -> bool:
+        if projekt_id <= 0:
+            raise ValidationError("Ungültige Projekt-ID")
+        
+        app_logger.info(f"Lösche Projekt ID {projekt_id}")
+        
+        def loeschen(conn):
+            existiert, hat_verkaeufe, hat_reservierungen = self.db.execute_in(
+                conn, sql('projekt.loeschpruefung'), (projekt_id,) * 3).fetchone()
+            if not existiert:
+                raise NotFoundError(f"Projekt mit ID {projekt_id} nicht gefunden")
+            if hat_verkaeufe:
+                raise IntegrityError("Projekt kann nicht gelöscht werden: Verkäufe sind gebucht")
+            if hat_reservierungen:
+                raise IntegrityError("Projekt kann nicht gelöscht werden: Reservierungen sind zugeordnet")
+            self.db.execute_in(conn, sql('projekt.loeschen'), (projekt_id,))
+            self._aenderung(conn, 'projekt', projekt_id, 'geloescht', {'id': projekt_id})
+        
+        self.db.write(loeschen)
+        app_logger.info(f"Projekt ID {projekt_id} erfolgreich gelöscht")
+        return True
     
     # Lager Management
     def lagereingang(self, artikelnummer: str, menge: int, einkaufspreis: float, 
                     einlagerungsdatum: str = None) -> bool:
+        _menge_pruefen(menge, "Menge")
         if einlagerungsdatum is None:
             einlagerungsdatum = datetime.now().strftime("%Y-%m-%d")
         
         # Prüfen ob Artikel existiert
-        if not self.artikel_finden(artikelnummer):
+        artikel = self.artikel_finden(artikelnummer)
+        if not artikel:
             return False
         
-        query = """
-        INSERT INTO lagerbestand (artikelnummer, verfuegbare_menge, einkaufspreis, einlagerungsdatum)
-        VALUES (?, ?, ?, ?)
-        """
-        self.db.execute_insert(query, (artikelnummer, menge, einkaufspreis, einlagerungsdatum))
+        def einlagern(conn):
+            charge_id = self.db.execute_in(conn, sql('lager.eingang'),
+                                           (artikel.id, menge, einkaufspreis, einlagerungsdatum)).lastrowid
+            bestand = self.db.execute_in(conn, sql('bestand.zugang'), (artikel.id, menge)).fetchall()[0][0]
+            wechsel = self.db.execute_in(conn, sql('bestand.mindestmenge_pruefen'), (artikel.id,)).fetchall()
+            self._aenderung(conn, 'charge', charge_id, 'eingelagert', {
+                'id': charge_id, 'artikelnummer': artikelnummer, 'menge': menge,
+                'einkaufspreis': einkaufspreis, 'einlagerungsdatum': einlagerungsdatum, 'bestand': bestand
+            })
+            return charge_id, bestand, wechsel
+        
+        with self._chargen_schreiben(artikelnummer):
+            charge_id, bestand, wechsel = self.db.write(einlagern)
+            index = self.chargen_index
+            if index is not None:
+                index.eingelagert(Lagerbestand(charge_id, artikelnummer, menge, einkaufspreis, einlagerungsdatum))
+        self._bestand_melden(artikel, menge, bestand, wechsel)
         return True
     
+    def _bestand_melden(self, artikel: Artikel, delta: int, bestand: int, wechsel: list):
+        """Veröffentlicht eine festgeschriebene Bestandsänderung und ggf. den Wechsel des Mindestmengen-Kennzeichens"""
+        event_broker.veroeffentlichen('bestand', {
+            'artikelnummer': artikel.artikelnummer,
+            'delta': delta,
+            'bestand': bestand
+        })
+        if wechsel:
+            self._mindestmenge_melden(artikel.artikelnummer, wechsel[0][0], bestand, artikel.mindestmenge)
+    
+    def _mindestmenge_melden(self, artikelnummer: str, unter_mindestmenge: int, bestand: int, mindestmenge: int):
+        event_broker.veroeffentlichen('mindestmenge', {
+            'artikelnummer': artikelnummer,
+            'unter_mindestmenge': bool(unter_mindestmenge),
+            'bestand': bestand,
+            'mindestmenge': mindestmenge
+        })
+    
     def lagerbestand_artikel(self, artikelnummer: str, include_zero: bool = False) -> List[Lagerbestand]:
-        if include_zero:
-            query = """
-            SELECT id, artikelnummer, verfuegbare_menge, einkaufspreis, einlagerungsdatum
-            FROM lagerbestand
-            WHERE artikelnummer = ?
-            ORDER BY einlagerungsdatum
-            """
-        else:
-            query = """
-            SELECT id, artikelnummer, verfuegbare_menge, einkaufspreis, einlagerungsdatum
-            FROM lagerbestand
-            WHERE artikelnummer = ? AND verfuegbare_menge > 0
-            ORDER BY einlagerungsdatum
-            """
-        results = self.db.execute_query(query, (artikelnummer,))
-        return [Lagerbestand(id=row[0], artikelnummer=row[1], verfuegbare_menge=row[2], 
-                            einkaufspreis=row[3], einlagerungsdatum=row[4]) for row in results]
+        query = sql('lager.alle_chargen') if include_zero else sql('lager.fifo_offen')
+        return self.db.execute_query(query, (artikelnummer,), row_factory=Lagerbestand.row_factory)
     
-    def gesamter_lagerbestand(self) -> List[tuple]:
-        query = """
-        SELECT l.artikelnummer, a.bezeichnung, 
-               SUM(l.verfuegbare_menge) as gesamtmenge,
-               AVG(l.einkaufspreis) as durchschnittspreis
-        FROM lagerbestand l
-        JOIN artikel a ON l.artikelnummer = a.artikelnummer
-        WHERE l.verfuegbare_menge > 0
-        GROUP BY l.artikelnummer, a.bezeichnung
-        ORDER BY l.artikelnummer
+    def chargen_archivieren(self, aufbewahrung_tage: int = None, batch_groesse: int = None) -> int:
+        """Verschiebt aufgebrauchte Chargen, die älter als die Aufbewahrungsfrist sind, ins Archiv
+        
+        Jeder Batch läuft in einer eigenen kurzen Transaktion, damit Verkäufe
+        und Lagereingänge zwischendurch nicht blockiert werden.
         """
-        return self.db.execute_query(query)
+        config = get_config()
+        if aufbewahrung_tage is None:
+            aufbewahrung_tage = config.ARCHIV_AUFBEWAHRUNG_TAGE
+        if batch_groesse is None:
+            batch_groesse = config.ARCHIV_BATCH_GROESSE
+        if aufbewahrung_tage < 0:
+            raise ValidationError("Aufbewahrungsfrist darf nicht negativ sein")
+        if batch_groesse <= 0:
+            raise ValidationError("Batch-Größe muss positiv sein")
+        
+        jetzt = datetime.now()
+        stichtag = (jetzt - timedelta(days=aufbewahrung_tage)).strftime("%Y-%m-%d")
+        archiviert_am = jetzt.strftime("%Y-%m-%d %H:%M:%S")
+        app_logger.info(f"Archiviere aufgebrauchte Chargen eingelagert vor {stichtag}")
+        
+        gesamt = 0
+        while True:
+            def batch_archivieren(conn):
+                anzahl = self.db.execute_in(conn, sql('lager.archivieren'),
+                                            (archiviert_am, stichtag, batch_groesse)).rowcount
+                geloescht = self.db.execute_in(conn, sql('lager.archivierte_loeschen'),
+                                               (stichtag, batch_groesse)).rowcount
+                if geloescht != anzahl:
+                    raise LagerError(f"Archivierung inkonsistent: {anzahl} kopiert, {geloescht} gelöscht")
+                return anzahl
+            
+            anzahl = self.db.write(batch_archivieren)
+            gesamt += anzahl
+            if anzahl < batch_groesse:
+                break
+        
+        app_logger.info(f"{gesamt} Chargen archiviert")
+        return gesamt
+    
+    def gesamter_lagerbestand(self) -> List[tuple]:
+        return self.db.execute_query(sql('lager.gesamtbestand'))
     
     def artikel_unter_mindestmenge(self) -> List[tuple]:
-        """Gibt alle Artikel zurück, die unter der Mindestmenge sind"""
-        query = """
-        SELECT a.artikelnummer, a.bezeichnung, a.mindestmenge,
-               COALESCE(SUM(l.verfuegbare_menge), 0) as aktueller_bestand,
-               l_info.name as lieferant_name
-        FROM artikel a
-        LEFT JOIN lagerbestand l ON a.artikelnummer = l.artikelnummer AND l.verfuegbare_menge > 0
-        JOIN lieferanten l_info ON a.lieferant_id = l_info.id
-        GROUP BY a.artikelnummer, a.bezeichnung, a.mindestmenge, l_info.name
-        HAVING COALESCE(SUM(l.verfuegbare_menge), 0) < a.mindestmenge
-        ORDER BY a.artikelnummer
+        """Gibt alle Artikel zurück, die unter der Mindestmenge sind
+        
+        Liest nur das Kennzeichen in artikel_bestand, das Lagereingang, Verkauf
+        und Mindestmengen-Änderungen für den jeweiligen Artikel fortschreiben.
         """
-        return self.db.execute_query(query)
+        return self.db.execute_query(sql('artikel.unter_mindestmenge'))
     
     # Verkauf System (FIFO)
     def verkauf(self, projekt_id: int, artikelnummer: str, verkaufte_menge: int, 
                verkaufspreis: float, verkaufsdatum: str = None) -> bool:
+        _menge_pruefen(verkaufte_menge, "Verkaufte Menge")
         if verkaufsdatum is None:
             verkaufsdatum = datetime.now().strftime("%Y-%m-%d")
+        else:
+            # Monatsverdichtung schneidet den Monat per [:7] aus dem Datum
+            verkaufsdatum = datum_pruefen('verkaufsdatum', verkaufsdatum)
         
-        # FIFO: Älteste Bestände zuerst verkaufen
-        lagerbestaende = self.lagerbestand_artikel(artikelnummer)
-        
-        # Prüfen ob genug Ware verfügbar ist
-        verfuegbare_gesamtmenge = sum(bestand.verfuegbare_menge for bestand in lagerbestaende)
-        if verfuegbare_gesamtmenge < verkaufte_menge:
+        artikel = self.artikel_finden(artikelnummer)
+        if not artikel:
             return False
         
-        verbleibende_menge = verkaufte_menge
+        index_frisch = False
+        for versuch in range(1, FIFO_MAX_VERSUCHE + 1):
+            # FIFO: Entnahmen von den ältesten Beständen planen; gelesen wird außerhalb der Schreibtransaktion
+            index = self.chargen_index
+            if index is not None:
+                entnahmen = index.planen(artikelnummer, verkaufte_menge)
+                if entnahmen is None and not index_frisch:
+                    # Eingänge anderer Prozesse kennt der Index nicht; vor dem Ablehnen neu laden
+                    index.verwerfen(artikelnummer)
+                    index_frisch = True
+                    entnahmen = index.planen(artikelnummer, verkaufte_menge)
+            else:
+                entnahmen = fifo_planen(self.lagerbestand_artikel(artikelnummer), verkaufte_menge)
+            
+            # Prüfen ob genug Ware verfügbar ist
+            if entnahmen is None:
+                return False
+            
+            try:
+                with self._chargen_schreiben(artikelnummer):
+                    bestand, wechsel = self.db.write(lambda conn: self._verkauf_buchen(
+                        conn, projekt_id, artikel, verkaufte_menge, verkaufspreis, verkaufsdatum, entnahmen))
+                    if index is not None:
+                        index.entnommen(artikelnummer, entnahmen)
+                self._bestand_melden(artikel, -verkaufte_menge, bestand, wechsel)
+                return True
+            except _NichtVerfuegbar:
+                return False
+            except _ChargeVeraendert:
+                fifo_konflikte.inc()
+                if index is not None:
+                    index.verwerfen(artikelnummer)
+                    index_frisch = True
+                app_logger.info(f"Charge von {artikelnummer} gleichzeitig verändert, FIFO-Versuch {versuch}/{FIFO_MAX_VERSUCHE}")
+        
+        raise VerkaufError(f"Verkauf von {artikelnummer} nach {FIFO_MAX_VERSUCHE} Versuchen wegen gleichzeitiger Verkäufe abgebrochen")
+    
+    def _verkauf_buchen(self, conn, projekt_id: int, artikel: Artikel, verkaufte_menge: int,
+                        verkaufspreis: float, verkaufsdatum: str, entnahmen: list):
+        """Bucht geplante Entnahmen, Verkauf und Monatsverdichtung in einer Transaktion
+        
+        Gibt den neuen Bestand und den Wechsel des Mindestmengen-Kennzeichens zurück.
         
-        # FIFO: Von den ältesten Beständen abziehen
-        for bestand in lagerbestaende:
-            if verbleibende_menge <= 0:
+        Jede Entnahme ist ein bedingtes UPDATE; trifft es keine Zeile, hat ein
+        anderer Verkauf die Charge inzwischen verringert und alles wird zurückgerollt.
+        """
+        artikel_id = artikel.id
+        wareneinsatz = 0.0
+        for bestand, entnahme in entnahmen:
+            cursor = self.db.execute_in(conn, sql('lager.entnehmen'), (entnahme, bestand.id, entnahme))
+            if cursor.rowcount != 1:
+                raise _ChargeVeraendert(bestand.id)
+            wareneinsatz += entnahme * bestand.einkaufspreis
+        
+        # Eigene Reservierungen des Projekts zuerst einlösen
+        eingeloest = 0
+        for reservierung_id, reserviert in self.db.execute_in(
+                conn, sql('reservierung.offen_projekt_artikel'), (projekt_id, artikel_id)).fetchall():
+            menge = min(reserviert, verkaufte_menge - eingeloest)
+            if menge <= 0:
                 break
-            
-            if bestand.verfuegbare_menge >= verbleibende_menge:
-                # Komplett aus diesem Bestand verkaufen
-                neue_menge = bestand.verfuegbare_menge - verbleibende_menge
-                self.db.execute_query(
-                    "UPDATE lagerbestand SET verfuegbare_menge = ? WHERE id = ?",
-                    (neue_menge, bestand.id)
-                )
-                verbleibende_menge = 0
-            else:
-                # Diesen Bestand komplett verkaufen
-                verbleibende_menge -= bestand.verfuegbare_menge
-                self.db.execute_query(
-                    "UPDATE lagerbestand SET verfuegbare_menge = 0 WHERE id = ?",
-                    (bestand.id,)
-                )
+            self.db.execute_in(conn, sql('reservierung.einloesen'), (menge, menge, reservierung_id))
+            eingeloest += menge
+        
+        # Für andere Projekte reservierte Menge darf nicht verkauft werden
+        zeilen = self.db.execute_in(conn, sql('bestand.verkaufen'),
+                                    (verkaufte_menge, eingeloest, artikel_id, eingeloest, verkaufte_menge)).fetchall()
+        if not zeilen:
+            raise _NichtVerfuegbar(artikel_id)
+        wechsel = self.db.execute_in(conn, sql('bestand.mindestmenge_pruefen'), (artikel_id,)).fetchall()
         
         # Verkauf in Verkäufe Tabelle eintragen
-        query = """
-        INSERT INTO verkaeufe (projekt_id, artikelnummer, verkaufte_menge, verkaufspreis, verkaufsdatum)
-        VALUES (?, ?, ?, ?, ?)
-        """
-        self.db.execute_insert(query, (projekt_id, artikelnummer, verkaufte_menge, verkaufspreis, verkaufsdatum))
-        return True
+        verkauf_id = self.db.execute_in(conn, sql('verkauf.einfuegen'),
+                                        (projekt_id, artikel_id, verkaufte_menge, verkaufspreis, verkaufsdatum,
+                                         wareneinsatz)).lastrowid
+        self.db.execute_in(conn, sql('verkauf.monat_buchen'),
+                           (verkaufsdatum[:7], artikel_id, projekt_id, verkaufte_menge,
+                            verkaufte_menge * verkaufspreis, wareneinsatz))
+        self._aenderung(conn, 'verkauf', verkauf_id, 'gebucht', {
+            'id': verkauf_id, 'projekt_id': projekt_id, 'artikelnummer': artikel.artikelnummer,
+            'verkaufte_menge': verkaufte_menge, 'verkaufspreis': verkaufspreis, 'verkaufsdatum': verkaufsdatum,
+            'wareneinsatz': wareneinsatz, 'bestand': zeilen[0][0],
+            'entnahmen': [{'charge_id': bestand.id, 'menge': entnahme} for bestand, entnahme in entnahmen]
+        })
+        return zeilen[0][0], wechsel
     
     def projekt_verkaeufe(self, projekt_id: int) -> List[tuple]:
-        query = """
-        SELECT v.artikelnummer, a.bezeichnung, v.verkaufte_menge, v.verkaufspreis, v.verkaufsdatum
-        FROM verkaeufe v
-        JOIN artikel a ON v.artikelnummer = a.artikelnummer
-        WHERE v.projekt_id = ?
-        ORDER BY v.verkaufsdatum
+        return self.db.execute_query(sql('verkauf.projekt'), (projekt_id,))
+    
+    # Reservierungen
+    def verfuegbarkeit(self, artikelnummer: str) -> Optional[dict]:
+        """Bestand, reservierte und verfügbare Menge eines Artikels aus der Bestandsübersicht"""
+        results = self.db.execute_query(sql('bestand.verfuegbarkeit'), (artikelnummer,))
+        if not results:
+            return None
+        artikelnummer, bestand, reserviert = results[0]
+        return {
+            'artikelnummer': artikelnummer,
+            'bestand': bestand,
+            'reserviert': reserviert,
+            'verfuegbar': bestand - reserviert
+        }
+    
+    def verfuegbarkeit_pruefen(self, positionen: List[tuple]) -> List[dict]:
+        """Verfügbarkeit, Fehlmenge und FIFO-Wareneinsatz für viele (artikelnummer, menge)-Paare
+        
+        Mehrfach genannte Artikel werden zusammengefasst; die Antwort folgt der
+        Reihenfolge der ersten Nennung. Alles wird mit einer Abfrage beantwortet.
         """
-        return self.db.execute_query(query, (projekt_id,))
\ No newline at end of file
+        max_positionen = get_config().VERFUEGBARKEIT_MAX_POSITIONEN
+        if not positionen:
+            raise ValidationError("Mindestens eine Position ist erforderlich")
+        if len(positionen) > max_positionen:
+            raise ValidationError(f"Höchstens {max_positionen} Positionen pro Abfrage")
+        
+        mengen = {}
+        for artikelnummer, menge in positionen:
+            if not isinstance(artikelnummer, str) or not artikelnummer.strip():
+                raise ValidationError("Artikelnummer darf nicht leer sein")
+            if isinstance(menge, bool) or not isinstance(menge, int) or menge <= 0:
+                raise ValidationError(f"Menge für {artikelnummer} muss eine positive ganze Zahl sein")
+            artikelnummer = artikelnummer.strip()
+            mengen[artikelnummer] = mengen.get(artikelnummer, 0) + menge
+        
+        anfrage = json.dumps([[artikelnummer, menge] for artikelnummer, menge in mengen.items()])
+        ergebnisse = {zeile[0]: zeile for zeile in
+                      self.db.execute_query(sql('bestand.verfuegbarkeit_sammel'), (anfrage,))}
+        
+        antwort = []
+        for artikelnummer, menge in mengen.items():
+            _, gefunden, bestand, reserviert, wareneinsatz = ergebnisse[artikelnummer]
+            verfuegbar = max(0, bestand - reserviert)
+            antwort.append({
+                'artikelnummer': artikelnummer,
+                'gefunden': bool(gefunden),
+                'menge': menge,
+                'bestand': bestand,
+                'reserviert': reserviert,
+                'verfuegbar': verfuegbar,
+                'fehlmenge': max(0, menge - verfuegbar),
+                'wareneinsatz': round(wareneinsatz, 2)
+            })
+        return antwort
+    
+    def reservieren(self, projekt_id: int, artikelnummer: str, menge: int, gueltig_bis: str = None) -> int:
+        """Reserviert verfügbare Menge für ein Projekt bis gueltig_bis (YYYY-MM-DD oder ISO-Zeitpunkt)"""
+        _menge_pruefen(menge, "Reservierte Menge")
+        
+        jetzt = datetime.now()
+        if gueltig_bis is None:
+            ablauf = jetzt + timedelta(days=get_config().RESERVIERUNG_STANDARD_TAGE)
+        else:
+            try:
+                ablauf = datetime.fromisoformat(gueltig_bis)
+            except (TypeError, ValueError):
+                raise ValidationError(f"Ungültiges Datum für 'gueltig_bis': {gueltig_bis}")
+            if len(gueltig_bis) == 10:
+                # Ein reines Datum gilt bis zum Ende des Tages
+                ablauf = ablauf.replace(hour=23, minute=59, second=59)
+            if ablauf.tzinfo is not None:
+                # Gespeichert und verglichen wird naive Ortszeit wie bei erstellt_am
+                ablauf = ablauf.astimezone().replace(tzinfo=None)
+        if ablauf <= jetzt:
+            raise ValidationError("'gueltig_bis' muss in der Zukunft liegen")
+        
+        artikel = self.artikel_finden(artikelnummer)
+        if not artikel:
+            raise NotFoundError(f"Artikel {artikelnummer} nicht gefunden")
+        
+        def anlegen(conn):
+            if not self.db.execute_in(conn, sql('projekt.existiert'), (projekt_id,)).fetchall():
+                raise NotFoundError(f"Projekt mit ID {projekt_id} nicht gefunden")
+            cursor = self.db.execute_in(conn, sql('bestand.reservieren'), (menge, artikel.id, menge))
+            if cursor.rowcount != 1:
+                raise LagerError(f"Nicht genügend verfügbare Menge von {artikelnummer} für die Reservierung")
+            cursor = self.db.execute_in(conn, sql('reservierung.einfuegen'),
+                                        (projekt_id, artikel.id, menge, jetzt.isoformat(timespec='seconds'),
+                                         ablauf.isoformat(timespec='seconds')))
+            self._aenderung(conn, 'reservierung', cursor.lastrowid, 'angelegt', {
+                'id': cursor.lastrowid, 'projekt_id': projekt_id, 'artikelnummer': artikelnummer,
+                'menge': menge, 'gueltig_bis': ablauf.isoformat(timespec='seconds')
+            })
+            return cursor.lastrowid
+        
+        reservierung_id = self.db.write(anlegen)
+        app_logger.info(f"Reservierung {reservierung_id}: {menge} x {artikelnummer} für Projekt {projekt_id}")
+        return reservierung_id
+    
+    def reservierung_finden(self, reservierung_id: int) -> Optional[Reservierung]:
+        results = self.db.execute_query(sql('reservierung.finden'), (reservierung_id,),
+                                        row_factory=Reservierung.row_factory)
+        return results[0] if results else None
+    
+    def reservierungen_auflisten(self, projekt_id: int = None) -> List[Reservierung]:
+        """Offene Reservierungen, nach Ablauf sortiert"""
+        if projekt_id:
+            return self.db.execute_query(sql('reservierung.offene_projekt'), (projekt_id,),
+                                         row_factory=Reservierung.row_factory)
+        return self.db.execute_query(sql('reservierung.offene'), row_factory=Reservierung.row_factory)
+    
+    def reservierung_stornieren(self, reservierung_id: int) -> bool:
+        def stornieren(conn):
+            zeilen = self.db.execute_in(conn, sql('reservierung.stornieren'), (reservierung_id,)).fetchall()
+            if not zeilen:
+                return False
+            artikel_id, menge = zeilen[0]
+            self.db.execute_in(conn, sql('bestand.freigeben'), (menge, artikel_id))
+            self._aenderung(conn, 'reservierung', reservierung_id, 'storniert', {'id': reservierung_id})
+            return True
+        
+        if not self.db.write(stornieren):
+            raise NotFoundError(f"Offene Reservierung mit ID {reservierung_id} nicht gefunden")
+        app_logger.info(f"Reservierung {reservierung_id} storniert")
+        return True
+    
+    def abgelaufene_reservierungen_freigeben(self, batch_groesse: int = 500) -> int:
+        """Gibt die Menge abgelaufener Reservierungen in Batches wieder frei (Wartungsjob)"""
+        jetzt = datetime.now().isoformat(timespec='seconds')
+        
+        def batch_freigeben(conn):
+            zeilen = self.db.execute_in(conn, sql('reservierung.ablaufen'), (jetzt, batch_groesse)).fetchall()
+            je_artikel = {}
+            for reservierung_id, artikel_id, menge in zeilen:
+                je_artikel[artikel_id] = je_artikel.get(artikel_id, 0) + menge
+                self._aenderung(conn, 'reservierung', reservierung_id, 'abgelaufen', {'id': reservierung_id})
+            for artikel_id, menge in je_artikel.items():
+                self.db.execute_in(conn, sql('bestand.freigeben'), (menge, artikel_id))
+            return len(zeilen)
+        
+        gesamt = 0
+        while True:
+            anzahl = self.db.write(batch_freigeben)
+            gesamt += anzahl
+            if anzahl < batch_groesse:
+                break
+        if gesamt:
+            app_logger.info(f"{gesamt} abgelaufene Reservierungen freigegeben")
+        return gesamt
+    
+    def bestandsuebersicht_neu_aufbauen(self) -> int:
+        """Berechnet artikel_bestand vollständig aus Chargen und offenen Reservierungen neu"""
+        def neu_aufbauen(conn):
+            self.db.execute_in(conn, sql('bestand.leeren'))
+            return self.db.execute_in(conn, sql('bestand.neu_aufbauen')).rowcount
+        
+        anzahl = self.db.write(neu_aufbauen)
+        app_logger.info(f"Bestandsübersicht neu aufgebaut: {anzahl} Artikel")
+        return anzahl
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Einlesen von Lieferantenkatalogen für den Sammelimport
+
+Ein Katalog kommt als CSV mit Kopfzeile, als JSON Lines (ein Objekt pro
+Zeile) oder als JSON-Array. CSV und JSON Lines werden zeilenweise gelesen,
+so dass auch sehr große Dateien nie vollständig im Speicher liegen; ein
+JSON-Array wird als Ganzes geparst.
+
+Felder pro Zeile: artikelnummer, bezeichnung, lieferant (Name) sowie
+optional mindestmenge und lieferant_kontakt. Die Zeilen werden ab 1
+durchnummeriert (bei CSV ohne Kopfzeile); über diese Nummer setzt ein
+abgebrochener Import wieder auf.
+"""
+
+import csv
+import json
+from typing import Iterator, TextIO, Tuple
+from exceptions import ValidationError
+
+FORMATE = ('csv', 'jsonl', 'json')
+
+_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/json': 'json',
+}
+
+
+def format_erkennen(dateiname: str = None, content_type: str = None) -> str:
+    """Format aus Dateiendung oder Content-Type"""
+    if content_type:
+        format = _CONTENT_TYPES.get(content_type.split(';')[0].strip().lower())
+        if format is None:
+            raise ValidationError(f"Nicht unterstützter Content-Type '{content_type}', erwartet CSV, JSON Lines oder JSON")
+        return format
+    endung = (dateiname or '').rsplit('.', 1)[-1].lower()
+    if endung in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if endung in FORMATE:
+        return endung
+    raise ValidationError(f"Format von '{dateiname}' nicht erkennbar, erwartet .csv, .jsonl oder .json")
+
+
+def zeilen_lesen(datei: TextIO, format: str) -> Iterator[Tuple[int, object]]:
+    """Liefert (Zeilennummer, Datensatz); nicht lesbare JSON-Zeilen kommen als Text und werden abgelehnt"""
+    if format == 'csv':
+        yield from _csv_lesen(datei)
+    elif format == 'jsonl':
+        nummer = 0
+        for zeile in datei:
+            if not zeile.strip():
+                continue
+            nummer += 1
+            try:
+                yield nummer, json.loads(zeile)
+            except ValueError:
+                yield nummer, zeile.strip()
+    elif format == 'json':
+        try:
+            daten = json.load(datei)
+        except ValueError as e:
+            raise ValidationError(f"Ungültiges JSON: {e}")
+        if isinstance(daten, dict):
+            daten = daten.get('artikel')
+        if not isinstance(daten, list):
+            raise ValidationError("JSON-Katalog muss eine Liste oder ein Objekt mit 'artikel' sein")
+        yield from enumerate(daten, start=1)
+    else:
+        raise ValidationError(f"Unbekanntes Format '{format}'")
+
+
+def _csv_lesen(datei: TextIO) -> Iterator[Tuple[int, dict]]:
+    kopf = datei.readline()
+    if not kopf.strip():
+        return
+    # Tabellenkalkulationen exportieren im deutschen Gebietsschema mit Semikolon
+    try:
+        dialekt = csv.Sniffer().sniff(kopf, delimiters=',;\t')
+    except csv.Error:
+        dialekt = csv.excel
+    felder = [feld.strip().lower() for feld in next(csv.reader([kopf], dialekt))]
+    for nummer, zeile in enumerate(csv.DictReader(datei, fieldnames=felder, dialect=dialekt), start=1):
+        yield nummer, zeile
@@ -52,5 +52,34 @@ def setup_logger(name: str = 'lagerverwaltung', level: str = 'INFO') -> logging.
     logger.info(f"Logger '{name}' erfolgreich konfiguriert mit Level {log_level}")
     return logger
 
+def setup_slow_query_logger(name: str = 'lagerverwaltung.slow_query') -> logging.Logger:
+    """
+    Eigener Logger für langsame SQL-Statements mit separater Logdatei
+    """
+    logger = logging.getLogger(name)
+    
+    if logger.handlers:
+        return logger
+    
+    logger.setLevel(logging.WARNING)
+    # Nicht zusätzlich im Anwendungslog ausgeben
+    logger.propagate = False
+    
+    log_dir = os.getenv('LOG_DIR', 'logs')
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    
+    file_handler = logging.FileHandler(
+        os.path.join(log_dir, f'slow_queries_{datetime.now().strftime("%Y%m%d")}.log'),
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    ))
+    logger.addHandler(file_handler)
+    return logger
+
 # Standard Logger für die Anwendung
-app_logger = setup_logger()
\ No newline at end of file
+app_logger = setup_logger()
+slow_query_logger = setup_slow_query_logger()
\ No newline at end of file
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Wartungsbefehle für die Lagerverwaltung
+
+Aufruf aus dem backend-Verzeichnis, z.B.:
+    python manage.py rollup-neu-aufbauen --db lagerverwaltung.db
+    python manage.py chargen-archivieren --tage 365
+    python manage.py katalog-importieren katalog.csv --fortschritt katalog.pos
+"""
+
+import argparse
+import os
+import sys
+from database import Database
+from inventory_manager import InventoryManager
+from reports import ReportGenerator
+from exceptions import LagerverwaltungError
+from katalog import FORMATE, format_erkennen, zeilen_lesen
+
+
+def rollup_neu_aufbauen(args) -> int:
+    anzahl = ReportGenerator(Database(args.db)).monatswerte_neu_aufbauen()
+    print(f"Monatsverdichtung neu aufgebaut: {anzahl} Zeilen")
+    return 0
+
+
+def chargen_archivieren(args) -> int:
+    inventory = InventoryManager(Database(args.db))
+    anzahl = inventory.chargen_archivieren(args.tage, args.batch)
+    print(f"{anzahl} aufgebrauchte Chargen archiviert")
+    return 0
+
+
+def bestand_neu_aufbauen(args) -> int:
+    inventory = InventoryManager(Database(args.db))
+    anzahl = inventory.bestandsuebersicht_neu_aufbauen()
+    print(f"Bestandsübersicht neu aufgebaut: {anzahl} Artikel")
+    return 0
+
+
+def katalog_importieren(args) -> int:
+    inventory = InventoryManager(Database(args.db))
+    format = args.format or format_erkennen(args.datei)
+
+    ab_zeile = args.ab_zeile
+    if ab_zeile is None and args.fortschritt and os.path.exists(args.fortschritt):
+        with open(args.fortschritt) as f:
+            ab_zeile = int(f.read().strip() or 0)
+        print(f"Setze nach Zeile {ab_zeile} fort")
+
+    def fortschritt(zeile: int):
+        if args.fortschritt:
+            # Erst nach dem COMMIT geschrieben; ein Abbruch wiederholt höchstens einen Chunk
+            with open(args.fortschritt + '.tmp', 'w') as f:
+                f.write(str(zeile))
+            os.replace(args.fortschritt + '.tmp', args.fortschritt)
+
+    with open(args.datei, encoding='utf-8-sig', newline='') as datei:
+        bericht = inventory.katalog_importieren(zeilen_lesen(datei, format), ab_zeile or 0,
+                                                not args.keine_lieferanten_anlegen, args.chunk, fortschritt)
+
+    for fehler in bericht['fehler']:
+        print(f"Zeile {fehler['zeile']} ({fehler['artikelnummer'] or '-'}): {fehler['fehler']}", file=sys.stderr)
+    print(f"Katalog bis Zeile {bericht['letzte_zeile']} importiert: {bericht['angelegt']} angelegt, "
+          f"{bericht['aktualisiert']} aktualisiert, {bericht['unveraendert']} unverändert, "
+          f"{bericht['abgelehnt']} abgelehnt, {bericht['lieferanten_angelegt']} Lieferanten angelegt")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Wartungsbefehle für die Lagerverwaltung")
+    parser.add_argument('--db', default='lagerverwaltung.db', help="Pfad zur SQLite-Datenbank")
+    befehle = parser.add_subparsers(dest='befehl', required=True)
+
+    rollup = befehle.add_parser('rollup-neu-aufbauen',
+                                help="Monatsverdichtung der Verkäufe aus verkaeufe neu berechnen")
+    rollup.set_defaults(func=rollup_neu_aufbauen)
+
+    archiv = befehle.add_parser('chargen-archivieren',
+                                help="Aufgebrauchte Chargen nach Ablauf der Aufbewahrungsfrist archivieren")
+    archiv.add_argument('--tage', type=int, help="Aufbewahrungsfrist in Tagen (Standard: ARCHIV_AUFBEWAHRUNG_TAGE)")
+    archiv.add_argument('--batch', type=int, help="Chargen pro Transaktion (Standard: ARCHIV_BATCH_GROESSE)")
+    archiv.set_defaults(func=chargen_archivieren)
+
+    bestand = befehle.add_parser('bestand-neu-aufbauen',
+                                 help="Bestand und Reservierungen je Artikel aus Chargen und Reservierungen neu berechnen")
+    bestand.set_defaults(func=bestand_neu_aufbauen)
+
+    katalog = befehle.add_parser('katalog-importieren',
+                                 help="Artikel und Lieferanten aus einem Katalog (CSV, JSON Lines, JSON) anlegen oder aktualisieren")
+    katalog.add_argument('datei', help="Katalogdatei")
+    katalog.add_argument('--format', choices=FORMATE, help="Format (Standard: aus der Dateiendung)")
+    katalog.add_argument('--chunk', type=int, help="Zeilen pro Transaktion (Standard: IMPORT_CHUNK_GROESSE)")
+    katalog.add_argument('--ab-zeile', type=int, help="Zeilen bis einschließlich dieser Nummer überspringen")
+    katalog.add_argument('--fortschritt', help="Datei für die zuletzt übernommene Zeile; ein erneuter Aufruf setzt dort fort")
+    katalog.add_argument('--keine-lieferanten-anlegen', action='store_true',
+                         help="Zeilen mit unbekanntem Lieferanten ablehnen statt ihn anzulegen")
+    katalog.set_defaults(func=katalog_importieren)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except LagerverwaltungError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,33 +1,67 @@
+import time
 from datetime import datetime
 from typing import List, Optional
 import bcrypt
+from metrics import registry
 
-class Lieferant:
+bcrypt_in_progress = registry.gauge(
+    'lager_bcrypt_operations_in_progress',
+    'Laufende oder wartende bcrypt-Berechnungen (Hash und Prüfung)'
+)
+bcrypt_duration = registry.histogram(
+    'lager_bcrypt_duration_seconds',
+    'Dauer von bcrypt-Berechnungen',
+    ('operation',)
+)
+
+class Model:
+    """Basisklasse für Datenmodelle ohne Instanz-__dict__"""
+    __slots__ = ()
+    
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """sqlite3-row_factory: Spalten in Konstruktor-Reihenfolge direkt auf das Modell abbilden"""
+        return cls(*row)
+
+class Lieferant(Model):
+    __slots__ = ('id', 'name', 'kontakt')
+    
     def __init__(self, id: int = None, name: str = "", kontakt: str = ""):
         self.id = id
         self.name = name
         self.kontakt = kontakt
 
-class Artikel:
-    def __init__(self, artikelnummer: str = "", bezeichnung: str = "", lieferant_id: int = None, mindestmenge: int = 1):
+class Artikel(Model):
+    __slots__ = ('artikelnummer', 'bezeichnung', 'lieferant_id', 'mindestmenge', 'id')
+    
+    def __init__(self, artikelnummer: str = "", bezeichnung: str = "", lieferant_id: int = None, mindestmenge: int = 1,
+                 id: int = None):
+        # id ist der interne Surrogatschlüssel, artikelnummer die externe Kennung
+        self.id = id
         self.artikelnummer = artikelnummer
         self.bezeichnung = bezeichnung
         self.lieferant_id = lieferant_id
         self.mindestmenge = mindestmenge
 
-class Kunde:
+class Kunde(Model):
+    __slots__ = ('id', 'name', 'kontakt')
+    
     def __init__(self, id: int = None, name: str = "", kontakt: str = ""):
         self.id = id
         self.name = name
         self.kontakt = kontakt
 
-class Projekt:
+class Projekt(Model):
+    __slots__ = ('id', 'projektname', 'kunde_id')
+    
     def __init__(self, id: int = None, projektname: str = "", kunde_id: int = None):
         self.id = id
         self.projektname = projektname
         self.kunde_id = kunde_id
 
-class Lagerbestand:
+class Lagerbestand(Model):
+    __slots__ = ('id', 'artikelnummer', 'verfuegbare_menge', 'einkaufspreis', 'einlagerungsdatum')
+    
     def __init__(self, id: int = None, artikelnummer: str = "", verfuegbare_menge: int = 0, 
                  einkaufspreis: float = 0.0, einlagerungsdatum: str = ""):
         self.id = id
@@ -36,7 +70,9 @@ class Lagerbestand:
         self.einkaufspreis = einkaufspreis
         self.einlagerungsdatum = einlagerungsdatum
 
-class Verkauf:
+class Verkauf(Model):
+    __slots__ = ('id', 'projekt_id', 'artikelnummer', 'verkaufte_menge', 'verkaufspreis', 'verkaufsdatum')
+    
     def __init__(self, id: int = None, projekt_id: int = None, artikelnummer: str = "", 
                  verkaufte_menge: int = 0, verkaufspreis: float = 0.0, verkaufsdatum: str = ""):
         self.id = id
@@ -46,7 +82,22 @@ class Verkauf:
         self.verkaufspreis = verkaufspreis
         self.verkaufsdatum = verkaufsdatum
 
-class User:
+class Reservierung(Model):
+    __slots__ = ('id', 'projekt_id', 'artikelnummer', 'menge', 'erstellt_am', 'gueltig_bis', 'status')
+    
+    def __init__(self, id: int = None, projekt_id: int = None, artikelnummer: str = "", menge: int = 0,
+                 erstellt_am: str = "", gueltig_bis: str = "", status: str = "offen"):
+        self.id = id
+        self.projekt_id = projekt_id
+        self.artikelnummer = artikelnummer
+        self.menge = menge
+        self.erstellt_am = erstellt_am
+        self.gueltig_bis = gueltig_bis
+        self.status = status
+
+class User(Model):
+    __slots__ = ('id', 'username', 'password_hash', 'created_at', 'active')
+    
     def __init__(self, id: int = None, username: str = "", password_hash: str = "", 
                  created_at: str = "", active: bool = True):
         self.id = id
@@ -55,15 +106,32 @@ class User:
         self.created_at = created_at or datetime.now().isoformat()
         self.active = active
     
+    @classmethod
+    def row_factory(cls, cursor, row):
+        id, username, password_hash, created_at, active = row
+        return cls(id, username, password_hash, created_at, bool(active))
+    
     @staticmethod
     def hash_password(password: str) -> str:
         """Hash password mit bcrypt"""
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        bcrypt_in_progress.inc()
+        start = time.perf_counter()
+        try:
+            salt = bcrypt.gensalt()
+            return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        finally:
+            bcrypt_duration.observe(time.perf_counter() - start, operation='hash')
+            bcrypt_in_progress.dec()
     
     def check_password(self, password: str) -> bool:
         """Prüfe Passwort gegen Hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        bcrypt_in_progress.inc()
+        start = time.perf_counter()
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        finally:
+            bcrypt_duration.observe(time.perf_counter() - start, operation='check')
+            bcrypt_in_progress.dec()
     
     def to_dict(self) -> dict:
         """User-Objekt als Dictionary ohne Passwort-Hash"""
@@ -0,0 +1,133 @@
+"""
+Sortierter Index der Artikelnummern für die Autovervollständigung
+
+Die Artikelnummern liegen als sortierte Liste ihrer casefold-Schlüssel im
+Speicher. Alle Nummern mit einem Präfix bilden darin einen
+zusammenhängenden Bereich, den bisect in O(log n) findet; die ersten k
+Treffer sind damit ohne Zugriff auf SQLite in Mikrosekunden da.
+
+Der Index wird beim ersten Zugriff bzw. beim Start aus der Datenbank
+geladen und von artikel_hinzufuegen fortgeschrieben. Artikel, die ein
+anderer Prozess anlegt, übernimmt erst der nächste Neuaufbau durch den
+Wartungsjob.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List
+from metrics import registry
+
+autocomplete_artikelnummern = registry.gauge(
+    'lager_autocomplete_artikelnummern',
+    'Artikelnummern im Index der Autovervollständigung'
+)
+
+
+class ArtikelnummerIndex:
+    """Thread-sicherer, sortierter Index der Artikelnummern"""
+
+    def __init__(self, laden: Callable[[], Iterable[str]]):
+        self._laden = laden
+        self._schluessel: List[str] = []
+        self._nummern: List[str] = []
+        self._geladen = False
+        # Während eines Neuaufbaus hinzugefügte Nummern, die der geladene Stand noch nicht kennt
+        self._nachtraege: List[str] = None
+        self._lock = threading.Lock()
+        self._aufbau_lock = threading.Lock()
+
+    @staticmethod
+    def _sortiert(nummern: Iterable[str]):
+        eintraege = sorted({(nummer.casefold(), nummer) for nummer in nummern})
+        return [s for s, _ in eintraege], [n for _, n in eintraege]
+
+    def aufbauen(self) -> int:
+        """Lädt alle Artikelnummern neu; gleichzeitige Aufrufe von hinzufuegen gehen nicht verloren"""
+        with self._aufbau_lock:
+            with self._lock:
+                self._nachtraege = []
+            try:
+                nummern = list(self._laden())
+            except BaseException:
+                with self._lock:
+                    self._nachtraege = None
+                raise
+            with self._lock:
+                nummern.extend(self._nachtraege)
+                self._nachtraege = None
+                self._schluessel, self._nummern = self._sortiert(nummern)
+                self._geladen = True
+                anzahl = len(self._nummern)
+        autocomplete_artikelnummern.set(anzahl)
+        return anzahl
+
+    def _sicherstellen(self):
+        if not self._geladen:
+            with self._aufbau_lock:
+                geladen = self._geladen
+            if not geladen:
+                self.aufbauen()
+
+    def hinzufuegen(self, *artikelnummern: str):
+        """Trägt neu angelegte Artikelnummern ein, falls der Index geladen ist"""
+        with self._lock:
+            if self._nachtraege is not None:
+                self._nachtraege.extend(artikelnummern)
+            if not self._geladen:
+                return
+            if len(artikelnummern) > 64:
+                # Sammelimport: einmal sortieren statt vieler Einfügungen mitten in die Liste
+                self._schluessel, self._nummern = self._sortiert(self._nummern + list(artikelnummern))
+            else:
+                for nummer in artikelnummern:
+                    schluessel = nummer.casefold()
+                    position = bisect.bisect_left(self._schluessel, schluessel)
+                    while position < len(self._schluessel) and self._schluessel[position] == schluessel:
+                        if self._nummern[position] == nummer:
+                            break
+                        position += 1
+                    else:
+                        self._schluessel.insert(position, schluessel)
+                        self._nummern.insert(position, nummer)
+            anzahl = len(self._nummern)
+        autocomplete_artikelnummern.set(anzahl)
+
+    def vorschlaege(self, praefix: str, limit: int = 10) -> List[str]:
+        """Die ersten limit Artikelnummern mit dem Präfix, ohne Beachtung der Groß-/Kleinschreibung"""
+        self._sicherstellen()
+        praefix = praefix.casefold()
+        with self._lock:
+            position = bisect.bisect_left(self._schluessel, praefix)
+            treffer = []
+            for schluessel, nummer in zip(self._schluessel[position:position + limit],
+                                          self._nummern[position:position + limit]):
+                if not schluessel.startswith(praefix):
+                    break
+                treffer.append(nummer)
+            return treffer
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._nummern)
+
+
+class ArtikelnummerIndizes:
+    """Ein Index pro Datenbankdatei, gemeinsam für alle InventoryManager des Prozesses"""
+
+    def __init__(self):
+        self._indizes: Dict[str, ArtikelnummerIndex] = {}
+        self._lock = threading.Lock()
+
+    def fuer(self, db_path: str, laden: Callable[[], Iterable[str]]) -> ArtikelnummerIndex:
+        with self._lock:
+            index = self._indizes.get(db_path)
+            if index is None:
+                index = self._indizes[db_path] = ArtikelnummerIndex(laden)
+            return index
+
+    def verwerfen(self, db_path: str):
+        with self._lock:
+            self._indizes.pop(db_path, None)
+
+
+artikelnummer_indizes = ArtikelnummerIndizes()
@@ -0,0 +1,50 @@
+"""
+Token-Bucket-Drosselung im Speicher
+
+Jeder Schlüssel (z.B. Username oder Client-IP) hat einen Eimer mit bis zu
+`burst` Tokens, der mit `rate` Tokens pro Sekunde nachläuft. Die Anzahl
+der Eimer ist begrenzt; bei Überlauf wird der am längsten unbenutzte
+verworfen, was für diesen Schlüssel einem vollen Eimer entspricht.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TokenBucketLimiter:
+    """Begrenzt Versuche pro Schlüssel auf `burst` sofort und `rate` pro Sekunde danach"""
+
+    def __init__(self, rate: float, burst: int, maxsize: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: Hashable, jetzt: float) -> list:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), jetzt]
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (jetzt - bucket[1]) * self.rate)
+            bucket[1] = jetzt
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def versuchen(self, key: Hashable) -> float:
+        """Verbraucht ein Token; gibt 0 zurück oder die Wartezeit in Sekunden, falls der Eimer leer ist"""
+        with self._lock:
+            bucket = self._bucket(key, time.monotonic())
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            fehlend = 1 - bucket[0]
+        return fehlend / self.rate if self.rate > 0 else float('inf')
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buckets)
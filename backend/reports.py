@@ -1,23 +1,17 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from database import Database
+from statements import sql
 from inventory_manager import InventoryManager
+from zeitraeume import zeitraum, monatszeitraum
+from logger_config import app_logger
 
 class ReportGenerator:
-    def __init__(self):
-        self.db = Database()
-        self.inventory = InventoryManager()
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db if db is not None else Database()
+        self.inventory = InventoryManager(self.db)
     
     def lagerbestand_detailliert(self) -> List[Dict]:
-        query = """
-        SELECT l.id, l.artikelnummer, a.bezeichnung, li.name as lieferant,
-               l.verfuegbare_menge, l.einkaufspreis, l.einlagerungsdatum,
-               (l.verfuegbare_menge * l.einkaufspreis) as gesamtwert
-        FROM lagerbestand l
-        JOIN artikel a ON l.artikelnummer = a.artikelnummer
-        JOIN lieferanten li ON a.lieferant_id = li.id
-        WHERE l.verfuegbare_menge > 0
-        ORDER BY l.artikelnummer, l.einlagerungsdatum
-        """
+        query = sql('bericht.lagerbestand_detailliert')
         results = self.db.execute_query(query)
         
         berichte = []
@@ -36,20 +30,7 @@ class ReportGenerator:
         return berichte
     
     def lagerbestand_zusammenfassung(self) -> List[Dict]:
-        query = """
-        SELECT l.artikelnummer, a.bezeichnung, li.name as lieferant,
-               SUM(l.verfuegbare_menge) as gesamtmenge,
-               AVG(l.einkaufspreis) as durchschnittspreis,
-               SUM(l.verfuegbare_menge * l.einkaufspreis) as gesamtwert,
-               MIN(l.einlagerungsdatum) as aeltestes_datum,
-               MAX(l.einlagerungsdatum) as neuestes_datum
-        FROM lagerbestand l
-        JOIN artikel a ON l.artikelnummer = a.artikelnummer
-        JOIN lieferanten li ON a.lieferant_id = li.id
-        WHERE l.verfuegbare_menge > 0
-        GROUP BY l.artikelnummer, a.bezeichnung, li.name
-        ORDER BY l.artikelnummer
-        """
+        query = sql('bericht.lagerbestand_zusammenfassung')
         results = self.db.execute_query(query)
         
         berichte = []
@@ -67,30 +48,19 @@ class ReportGenerator:
         
         return berichte
     
-    def projekt_uebersicht(self, projekt_id: int) -> Dict:
+    def projekt_uebersicht(self, projekt_id: int, von: str = None, bis: str = None) -> Dict:
+        von, bis = zeitraum(von, bis)
+        
         # Projekt-Informationen
-        projekt_query = """
-        SELECT p.projektname, k.name as kunde_name
-        FROM projekte p
-        JOIN kunden k ON p.kunde_id = k.id
-        WHERE p.id = ?
-        """
+        projekt_query = sql('bericht.projekt_info')
         projekt_info = self.db.execute_query(projekt_query, (projekt_id,))
         
         if not projekt_info:
             return None
         
         # Verkäufe für dieses Projekt
-        verkaeufe_query = """
-        SELECT v.artikelnummer, a.bezeichnung, v.verkaufte_menge, 
-               v.verkaufspreis, v.verkaufsdatum,
-               (v.verkaufte_menge * v.verkaufspreis) as umsatz
-        FROM verkaeufe v
-        JOIN artikel a ON v.artikelnummer = a.artikelnummer
-        WHERE v.projekt_id = ?
-        ORDER BY v.verkaufsdatum, v.artikelnummer
-        """
-        verkaeufe = self.db.execute_query(verkaeufe_query, (projekt_id,))
+        verkaeufe_query = sql('bericht.projekt_verkaeufe')
+        verkaeufe = self.db.execute_query(verkaeufe_query, (projekt_id, von, bis))
         
         verkauf_details = []
         gesamtumsatz = 0
@@ -114,18 +84,9 @@ class ReportGenerator:
             'gesamtumsatz': gesamtumsatz
         }
     
-    def alle_projekte_uebersicht(self) -> List[Dict]:
-        query = """
-        SELECT p.id, p.projektname, k.name as kunde_name,
-               COUNT(v.id) as anzahl_verkaeufe,
-               COALESCE(SUM(v.verkaufte_menge * v.verkaufspreis), 0) as gesamtumsatz
-        FROM projekte p
-        JOIN kunden k ON p.kunde_id = k.id
-        LEFT JOIN verkaeufe v ON p.id = v.projekt_id
-        GROUP BY p.id, p.projektname, k.name
-        ORDER BY p.projektname
-        """
-        results = self.db.execute_query(query)
+    def alle_projekte_uebersicht(self, von: str = None, bis: str = None) -> List[Dict]:
+        query = sql('bericht.alle_projekte')
+        results = self.db.execute_query(query, zeitraum(von, bis))
         
         projekte = []
         for row in results:
@@ -139,27 +100,23 @@ class ReportGenerator:
         
         return projekte
     
-    def gewinn_analyse(self, projekt_id: int = None) -> Dict:
+    def gewinn_analyse(self, projekt_id: int = None, von: str = None, bis: str = None) -> Dict:
+        """Umsatz, Kosten und Gewinn je Artikel
+        
+        Kosten sind wie im Monatsbericht der beim Verkauf nach FIFO gebuchte
+        Wareneinsatz; nur Altverkäufe ohne gespeicherten Wareneinsatz werden
+        mit dem durchschnittlichen Einkaufspreis bewertet. Der
+        durchschnitt_einkaufspreis ist der Wareneinsatz je verkauftem Stück.
+        """
+        von, bis = zeitraum(von, bis)
         if projekt_id:
             # Analyse für ein spezifisches Projekt
-            where_clause = "WHERE v.projekt_id = ?"
-            params = (projekt_id,)
+            query = sql('bericht.gewinn_projekt')
+            params = (projekt_id, von, bis)
         else:
             # Analyse für alle Projekte
-            where_clause = ""
-            params = ()
-        
-        query = f"""
-        SELECT v.artikelnummer, a.bezeichnung,
-               SUM(v.verkaufte_menge) as gesamt_verkauft,
-               AVG(v.verkaufspreis) as durchschnitt_verkaufspreis,
-               SUM(v.verkaufte_menge * v.verkaufspreis) as gesamtumsatz
-        FROM verkaeufe v
-        JOIN artikel a ON v.artikelnummer = a.artikelnummer
-        {where_clause}
-        GROUP BY v.artikelnummer, a.bezeichnung
-        ORDER BY gesamtumsatz DESC
-        """
+            query = sql('bericht.gewinn_alle')
+            params = (von, bis)
         
         verkaeufe = self.db.execute_query(query, params)
         
@@ -167,19 +124,9 @@ class ReportGenerator:
         gesamtumsatz = 0
         
         for verkauf in verkaeufe:
-            artikelnummer = verkauf[0]
-            
-            # Durchschnittlichen Einkaufspreis für verkaufte Mengen berechnen
-            einkauf_query = """
-            SELECT AVG(einkaufspreis) as durchschnitt_einkauf
-            FROM lagerbestand
-            WHERE artikelnummer = ?
-            """
-            einkauf_result = self.db.execute_query(einkauf_query, (artikelnummer,))
-            durchschnitt_einkauf = einkauf_result[0][0] if einkauf_result[0][0] else 0
-            
             umsatz = verkauf[4]
-            kosten = verkauf[2] * durchschnitt_einkauf
+            kosten = verkauf[5] or 0
+            durchschnitt_einkauf = kosten / verkauf[2] if verkauf[2] else 0
             gewinn = umsatz - kosten
             
             analyse.append({
@@ -207,19 +154,10 @@ class ReportGenerator:
             'gesamtgewinnmarge': (gesamtgewinn / gesamtumsatz * 100) if gesamtumsatz > 0 else 0
         }
     
-    def lagerumschlag(self) -> List[Dict]:
-        query = """
-        SELECT a.artikelnummer, a.bezeichnung,
-               COALESCE(SUM(l.verfuegbare_menge), 0) as lagerbestand,
-               COALESCE(SUM(v.verkaufte_menge), 0) as verkaufte_menge,
-               COUNT(DISTINCT v.id) as anzahl_verkaeufe
-        FROM artikel a
-        LEFT JOIN lagerbestand l ON a.artikelnummer = l.artikelnummer AND l.verfuegbare_menge > 0
-        LEFT JOIN verkaeufe v ON a.artikelnummer = v.artikelnummer
-        GROUP BY a.artikelnummer, a.bezeichnung
-        ORDER BY verkaufte_menge DESC
-        """
-        results = self.db.execute_query(query)
+    def lagerumschlag(self, von: str = None, bis: str = None) -> List[Dict]:
+        """Verkaufte Menge im Zeitraum im Verhältnis zum aktuellen Lagerbestand"""
+        query = sql('bericht.lagerumschlag')
+        results = self.db.execute_query(query, zeitraum(von, bis))
         
         umschlag = []
         for row in results:
@@ -240,4 +178,50 @@ class ReportGenerator:
                 'umschlagrate': umschlagrate
             })
         
-        return umschlag
\ No newline at end of file
+        return umschlag
+    
+    def monatsbericht(self, von: str = None, bis: str = None, projekt_id: int = None) -> Dict:
+        """Umsatz, Wareneinsatz und Gewinn je Monat aus der Monatsverdichtung
+        
+        Wareneinsatz ist der beim Verkauf nach FIFO gebuchte Einkaufswert,
+        dieselbe Kostenbasis wie in gewinn_analyse.
+        """
+        von, bis = monatszeitraum(von, bis)
+        if projekt_id:
+            results = self.db.execute_query(sql('bericht.monat_projekt'), (projekt_id, von, bis))
+        else:
+            results = self.db.execute_query(sql('bericht.monat_alle'), (von, bis))
+        
+        monate = []
+        for row in results:
+            umsatz = row[2]
+            gewinn = umsatz - row[3]
+            monate.append({
+                'monat': row[0],
+                'verkaufte_menge': row[1],
+                'umsatz': umsatz,
+                'wareneinsatz': row[3],
+                'gewinn': gewinn,
+                'gewinnmarge': (gewinn / umsatz * 100) if umsatz > 0 else 0,
+                'anzahl_verkaeufe': row[4]
+            })
+        
+        gesamtumsatz = sum(m['umsatz'] for m in monate)
+        gesamtkosten = sum(m['wareneinsatz'] for m in monate)
+        gesamtgewinn = gesamtumsatz - gesamtkosten
+        
+        return {
+            'monate': monate,
+            'gesamtumsatz': gesamtumsatz,
+            'gesamtkosten': gesamtkosten,
+            'gesamtgewinn': gesamtgewinn,
+            'gesamtgewinnmarge': (gesamtgewinn / gesamtumsatz * 100) if gesamtumsatz > 0 else 0
+        }
+    
+    def monatswerte_neu_aufbauen(self) -> int:
+        """Baut die Monatsverdichtung vollständig aus den Verkäufen neu auf"""
+        with self.db.transaction() as conn:
+            self.db.execute_in(conn, sql('monat.leeren'))
+            anzahl = self.db.execute_in(conn, sql('monat.neu_aufbauen')).rowcount
+        app_logger.info(f"Monatsverdichtung neu aufgebaut: {anzahl} Zeilen")
+        return anzahl
@@ -0,0 +1,130 @@
+"""
+Wartungsjobs im Hintergrund
+
+Ein einzelner Daemon-Thread führt registrierte Jobs in festen Intervallen
+aus. Jobs liefern die Anzahl der bearbeiteten Einträge zurück; Ergebnis und
+Fehler werden geloggt, als Metrik erfasst und über status() bereitgestellt.
+Der erste Lauf erfolgt nach Ablauf eines Intervalls, nicht beim Start.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from logger_config import app_logger
+from metrics import registry
+
+maintenance_runs = registry.counter(
+    'lager_maintenance_runs_total',
+    'Läufe von Wartungsjobs nach Ergebnis',
+    ('job', 'result')
+)
+maintenance_items = registry.counter(
+    'lager_maintenance_items_total',
+    'Von Wartungsjobs bearbeitete (z.B. gelöschte) Einträge',
+    ('job',)
+)
+
+
+class _Job:
+    __slots__ = ('name', 'interval', 'func', 'next_run', 'last_run', 'last_result', 'last_error')
+
+    def __init__(self, name: str, interval: float, func: Callable[[], int]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = time.monotonic() + interval
+        self.last_run = None
+        self.last_result = None
+        self.last_error = None
+
+
+class MaintenanceScheduler:
+    """Führt Wartungsjobs periodisch in einem Hintergrund-Thread aus"""
+
+    def __init__(self):
+        self._jobs: List[_Job] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(self, name: str, interval_seconds: float, func: Callable[[], int]):
+        if interval_seconds <= 0:
+            raise ValueError(f"Intervall für Job '{name}' muss positiv sein")
+        with self._lock:
+            self._jobs.append(_Job(name, interval_seconds, func))
+        self._wakeup.set()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='wartung', daemon=True)
+        self._thread.start()
+        app_logger.info(f"Wartungs-Scheduler gestartet mit {len(self._jobs)} Jobs")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_job(self, name: str) -> int:
+        """Führt einen Job sofort im aufrufenden Thread aus"""
+        with self._lock:
+            job = next((j for j in self._jobs if j.name == name), None)
+        if job is None:
+            raise KeyError(f"Unbekannter Wartungsjob: {name}")
+        return self._execute(job)
+
+    def status(self) -> List[Dict]:
+        with self._lock:
+            return [{
+                'job': job.name,
+                'intervall_sekunden': job.interval,
+                'letzter_lauf': job.last_run,
+                'letztes_ergebnis': job.last_result,
+                'letzter_fehler': job.last_error
+            } for job in self._jobs]
+
+    def _loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                faellig = [job for job in self._jobs if job.next_run <= time.monotonic()]
+            for job in faellig:
+                if self._stop.is_set():
+                    return
+                try:
+                    self._execute(job)
+                except Exception:
+                    pass  # bereits in _execute protokolliert
+            with self._lock:
+                naechster = min((job.next_run for job in self._jobs), default=None)
+            wartezeit = None if naechster is None else max(0.0, naechster - time.monotonic())
+            self._wakeup.wait(wartezeit)
+            self._wakeup.clear()
+
+    def _execute(self, job: _Job) -> int:
+        start = time.monotonic()
+        try:
+            anzahl = job.func() or 0
+        except Exception as e:
+            app_logger.error(f"Wartungsjob '{job.name}' fehlgeschlagen: {e}")
+            maintenance_runs.inc(job=job.name, result='error')
+            with self._lock:
+                job.last_run = datetime.now().isoformat()
+                job.last_error = str(e)
+                job.next_run = time.monotonic() + job.interval
+            raise
+        dauer = time.monotonic() - start
+        maintenance_runs.inc(job=job.name, result='ok')
+        maintenance_items.inc(anzahl, job=job.name)
+        app_logger.info(f"Wartungsjob '{job.name}' abgeschlossen: {anzahl} Einträge in {dauer:.2f}s")
+        with self._lock:
+            job.last_run = datetime.now().isoformat()
+            job.last_result = anzahl
+            job.last_error = None
+            job.next_run = time.monotonic() + job.interval
+        return anzahl
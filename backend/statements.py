@@ -0,0 +1,520 @@
+"""
+Zentrales Register aller SQL-Statements
+
+Jedes Statement hat einen festen Namen und genau einen SQL-Text. Weil
+sqlite3 vorbereitete Statements pro Verbindung anhand des SQL-Texts
+cacht, wird ein Statement auf einer gepoolten Verbindung nur beim
+ersten Aufruf geparst und danach aus dem Statement-Cache bedient.
+"""
+
+STATEMENTS = {
+    # Lieferanten
+    'lieferant.einfuegen': """
+        INSERT INTO lieferanten (name, kontakt) VALUES (?, ?)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+    """,
+    'lieferant.speichern': """
+        INSERT INTO lieferanten (name, kontakt) VALUES (?, ?)
+        ON CONFLICT (name) DO UPDATE SET kontakt = excluded.kontakt
+        RETURNING id
+    """,
+    'lieferant.auflisten': "SELECT id, name, kontakt FROM lieferanten ORDER BY name",
+    'lieferant.finden': "SELECT id, name, kontakt FROM lieferanten WHERE id = ?",
+    'lieferant.nach_name': "SELECT id, name, kontakt FROM lieferanten WHERE name = ?",
+    # Bei einem Namenskonflikt wird keine Zeile geändert
+    'lieferant.aktualisieren': "UPDATE OR IGNORE lieferanten SET name = ?, kontakt = ? WHERE id = ?",
+    'lieferant.artikel_zaehlen': "SELECT COUNT(*) FROM artikel WHERE lieferant_id = ?",
+    'lieferant.loeschpruefung': """
+        SELECT EXISTS (SELECT 1 FROM lieferanten WHERE id = ?),
+               EXISTS (SELECT 1 FROM artikel WHERE lieferant_id = ?)
+    """,
+    'lieferant.loeschen': "DELETE FROM lieferanten WHERE id = ?",
+    'lieferant.nach_namen': "SELECT id, name FROM lieferanten WHERE name IN (SELECT value FROM json_each(?))",
+
+    # Artikel
+    # Legt nur an, wenn der Lieferant existiert und die Artikelnummer frei ist
+    'artikel.einfuegen': """
+        INSERT INTO artikel (artikelnummer, bezeichnung, lieferant_id, mindestmenge)
+        SELECT ?, ?, id, ? FROM lieferanten WHERE id = ?
+        ON CONFLICT (artikelnummer) DO NOTHING
+        RETURNING id
+    """,
+    'artikel.speichern': """
+        INSERT INTO artikel (artikelnummer, bezeichnung, lieferant_id, mindestmenge)
+        SELECT ?, ?, id, ? FROM lieferanten WHERE id = ?
+        ON CONFLICT (artikelnummer) DO UPDATE SET
+            bezeichnung = excluded.bezeichnung,
+            lieferant_id = excluded.lieferant_id,
+            mindestmenge = excluded.mindestmenge
+        RETURNING id
+    """,
+    'artikel.nach_nummern': """
+        SELECT artikelnummer, bezeichnung, lieferant_id, mindestmenge FROM artikel
+        WHERE artikelnummer IN (SELECT value FROM json_each(?))
+    """,
+    'artikel.upsert': """
+        INSERT INTO artikel (artikelnummer, bezeichnung, lieferant_id, mindestmenge) VALUES (?, ?, ?, ?)
+        ON CONFLICT (artikelnummer) DO UPDATE SET
+            bezeichnung = excluded.bezeichnung,
+            lieferant_id = excluded.lieferant_id,
+            mindestmenge = excluded.mindestmenge
+    """,
+    'artikel.auflisten': """
+        SELECT a.artikelnummer, a.bezeichnung, l.name as lieferant_name, a.mindestmenge
+        FROM artikel a
+        JOIN lieferanten l ON a.lieferant_id = l.id
+        ORDER BY a.artikelnummer
+    """,
+    'artikel.finden': """
+        SELECT artikelnummer, bezeichnung, lieferant_id, mindestmenge, id
+        FROM artikel
+        WHERE artikelnummer = ?
+    """,
+    # Volltextsuche (FTS5, rowid = artikel.id); Artikelnummer wiegt am stärksten
+    'artikel.suche': """
+        SELECT a.artikelnummer, a.bezeichnung, s.lieferant_name, a.mindestmenge
+        FROM artikel_suche s
+        JOIN artikel a ON a.id = s.rowid
+        WHERE artikel_suche MATCH ?
+        ORDER BY bm25(artikel_suche, 10.0, 5.0, 1.0)
+        LIMIT ?
+    """,
+    'artikel.nummern': "SELECT artikelnummer FROM artikel",
+    'artikel.suche_like': """
+        SELECT a.artikelnummer, a.bezeichnung, l.name, a.mindestmenge
+        FROM artikel a
+        JOIN lieferanten l ON a.lieferant_id = l.id
+        WHERE a.artikelnummer || ' ' || a.bezeichnung || ' ' || l.name LIKE ? ESCAPE '\\'
+        ORDER BY a.artikelnummer
+        LIMIT ?
+    """,
+    'suche.neu_aufbauen': """
+        INSERT INTO artikel_suche (rowid, artikelnummer, bezeichnung, lieferant_name)
+        SELECT a.id, a.artikelnummer, a.bezeichnung, l.name
+        FROM artikel a
+        LEFT JOIN lieferanten l ON l.id = a.lieferant_id
+    """,
+    'artikel.unter_mindestmenge': """
+        SELECT a.artikelnummer, a.bezeichnung, a.mindestmenge,
+               b.bestand as aktueller_bestand,
+               l_info.name as lieferant_name
+        FROM artikel_bestand b
+        -- CROSS JOIN hält die Reihenfolge fest: erst die markierten Zeilen über den partiellen Index
+        CROSS JOIN artikel a ON a.id = b.artikel_id
+        JOIN lieferanten l_info ON a.lieferant_id = l_info.id
+        WHERE b.unter_mindestmenge = 1
+        ORDER BY a.artikelnummer
+    """,
+    'artikel.mindestmenge_setzen': "UPDATE artikel SET mindestmenge = ? WHERE artikelnummer = ?",
+
+    # Kunden
+    'kunde.einfuegen': "INSERT INTO kunden (name, kontakt) VALUES (?, ?)",
+    'kunde.auflisten': "SELECT id, name, kontakt FROM kunden ORDER BY name",
+    'kunde.finden': "SELECT id, name, kontakt FROM kunden WHERE id = ?",
+    'kunde.loeschpruefung': """
+        SELECT EXISTS (SELECT 1 FROM kunden WHERE id = ?),
+               EXISTS (SELECT 1 FROM projekte WHERE kunde_id = ?)
+    """,
+    'kunde.loeschen': "DELETE FROM kunden WHERE id = ?",
+
+    # Projekte
+    'projekt.einfuegen': "INSERT INTO projekte (projektname, kunde_id) VALUES (?, ?)",
+    'projekt.auflisten': """
+        SELECT p.id, p.projektname, k.name as kunde_name
+        FROM projekte p
+        JOIN kunden k ON p.kunde_id = k.id
+        ORDER BY p.projektname
+    """,
+    'projekt.loeschpruefung': """
+        SELECT EXISTS (SELECT 1 FROM projekte WHERE id = ?),
+               EXISTS (SELECT 1 FROM verkaeufe WHERE projekt_id = ?),
+               EXISTS (SELECT 1 FROM reservierungen WHERE projekt_id = ?)
+    """,
+    'projekt.loeschen': "DELETE FROM projekte WHERE id = ?",
+    'projekt.existiert': "SELECT 1 FROM projekte WHERE id = ?",
+
+    # Lagerbestand
+    'lager.eingang': """
+        INSERT INTO lagerbestand (artikel_id, verfuegbare_menge, einkaufspreis, einlagerungsdatum)
+        VALUES (?, ?, ?, ?)
+    """,
+    'lager.fifo_offen': """
+        SELECT l.id, a.artikelnummer, l.verfuegbare_menge, l.einkaufspreis, l.einlagerungsdatum
+        FROM artikel a
+        JOIN lagerbestand l ON l.artikel_id = a.id
+        WHERE a.artikelnummer = ? AND l.verfuegbare_menge > 0
+        ORDER BY l.einlagerungsdatum, l.id
+    """,
+    'lager.alle_chargen': """
+        SELECT l.id, a.artikelnummer, l.verfuegbare_menge, l.einkaufspreis, l.einlagerungsdatum
+        FROM artikel a
+        JOIN (
+            SELECT id, artikel_id, verfuegbare_menge, einkaufspreis, einlagerungsdatum FROM lagerbestand
+            UNION ALL
+            SELECT id, artikel_id, verfuegbare_menge, einkaufspreis, einlagerungsdatum FROM lagerbestand_archiv
+        ) l ON l.artikel_id = a.id
+        WHERE a.artikelnummer = ?
+        ORDER BY l.einlagerungsdatum, l.id
+    """,
+    'lager.archivieren': """
+        INSERT INTO lagerbestand_archiv (id, artikel_id, verfuegbare_menge, einkaufspreis, einlagerungsdatum, archiviert_am)
+        SELECT id, artikel_id, verfuegbare_menge, einkaufspreis, einlagerungsdatum, ?
+        FROM lagerbestand
+        WHERE id IN (SELECT id FROM lagerbestand
+                     WHERE verfuegbare_menge = 0 AND einlagerungsdatum < ?
+                     ORDER BY einlagerungsdatum, id LIMIT ?)
+    """,
+    'lager.archivierte_loeschen': """
+        DELETE FROM lagerbestand
+        WHERE id IN (SELECT id FROM lagerbestand
+                     WHERE verfuegbare_menge = 0 AND einlagerungsdatum < ?
+                     ORDER BY einlagerungsdatum, id LIMIT ?)
+    """,
+    # Bedingte Entnahme: greift nur, wenn die Charge noch genug Menge hat
+    'lager.entnehmen': """
+        UPDATE lagerbestand SET verfuegbare_menge = verfuegbare_menge - ?
+        WHERE id = ? AND verfuegbare_menge >= ?
+    """,
+    'lager.gesamtbestand': """
+        SELECT a.artikelnummer, a.bezeichnung,
+               SUM(l.verfuegbare_menge) as gesamtmenge,
+               AVG(l.einkaufspreis) as durchschnittspreis
+        FROM lagerbestand l
+        JOIN artikel a ON l.artikel_id = a.id
+        WHERE l.verfuegbare_menge > 0
+        GROUP BY l.artikel_id
+        ORDER BY a.artikelnummer
+    """,
+
+    # Bestandsübersicht je Artikel (verfügbar = bestand - reserviert)
+    'bestand.leeren': "DELETE FROM artikel_bestand",
+    'bestand.neu_aufbauen': """
+        INSERT INTO artikel_bestand (artikel_id, bestand, reserviert, unter_mindestmenge)
+        SELECT id, bestand, reserviert, bestand < COALESCE(mindestmenge, 0)
+        FROM (
+            SELECT a.id, a.mindestmenge,
+                   COALESCE((SELECT SUM(l.verfuegbare_menge) FROM lagerbestand l WHERE l.artikel_id = a.id), 0) AS bestand,
+                   COALESCE((SELECT SUM(r.menge) FROM reservierungen r
+                             WHERE r.artikel_id = a.id AND r.status = 'offen'), 0) AS reserviert
+            FROM artikel a
+        )
+    """,
+    'bestand.zugang': """
+        INSERT INTO artikel_bestand (artikel_id, bestand, reserviert) VALUES (?, ?, 0)
+        ON CONFLICT (artikel_id) DO UPDATE SET bestand = bestand + excluded.bestand
+        RETURNING bestand
+    """,
+    'bestand.verkaufen': """
+        UPDATE artikel_bestand SET bestand = bestand - ?, reserviert = reserviert - ?
+        WHERE artikel_id = ? AND bestand - reserviert + ? >= ?
+        RETURNING bestand
+    """,
+    # Liefert nur dann eine Zeile, wenn sich das Kennzeichen ändert
+    'bestand.mindestmenge_pruefen': """
+        UPDATE artikel_bestand
+        SET unter_mindestmenge = NOT unter_mindestmenge
+        WHERE artikel_id = ?
+          AND unter_mindestmenge <> (bestand < (SELECT COALESCE(a.mindestmenge, 0) FROM artikel a
+                                                WHERE a.id = artikel_bestand.artikel_id))
+        RETURNING unter_mindestmenge
+    """,
+    'bestand.kennzeichen': """
+        SELECT b.bestand, b.unter_mindestmenge
+        FROM artikel a
+        JOIN artikel_bestand b ON b.artikel_id = a.id
+        WHERE a.artikelnummer = ?
+    """,
+    'bestand.reservieren': """
+        UPDATE artikel_bestand SET reserviert = reserviert + ?
+        WHERE artikel_id = ? AND bestand - reserviert >= ?
+    """,
+    'bestand.freigeben': "UPDATE artikel_bestand SET reserviert = reserviert - ? WHERE artikel_id = ?",
+    'bestand.verfuegbarkeit': """
+        SELECT a.artikelnummer, COALESCE(b.bestand, 0), COALESCE(b.reserviert, 0)
+        FROM artikel a
+        LEFT JOIN artikel_bestand b ON b.artikel_id = a.id
+        WHERE a.artikelnummer = ?
+    """,
+    # Sammelabfrage: Anfrage als JSON-Array [[artikelnummer, menge], ...] in einem Parameter,
+    # FIFO-Wareneinsatz der lieferbaren Menge über die laufende Summe der Chargen
+    'bestand.verfuegbarkeit_sammel': """
+        WITH anfrage AS (
+            SELECT json_extract(value, '$[0]') AS artikelnummer, json_extract(value, '$[1]') AS menge
+            FROM json_each(?)
+        ),
+        positionen AS (
+            SELECT q.artikelnummer, q.menge, a.id AS artikel_id,
+                   COALESCE(b.bestand, 0) AS bestand, COALESCE(b.reserviert, 0) AS reserviert
+            FROM anfrage q
+            LEFT JOIN artikel a ON a.artikelnummer = q.artikelnummer
+            LEFT JOIN artikel_bestand b ON b.artikel_id = a.id
+        ),
+        chargen AS (
+            SELECT p.artikelnummer, l.verfuegbare_menge, l.einkaufspreis,
+                   MAX(0, MIN(p.menge, p.bestand - p.reserviert)) AS liefermenge,
+                   SUM(l.verfuegbare_menge) OVER (PARTITION BY l.artikel_id ORDER BY l.einlagerungsdatum, l.id)
+                       - l.verfuegbare_menge AS davor
+            FROM positionen p
+            JOIN lagerbestand l ON l.artikel_id = p.artikel_id AND l.verfuegbare_menge > 0
+        )
+        SELECT p.artikelnummer, p.artikel_id IS NOT NULL, p.bestand, p.reserviert,
+               COALESCE(SUM(MAX(0, MIN(c.verfuegbare_menge, c.liefermenge - c.davor)) * c.einkaufspreis), 0)
+        FROM positionen p
+        LEFT JOIN chargen c ON c.artikelnummer = p.artikelnummer
+        GROUP BY p.artikelnummer
+    """,
+
+    # Reservierungen
+    'reservierung.einfuegen': """
+        INSERT INTO reservierungen (projekt_id, artikel_id, menge, erstellt_am, gueltig_bis)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    'reservierung.finden': """
+        SELECT r.id, r.projekt_id, a.artikelnummer, r.menge, r.erstellt_am, r.gueltig_bis, r.status
+        FROM reservierungen r
+        JOIN artikel a ON a.id = r.artikel_id
+        WHERE r.id = ?
+    """,
+    'reservierung.offene': """
+        SELECT r.id, r.projekt_id, a.artikelnummer, r.menge, r.erstellt_am, r.gueltig_bis, r.status
+        FROM reservierungen r
+        JOIN artikel a ON a.id = r.artikel_id
+        WHERE r.status = 'offen'
+        ORDER BY r.gueltig_bis
+    """,
+    'reservierung.offene_projekt': """
+        SELECT r.id, r.projekt_id, a.artikelnummer, r.menge, r.erstellt_am, r.gueltig_bis, r.status
+        FROM reservierungen r
+        JOIN artikel a ON a.id = r.artikel_id
+        WHERE r.projekt_id = ? AND r.status = 'offen'
+        ORDER BY r.gueltig_bis
+    """,
+    'reservierung.stornieren': """
+        UPDATE reservierungen SET status = 'storniert'
+        WHERE id = ? AND status = 'offen'
+        RETURNING artikel_id, menge
+    """,
+    'reservierung.offen_projekt_artikel': """
+        SELECT id, menge FROM reservierungen
+        WHERE projekt_id = ? AND artikel_id = ? AND status = 'offen'
+        ORDER BY gueltig_bis
+    """,
+    'reservierung.einloesen': """
+        UPDATE reservierungen
+        SET menge = menge - ?, status = CASE WHEN menge = ? THEN 'eingeloest' ELSE status END
+        WHERE id = ?
+    """,
+    'reservierung.ablaufen': """
+        UPDATE reservierungen SET status = 'abgelaufen'
+        WHERE id IN (SELECT id FROM reservierungen
+                     WHERE status = 'offen' AND gueltig_bis < ?
+                     ORDER BY gueltig_bis LIMIT ?)
+        RETURNING id, artikel_id, menge
+    """,
+
+    # Verkäufe
+    'verkauf.einfuegen': """
+        INSERT INTO verkaeufe (projekt_id, artikel_id, verkaufte_menge, verkaufspreis, verkaufsdatum, wareneinsatz)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    'verkauf.monat_buchen': """
+        INSERT INTO verkaeufe_monat (monat, artikel_id, projekt_id, menge, umsatz, wareneinsatz, anzahl_verkaeufe)
+        VALUES (?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT (monat, artikel_id, projekt_id) DO UPDATE SET
+            menge = menge + excluded.menge,
+            umsatz = umsatz + excluded.umsatz,
+            wareneinsatz = wareneinsatz + excluded.wareneinsatz,
+            anzahl_verkaeufe = anzahl_verkaeufe + 1
+    """,
+
+    # Monatliche Verdichtung (Altdaten ohne Wareneinsatz mit Durchschnitts-Einkaufspreis)
+    'monat.leeren': "DELETE FROM verkaeufe_monat",
+    'monat.neu_aufbauen': """
+        INSERT INTO verkaeufe_monat (monat, artikel_id, projekt_id, menge, umsatz, wareneinsatz, anzahl_verkaeufe)
+        SELECT substr(v.verkaufsdatum, 1, 7), v.artikel_id, v.projekt_id,
+               SUM(v.verkaufte_menge),
+               SUM(v.verkaufte_menge * v.verkaufspreis),
+               SUM(COALESCE(v.wareneinsatz, v.verkaufte_menge * COALESCE(ep.preis, 0))),
+               COUNT(*)
+        FROM verkaeufe v
+        LEFT JOIN (
+            SELECT artikel_id, AVG(einkaufspreis) as preis
+            FROM (SELECT artikel_id, einkaufspreis FROM lagerbestand
+                  UNION ALL
+                  SELECT artikel_id, einkaufspreis FROM lagerbestand_archiv)
+            GROUP BY artikel_id
+        ) ep ON ep.artikel_id = v.artikel_id
+        GROUP BY substr(v.verkaufsdatum, 1, 7), v.artikel_id, v.projekt_id
+    """,
+    'verkauf.projekt': """
+        SELECT a.artikelnummer, a.bezeichnung, v.verkaufte_menge, v.verkaufspreis, v.verkaufsdatum
+        FROM verkaeufe v
+        JOIN artikel a ON v.artikel_id = a.id
+        WHERE v.projekt_id = ?
+        ORDER BY v.verkaufsdatum
+    """,
+
+    # Outbox (Änderungs-Feed für Folgesysteme)
+    'outbox.anhaengen': """
+        INSERT INTO outbox (erstellt_am, entitaet, schluessel, aktion, daten) VALUES (?, ?, ?, ?, ?)
+    """,
+    'outbox.seit': """
+        SELECT seq, erstellt_am, entitaet, schluessel, aktion, daten FROM outbox
+        WHERE seq > ? ORDER BY seq LIMIT ?
+    """,
+    'outbox.stand': """
+        SELECT (SELECT MIN(seq) FROM outbox),
+               COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'outbox'), 0)
+    """,
+    'outbox.bereinigen': """
+        DELETE FROM outbox
+        WHERE seq IN (SELECT seq FROM outbox WHERE erstellt_am < ? ORDER BY erstellt_am LIMIT ?)
+    """,
+
+    # Berichte
+    'bericht.lagerbestand_detailliert': """
+        SELECT l.id, a.artikelnummer, a.bezeichnung, li.name as lieferant,
+               l.verfuegbare_menge, l.einkaufspreis, l.einlagerungsdatum,
+               (l.verfuegbare_menge * l.einkaufspreis) as gesamtwert
+        FROM lagerbestand l
+        JOIN artikel a ON l.artikel_id = a.id
+        JOIN lieferanten li ON a.lieferant_id = li.id
+        WHERE l.verfuegbare_menge > 0
+        ORDER BY a.artikelnummer, l.einlagerungsdatum
+    """,
+    'bericht.lagerbestand_zusammenfassung': """
+        SELECT a.artikelnummer, a.bezeichnung, li.name as lieferant,
+               SUM(l.verfuegbare_menge) as gesamtmenge,
+               AVG(l.einkaufspreis) as durchschnittspreis,
+               SUM(l.verfuegbare_menge * l.einkaufspreis) as gesamtwert,
+               MIN(l.einlagerungsdatum) as aeltestes_datum,
+               MAX(l.einlagerungsdatum) as neuestes_datum
+        FROM lagerbestand l
+        JOIN artikel a ON l.artikel_id = a.id
+        JOIN lieferanten li ON a.lieferant_id = li.id
+        WHERE l.verfuegbare_menge > 0
+        GROUP BY l.artikel_id
+        ORDER BY a.artikelnummer
+    """,
+    'bericht.projekt_info': """
+        SELECT p.projektname, k.name as kunde_name
+        FROM projekte p
+        JOIN kunden k ON p.kunde_id = k.id
+        WHERE p.id = ?
+    """,
+    'bericht.projekt_verkaeufe': """
+        SELECT a.artikelnummer, a.bezeichnung, v.verkaufte_menge,
+               v.verkaufspreis, v.verkaufsdatum,
+               (v.verkaufte_menge * v.verkaufspreis) as umsatz
+        FROM verkaeufe v
+        JOIN artikel a ON v.artikel_id = a.id
+        WHERE v.projekt_id = ? AND v.verkaufsdatum >= ? AND v.verkaufsdatum <= ?
+        ORDER BY v.verkaufsdatum, a.artikelnummer
+    """,
+    'bericht.alle_projekte': """
+        SELECT p.id, p.projektname, k.name as kunde_name,
+               COUNT(v.id) as anzahl_verkaeufe,
+               COALESCE(SUM(v.verkaufte_menge * v.verkaufspreis), 0) as gesamtumsatz
+        FROM projekte p
+        JOIN kunden k ON p.kunde_id = k.id
+        LEFT JOIN verkaeufe v ON p.id = v.projekt_id
+                              AND v.verkaufsdatum >= ? AND v.verkaufsdatum <= ?
+        GROUP BY p.id, p.projektname, k.name
+        ORDER BY p.projektname
+    """,
+    'bericht.gewinn_alle': """
+        SELECT a.artikelnummer, a.bezeichnung,
+               SUM(v.verkaufte_menge) as gesamt_verkauft,
+               AVG(v.verkaufspreis) as durchschnitt_verkaufspreis,
+               SUM(v.verkaufte_menge * v.verkaufspreis) as gesamtumsatz,
+               SUM(COALESCE(v.wareneinsatz, v.verkaufte_menge * COALESCE((SELECT AVG(l.einkaufspreis) FROM (
+                    SELECT einkaufspreis FROM lagerbestand WHERE artikel_id = v.artikel_id
+                    UNION ALL
+                    SELECT einkaufspreis FROM lagerbestand_archiv WHERE artikel_id = v.artikel_id
+                ) l), 0))) as wareneinsatz
+        FROM verkaeufe v
+        JOIN artikel a ON v.artikel_id = a.id
+        WHERE v.verkaufsdatum >= ? AND v.verkaufsdatum <= ?
+        GROUP BY v.artikel_id
+        ORDER BY gesamtumsatz DESC
+    """,
+    'bericht.gewinn_projekt': """
+        SELECT a.artikelnummer, a.bezeichnung,
+               SUM(v.verkaufte_menge) as gesamt_verkauft,
+               AVG(v.verkaufspreis) as durchschnitt_verkaufspreis,
+               SUM(v.verkaufte_menge * v.verkaufspreis) as gesamtumsatz,
+               SUM(COALESCE(v.wareneinsatz, v.verkaufte_menge * COALESCE((SELECT AVG(l.einkaufspreis) FROM (
+                    SELECT einkaufspreis FROM lagerbestand WHERE artikel_id = v.artikel_id
+                    UNION ALL
+                    SELECT einkaufspreis FROM lagerbestand_archiv WHERE artikel_id = v.artikel_id
+                ) l), 0))) as wareneinsatz
+        FROM verkaeufe v
+        JOIN artikel a ON v.artikel_id = a.id
+        WHERE v.projekt_id = ? AND v.verkaufsdatum >= ? AND v.verkaufsdatum <= ?
+        GROUP BY v.artikel_id
+        ORDER BY gesamtumsatz DESC
+    """,
+    'bericht.lagerumschlag': """
+        SELECT a.artikelnummer, a.bezeichnung,
+               COALESCE((SELECT SUM(l.verfuegbare_menge) FROM lagerbestand l
+                         WHERE l.artikel_id = a.id AND l.verfuegbare_menge > 0), 0) as lagerbestand,
+               COALESCE(v.verkaufte_menge, 0) as verkaufte_menge,
+               COALESCE(v.anzahl_verkaeufe, 0) as anzahl_verkaeufe
+        FROM artikel a
+        LEFT JOIN (
+            SELECT artikel_id, SUM(verkaufte_menge) as verkaufte_menge, COUNT(*) as anzahl_verkaeufe
+            FROM verkaeufe
+            WHERE verkaufsdatum >= ? AND verkaufsdatum <= ?
+            GROUP BY artikel_id
+        ) v ON v.artikel_id = a.id
+        ORDER BY verkaufte_menge DESC, a.artikelnummer
+    """,
+    'bericht.monat_alle': """
+        SELECT monat, SUM(menge), SUM(umsatz), SUM(wareneinsatz), SUM(anzahl_verkaeufe)
+        FROM verkaeufe_monat
+        WHERE monat >= ? AND monat <= ?
+        GROUP BY monat
+        ORDER BY monat
+    """,
+    'bericht.monat_projekt': """
+        SELECT monat, SUM(menge), SUM(umsatz), SUM(wareneinsatz), SUM(anzahl_verkaeufe)
+        FROM verkaeufe_monat
+        WHERE projekt_id = ? AND monat >= ? AND monat <= ?
+        GROUP BY monat
+        ORDER BY monat
+    """,
+
+    # Benutzer und Token
+    'user.einfuegen': """
+        INSERT INTO users (username, password_hash, created_at, active) VALUES (?, ?, ?, ?)
+        ON CONFLICT (username) DO NOTHING
+        RETURNING id
+    """,
+    'user.nach_name': """
+        SELECT id, username, password_hash, created_at, active
+        FROM users
+        WHERE username = ? AND active = 1
+    """,
+    'user.nach_id': """
+        SELECT id, username, password_hash, created_at, active
+        FROM users
+        WHERE id = ? AND active = 1
+    """,
+    'user.deaktivieren': "UPDATE users SET active = 0 WHERE id = ? AND active = 1",
+    'user.auflisten': "SELECT id, username, created_at, active FROM users WHERE active = 1 ORDER BY username",
+    'token.sperren': "INSERT OR IGNORE INTO blacklisted_tokens (jti, created_at, expires_at) VALUES (?, ?, ?)",
+    'token.gesperrt': "SELECT EXISTS(SELECT 1 FROM blacklisted_tokens WHERE jti = ?)",
+    'token.abgelaufene_loeschen': """
+        DELETE FROM blacklisted_tokens
+        WHERE id IN (SELECT id FROM blacklisted_tokens WHERE expires_at < ? LIMIT ?)
+    """,
+}
+
+
+def sql(name: str) -> str:
+    """SQL-Text eines registrierten Statements"""
+    try:
+        return STATEMENTS[name]
+    except KeyError:
+        raise KeyError(f"Unbekanntes SQL-Statement: {name}")
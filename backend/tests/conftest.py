@@ -26,12 +26,9 @@ def client():
     test_database = Database(db_path)
     
     # Create fresh instances for this test
-    test_inventory = InventoryManager()
-    test_inventory.db = test_database
-    test_reports = ReportGenerator()
-    test_reports.db = test_database
-    test_auth_service = auth_service.__class__()  # Create fresh instance
-    test_auth_service.db = test_database
+    test_inventory = InventoryManager(test_database)
+    test_reports = ReportGenerator(test_database)
+    test_auth_service = auth_service.__class__(test_database)  # Create fresh instance
     
     # Patch the blueprint modules for each test
     import api.auth
@@ -42,6 +39,8 @@ def client():
     import api.lager
     import api.verkauf
     import api.berichte
+    import api.reservierungen
+    import api.aenderungen
     
     # Store original instances to restore later
     original_instances = {
@@ -55,6 +54,8 @@ def client():
         'verkauf_inventory': api.verkauf.inventory,
         'berichte_inventory': api.berichte.inventory,
         'berichte_reports': api.berichte.reports,
+        'reservierungen_inventory': api.reservierungen.inventory,
+        'aenderungen_inventory': api.aenderungen.inventory,
     }
     
     # Patch all blueprint modules with test instances
@@ -68,6 +69,8 @@ def client():
     api.verkauf.inventory = test_inventory
     api.berichte.inventory = test_inventory
     api.berichte.reports = test_reports
+    api.reservierungen.inventory = test_inventory
+    api.aenderungen.inventory = test_inventory
     
     with app.test_client() as client:
         yield client
@@ -83,7 +86,10 @@ def client():
     api.verkauf.inventory = original_instances['verkauf_inventory']
     api.berichte.inventory = original_instances['berichte_inventory']
     api.berichte.reports = original_instances['berichte_reports']
+    api.reservierungen.inventory = original_instances['reservierungen_inventory']
+    api.aenderungen.inventory = original_instances['aenderungen_inventory']
     
+    test_database.zuruecksetzen()
     os.close(db_fd)
     os.unlink(db_path)
 
@@ -92,6 +98,7 @@ def test_db():
     db_fd, db_path = tempfile.mkstemp()
     test_database = Database(db_path)
     yield test_database
+    test_database.zuruecksetzen()
     os.close(db_fd)
     os.unlink(db_path)
 
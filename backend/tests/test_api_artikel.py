@@ -102,4 +102,106 @@ def test_create_multiple_artikel_same_lieferant(auth_client):
     
     # Prüfen dass unsere 3 Artikel dabei sind
     unsere_artikel = [a for a in artikel_liste if a['lieferant_name'] == 'Multi Artikel Lieferant']
-    assert len(unsere_artikel) == 3
\ No newline at end of file
+    assert len(unsere_artikel) == 3
+
+def _suchen(auth_client, q, **params):
+    response = auth_client.get('/api/artikel/suche', query_string={'q': q, **params}, headers=auth_client.auth_headers)
+    assert response.status_code == 200
+    return [a['artikelnummer'] for a in response.get_json()]
+
+def test_artikel_suche(auth_client, sample_data):
+    headers = auth_client.auth_headers
+    for nummer, bezeichnung in [('BUERO-1', 'Bürostuhl schwarz'), ('TISCH-1', 'Schreibtisch Eiche'),
+                                ('LAMPE-1', 'Stehlampe schwarz')]:
+        auth_client.post('/api/artikel', json={'artikelnummer': nummer, 'bezeichnung': bezeichnung,
+                                               'lieferant_id': sample_data['lieferant_id']}, headers=headers)
+    
+    # Präfix-Suche, Umlaute werden ignoriert, alle Wörter müssen passen
+    assert _suchen(auth_client, 'buro schw') == ['BUERO-1']
+    assert sorted(_suchen(auth_client, 'schwarz')) == ['BUERO-1', 'LAMPE-1']
+    assert _suchen(auth_client, 'tisch-1') == ['TISCH-1']
+    # Treffer in der Artikelnummer vor Treffern im Lieferantennamen
+    assert _suchen(auth_client, 'test')[0] == 'TEST-001'
+    assert _suchen(auth_client, 'schwarz', limit=1) in (['BUERO-1'], ['LAMPE-1'])
+    # FTS5-Syntax im Suchbegriff ist wirkungslos
+    assert _suchen(auth_client, '"schwarz" OR NEAR(') == []
+    assert _suchen(auth_client, '***') == []
+    
+    response = auth_client.get('/api/artikel/suche?q=', headers=headers)
+    assert response.status_code == 400
+
+def test_artikel_suche_follows_lieferant_rename(auth_client, sample_data):
+    auth_client.put(f"/api/lieferanten/{sample_data['lieferant_id']}", json={'name': 'Holzwerk AG'},
+                    headers=auth_client.auth_headers)
+    
+    assert _suchen(auth_client, 'holzwerk') == ['TEST-001']
+    assert _suchen(auth_client, 'möbel') == []
+
+def test_artikel_suche_without_fts5(auth_client, sample_data):
+    import api.artikel
+    api.artikel.inventory.db.volltextsuche = False
+    
+    assert _suchen(auth_client, 'Stuhl') == ['TEST-001']
+    
+    # Platzhalterzeichen im Suchbegriff werden wörtlich gesucht
+    headers = auth_client.auth_headers
+    for nummer, bezeichnung in (('RAB-1', 'Rabatt 50% Aktion'), ('RAB-2', 'Rabatt 50 Euro'), ('UNT-1', 'Tisch-klein')):
+        auth_client.post('/api/artikel', json={'artikelnummer': nummer, 'bezeichnung': bezeichnung,
+                                               'lieferant_id': sample_data['lieferant_id']}, headers=headers)
+    assert _suchen(auth_client, '50%') == ['RAB-1']
+    assert _suchen(auth_client, '%') == ['RAB-1']
+    assert _suchen(auth_client, 'h_k') == []
+    assert _suchen(auth_client, 'h-k') == ['UNT-1']
+
+def test_artikel_autocomplete(auth_client, sample_data):
+    headers = auth_client.auth_headers
+    for nummer in ['TEST-002', 'TEST-010', 'TISCH-1']:
+        auth_client.post('/api/artikel', json={'artikelnummer': nummer, 'bezeichnung': 'Artikel',
+                                               'lieferant_id': sample_data['lieferant_id']}, headers=headers)
+    
+    response = auth_client.get('/api/artikel/autocomplete?q=test-0', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == ['TEST-001', 'TEST-002', 'TEST-010']
+    
+    response = auth_client.get('/api/artikel/autocomplete?q=T&limit=2', headers=headers)
+    assert response.get_json() == ['TEST-001', 'TEST-002']
+    
+    response = auth_client.get('/api/artikel/autocomplete?q=T&limit=101', headers=headers)
+    assert response.status_code == 400
+
+def test_put_artikel_creates_or_updates(auth_client, sample_data):
+    headers = auth_client.auth_headers
+    lieferant_id = sample_data['lieferant_id']
+    
+    response = auth_client.put('/api/artikel/PUT-001', json={'bezeichnung': 'Hocker', 'lieferant_id': lieferant_id},
+                               headers=headers)
+    assert response.status_code == 201
+    assert response.get_json() == {'artikelnummer': 'PUT-001', 'bezeichnung': 'Hocker', 'lieferant_id': lieferant_id,
+                                   'mindestmenge': 1, 'aktion': 'angelegt'}
+    assert auth_client.get('/api/artikel/autocomplete?q=put', headers=headers).get_json() == ['PUT-001']
+    
+    response = auth_client.put('/api/artikel/PUT-001', json={'bezeichnung': 'Hocker', 'lieferant_id': lieferant_id},
+                               headers=headers)
+    assert response.status_code == 200 and response.get_json()['aktion'] == 'unveraendert'
+    
+    response = auth_client.put('/api/artikel/PUT-001', json={'bezeichnung': 'Barhocker', 'lieferant_id': lieferant_id,
+                                                             'mindestmenge': 4}, headers=headers)
+    assert response.status_code == 200 and response.get_json()['aktion'] == 'geaendert'
+    artikel = auth_client.get('/api/artikel/PUT-001', headers=headers).get_json()
+    assert (artikel['bezeichnung'], artikel['mindestmenge']) == ('Barhocker', 4)
+    
+    response = auth_client.put('/api/artikel/PUT-002', json={'bezeichnung': 'Hocker', 'lieferant_id': 999999},
+                               headers=headers)
+    assert response.status_code == 404
+    assert auth_client.get('/api/artikel/PUT-002', headers=headers).status_code == 404
+
+@pytest.mark.parametrize('daten', [
+    {'bezeichnung': 'Hocker', 'lieferant_id': '3'},
+    {'bezeichnung': 'Hocker', 'lieferant_id': True},
+    {'bezeichnung': 'Hocker', 'lieferant_id': 1.0},
+    {'bezeichnung': 'Hocker', 'lieferant_id': 0},
+    {'bezeichnung': 42, 'lieferant_id': 1},
+])
+def test_put_artikel_rejects_invalid_types(auth_client, sample_data, daten):
+    response = auth_client.put('/api/artikel/PUT-003', json=daten, headers=auth_client.auth_headers)
+    assert response.status_code == 400
@@ -219,4 +219,69 @@ def test_api_status(auth_client):
     data = response.get_json()
     assert data['status'] == 'ok'
     assert 'message' in data
-    assert 'version' in data
\ No newline at end of file
+    assert 'version' in data
+
+def _verkaeufe_in_zwei_monaten(auth_client, sample_data):
+    auth_client.post('/api/lager/eingang', json={
+        'artikelnummer': sample_data['artikelnummer'],
+        'menge': 20,
+        'einkaufspreis': 50.00,
+        'einlagerungsdatum': '2024-01-01'
+    }, headers=auth_client.auth_headers)
+    for datum, menge in (('2024-01-15', 2), ('2024-03-10', 5)):
+        auth_client.post('/api/verkauf', json={
+            'projekt_id': sample_data['projekt_id'],
+            'artikelnummer': sample_data['artikelnummer'],
+            'verkaufte_menge': menge,
+            'verkaufspreis': 80.00,
+            'verkaufsdatum': datum
+        }, headers=auth_client.auth_headers)
+
+def test_gewinn_analyse_zeitraum(auth_client, sample_data):
+    _verkaeufe_in_zwei_monaten(auth_client, sample_data)
+
+    response = auth_client.get('/api/berichte/gewinn?von=2024-03-01&bis=2024-03-31', headers=auth_client.auth_headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['gesamtumsatz'] == 400.00  # nur 5 * 80 aus März
+    assert data['artikel_analyse'][0]['verkaufte_menge'] == 5
+
+    response = auth_client.get('/api/berichte/gewinn?bis=2024-01-15', headers=auth_client.auth_headers)
+    assert response.get_json()['gesamtumsatz'] == 160.00  # bis ist inklusive
+
+def test_projekte_und_lagerumschlag_zeitraum(auth_client, sample_data):
+    _verkaeufe_in_zwei_monaten(auth_client, sample_data)
+
+    response = auth_client.get('/api/berichte/projekte?von=2024-02-01', headers=auth_client.auth_headers)
+    projekt = response.get_json()[0]
+    assert projekt['anzahl_verkaeufe'] == 1
+    assert projekt['gesamtumsatz'] == 400.00
+
+    response = auth_client.get('/api/berichte/lagerumschlag?von=2024-01-01&bis=2024-01-31', headers=auth_client.auth_headers)
+    umschlag = response.get_json()[0]
+    assert umschlag['verkaufte_menge'] == 2
+    assert umschlag['lagerbestand'] == 13  # aktueller Bestand unabhängig vom Zeitraum
+
+    response = auth_client.get(f"/api/projekte/{sample_data['projekt_id']}?von=2024-03-01", headers=auth_client.auth_headers)
+    assert [v['verkaufsdatum'] for v in response.get_json()['verkaeufe']] == ['2024-03-10']
+
+def test_berichte_ungueltiger_zeitraum(auth_client):
+    response = auth_client.get('/api/berichte/gewinn?von=03.01.2024', headers=auth_client.auth_headers)
+    assert response.status_code == 400
+
+    response = auth_client.get('/api/berichte/lagerumschlag?von=2024-05-01&bis=2024-01-01', headers=auth_client.auth_headers)
+    assert response.status_code == 400
+
+def test_berichte_zeitraum_ohne_fuehrende_nullen(auth_client, sample_data):
+    _verkaeufe_in_zwei_monaten(auth_client, sample_data)
+
+    # Ungepolsterte Grenzen werden normalisiert, bevor SQLite sie als Text vergleicht
+    response = auth_client.get('/api/berichte/gewinn?von=2024-1-16&bis=2024-3-31', headers=auth_client.auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['gesamtumsatz'] == 400.00
+
+    response = auth_client.get('/api/berichte/gewinn?bis=2024-1-5', headers=auth_client.auth_headers)
+    assert response.get_json()['gesamtumsatz'] == 0
+
+    response = auth_client.get('/api/berichte/monatlich?von=2024-2', headers=auth_client.auth_headers)
+    assert [m['monat'] for m in response.get_json()['monate']] == ['2024-03']
@@ -136,4 +136,41 @@ def test_multiple_lagereingang_same_artikel(auth_client, sample_data):
     # Detailbestand prüfen
     response = auth_client.get(f'/api/lager/bestand/{sample_data["artikelnummer"]}', headers=auth_client.auth_headers)
     bestaende = response.get_json()
-    assert len(bestaende) == 3
\ No newline at end of file
+    assert len(bestaende) == 3
+
+def test_batch_verfuegbarkeit(auth_client, sample_data):
+    headers = auth_client.auth_headers
+    auth_client.post('/api/artikel', json={'artikelnummer': 'TEST-002', 'bezeichnung': 'Test Tisch',
+                                           'lieferant_id': sample_data['lieferant_id']}, headers=headers)
+    for menge, preis, datum in [(3, 10.0, '2024-01-01'), (5, 20.0, '2024-02-01')]:
+        auth_client.post('/api/lager/eingang', json={'artikelnummer': 'TEST-001', 'menge': menge,
+                                                     'einkaufspreis': preis, 'einlagerungsdatum': datum}, headers=headers)
+    auth_client.post('/api/reservierungen', json={'projekt_id': sample_data['projekt_id'],
+                                                  'artikelnummer': 'TEST-001', 'menge': 2}, headers=headers)
+    
+    response = auth_client.post('/api/lager/verfuegbarkeit', json={'positionen': [
+        {'artikelnummer': 'TEST-001', 'menge': 4},
+        {'artikelnummer': 'TEST-002', 'menge': 1},
+        {'artikelnummer': 'GIBT-ES-NICHT', 'menge': 1},
+        {'artikelnummer': 'TEST-001', 'menge': 3},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    
+    assert [p['artikelnummer'] for p in data['positionen']] == ['TEST-001', 'TEST-002', 'GIBT-ES-NICHT']
+    erster, zweiter, unbekannt = data['positionen']
+    # 7 angefragt, 8 im Bestand, 2 reserviert: 6 lieferbar zu 3 * 10 + 3 * 20
+    assert erster == {'artikelnummer': 'TEST-001', 'gefunden': True, 'menge': 7, 'bestand': 8, 'reserviert': 2,
+                      'verfuegbar': 6, 'fehlmenge': 1, 'wareneinsatz': 90.0}
+    assert (zweiter['gefunden'], zweiter['fehlmenge'], zweiter['wareneinsatz']) == (True, 1, 0)
+    assert (unbekannt['gefunden'], unbekannt['fehlmenge']) == (False, 1)
+    assert data['vollstaendig_lieferbar'] is False
+    assert data['wareneinsatz_gesamt'] == 90.0
+
+def test_batch_verfuegbarkeit_validation(auth_client):
+    headers = auth_client.auth_headers
+    assert auth_client.post('/api/lager/verfuegbarkeit', json={}, headers=headers).status_code == 400
+    assert auth_client.post('/api/lager/verfuegbarkeit', json={'positionen': []}, headers=headers).status_code == 400
+    response = auth_client.post('/api/lager/verfuegbarkeit', json={'positionen': [{'artikelnummer': 'X', 'menge': -1}]},
+                                headers=headers)
+    assert response.status_code == 400
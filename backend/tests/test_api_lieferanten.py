@@ -86,4 +86,29 @@ def test_create_lieferant_with_minimal_data(auth_client):
     
     response_data = response.get_json()
     assert response_data['name'] == 'Minimal Lieferant'
-    assert response_data['kontakt'] == ''
\ No newline at end of file
+    assert response_data['kontakt'] == ''
+
+def test_upsert_lieferant_by_name(auth_client):
+    headers = auth_client.auth_headers
+    response = auth_client.post('/api/lieferanten?upsert=true', json={'name': 'Sync Lieferant', 'kontakt': 'a@sync.de'},
+                                headers=headers)
+    assert response.status_code == 201
+    lieferant_id = response.get_json()['id']
+    
+    response = auth_client.post('/api/lieferanten?upsert=true', json={'name': 'Sync Lieferant', 'kontakt': 'b@sync.de'},
+                                headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == {'id': lieferant_id, 'name': 'Sync Lieferant', 'kontakt': 'b@sync.de', 'aktion': 'geaendert'}
+    response = auth_client.post('/api/lieferanten?upsert=true', json={'name': 'Sync Lieferant', 'kontakt': 'b@sync.de'},
+                                headers=headers)
+    assert response.get_json()['aktion'] == 'unveraendert'
+    
+    # Ohne upsert bleibt es beim Konflikt, ebenso beim Umbenennen auf einen vergebenen Namen
+    response = auth_client.post('/api/lieferanten', json={'name': 'Sync Lieferant'}, headers=headers)
+    assert 'existiert bereits' in response.get_json()['error']
+    anderer_id = auth_client.post('/api/lieferanten', json={'name': 'Anderer Lieferant'}, headers=headers).get_json()['id']
+    response = auth_client.put(f'/api/lieferanten/{anderer_id}', json={'name': 'Sync Lieferant'}, headers=headers)
+    assert 'existiert bereits' in response.get_json()['error']
+    
+    aenderungen = auth_client.get('/api/aenderungen', headers=headers).get_json()['aenderungen']
+    assert [a['aktion'] for a in aenderungen if a['schluessel'] == str(lieferant_id)] == ['angelegt', 'geaendert']
@@ -226,4 +226,48 @@ def test_multiple_artikel_under_mindestmenge(auth_client, sample_data):
     assert multi1['nachbestellmenge'] == 3  # 6 - 3
     
     assert multi2 is not None 
-    assert multi2['nachbestellmenge'] == 2  # 4 - 2
\ No newline at end of file
+    assert multi2['nachbestellmenge'] == 2  # 4 - 2
+
+def _im_bericht(auth_client, artikelnummer):
+    response = auth_client.get('/api/berichte/mindestmenge', headers=auth_client.auth_headers)
+    return any(a['artikelnummer'] == artikelnummer for a in response.get_json())
+
+def test_update_mindestmenge_changes_report(auth_client, sample_data):
+    """Changing the minimum quantity re-evaluates the low-stock flag of that article"""
+    auth_client.post('/api/lager/eingang', json={
+        'artikelnummer': sample_data['artikelnummer'],
+        'menge': 5,
+        'einkaufspreis': 10.00
+    }, headers=auth_client.auth_headers)
+    assert not _im_bericht(auth_client, sample_data['artikelnummer'])
+    
+    response = auth_client.put(f"/api/artikel/{sample_data['artikelnummer']}/mindestmenge",
+                               json={'mindestmenge': 6}, headers=auth_client.auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['mindestmenge'] == 6
+    assert _im_bericht(auth_client, sample_data['artikelnummer'])
+    
+    auth_client.put(f"/api/artikel/{sample_data['artikelnummer']}/mindestmenge",
+                    json={'mindestmenge': 5}, headers=auth_client.auth_headers)
+    assert not _im_bericht(auth_client, sample_data['artikelnummer'])
+
+def test_new_artikel_without_stock_in_report(auth_client, sample_data):
+    """An article that never had stock is below its minimum quantity"""
+    assert _im_bericht(auth_client, sample_data['artikelnummer'])
+    
+    auth_client.put(f"/api/artikel/{sample_data['artikelnummer']}/mindestmenge",
+                    json={'mindestmenge': 0}, headers=auth_client.auth_headers)
+    assert not _im_bericht(auth_client, sample_data['artikelnummer'])
+
+def test_update_mindestmenge_errors(auth_client, sample_data):
+    response = auth_client.put('/api/artikel/GIBT-ES-NICHT/mindestmenge',
+                               json={'mindestmenge': 3}, headers=auth_client.auth_headers)
+    assert response.status_code == 404
+    
+    response = auth_client.put(f"/api/artikel/{sample_data['artikelnummer']}/mindestmenge",
+                               json={'mindestmenge': -1}, headers=auth_client.auth_headers)
+    assert response.status_code == 400
+    
+    response = auth_client.put(f"/api/artikel/{sample_data['artikelnummer']}/mindestmenge",
+                               json={}, headers=auth_client.auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,101 @@
+import pytest
+
+@pytest.fixture
+def zwei_projekte(auth_client, sample_data):
+    headers = auth_client.auth_headers
+    auth_client.post('/api/lager/eingang', json={
+        'artikelnummer': sample_data['artikelnummer'], 'menge': 10, 'einkaufspreis': 50.00,
+        'einlagerungsdatum': '2024-01-01'
+    }, headers=headers)
+    response = auth_client.post('/api/projekte', json={'projektname': 'Zweites Projekt', 'kunde_id': sample_data['kunde_id']},
+                                headers=headers)
+    return dict(sample_data, projekt2_id=response.get_json()['id'])
+
+def _reservieren(auth_client, projekt_id, menge, **extra):
+    return auth_client.post('/api/reservierungen', json={
+        'projekt_id': projekt_id, 'artikelnummer': 'TEST-001', 'menge': menge, **extra
+    }, headers=auth_client.auth_headers)
+
+def _verfuegbarkeit(auth_client):
+    return auth_client.get('/api/artikel/TEST-001/verfuegbarkeit', headers=auth_client.auth_headers).get_json()
+
+def _verkaufen(auth_client, projekt_id, menge):
+    return auth_client.post('/api/verkauf', json={
+        'projekt_id': projekt_id, 'artikelnummer': 'TEST-001', 'verkaufte_menge': menge, 'verkaufspreis': 80.00
+    }, headers=auth_client.auth_headers)
+
+def test_reservation_reduces_availability(auth_client, zwei_projekte):
+    response = _reservieren(auth_client, zwei_projekte['projekt_id'], 6, gueltig_bis='2999-12-31')
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['status'] == 'offen'
+    assert data['gueltig_bis'] == '2999-12-31T23:59:59'
+
+    assert _verfuegbarkeit(auth_client) == {'artikelnummer': 'TEST-001', 'bestand': 10, 'reserviert': 6, 'verfuegbar': 4}
+
+    # Mehr als verfügbar lässt sich nicht reservieren
+    assert _reservieren(auth_client, zwei_projekte['projekt2_id'], 5).status_code == 500
+
+    response = auth_client.get(f"/api/reservierungen?projekt_id={zwei_projekte['projekt_id']}", headers=auth_client.auth_headers)
+    assert [r['menge'] for r in response.get_json()] == [6]
+
+def test_reserved_stock_only_sold_to_own_project(auth_client, zwei_projekte):
+    _reservieren(auth_client, zwei_projekte['projekt_id'], 6)
+
+    assert _verkaufen(auth_client, zwei_projekte['projekt2_id'], 5).status_code == 500
+    assert _verkaufen(auth_client, zwei_projekte['projekt2_id'], 4).status_code == 201
+
+    # Das reservierende Projekt löst seine Reservierung ein
+    assert _verkaufen(auth_client, zwei_projekte['projekt_id'], 6).status_code == 201
+    assert _verfuegbarkeit(auth_client) == {'artikelnummer': 'TEST-001', 'bestand': 0, 'reserviert': 0, 'verfuegbar': 0}
+    response = auth_client.get('/api/reservierungen', headers=auth_client.auth_headers)
+    assert response.get_json() == []
+
+def test_cancel_reservation(auth_client, zwei_projekte):
+    reservierung_id = _reservieren(auth_client, zwei_projekte['projekt_id'], 3).get_json()['id']
+
+    response = auth_client.delete(f'/api/reservierungen/{reservierung_id}', headers=auth_client.auth_headers)
+    assert response.status_code == 200
+    assert _verfuegbarkeit(auth_client)['verfuegbar'] == 10
+
+    response = auth_client.delete(f'/api/reservierungen/{reservierung_id}', headers=auth_client.auth_headers)
+    assert response.status_code == 404
+
+def test_reservation_validation(auth_client, zwei_projekte):
+    assert _reservieren(auth_client, zwei_projekte['projekt_id'], 0).status_code == 400
+    assert _reservieren(auth_client, zwei_projekte['projekt_id'], 1, gueltig_bis='2000-01-01').status_code == 400
+    assert _reservieren(auth_client, zwei_projekte['projekt_id'], 1, gueltig_bis='morgen').status_code == 400
+    assert _reservieren(auth_client, 999, 1).status_code == 404
+
+def test_expired_reservations_are_released(auth_client, zwei_projekte):
+    import api.reservierungen
+    inventory = api.reservierungen.inventory
+    _reservieren(auth_client, zwei_projekte['projekt_id'], 4)
+    inventory.db.execute_query("UPDATE reservierungen SET gueltig_bis = '2000-01-01T00:00:00'")
+
+    assert inventory.abgelaufene_reservierungen_freigeben(batch_groesse=1) == 1
+    assert _verfuegbarkeit(auth_client)['verfuegbar'] == 10
+    assert inventory.reservierung_finden(1).status == 'abgelaufen'
+    assert inventory.abgelaufene_reservierungen_freigeben() == 0
+
+@pytest.mark.parametrize('menge', [0, -2, True, 1.5, '3'])
+def test_invalid_quantities_are_rejected(auth_client, zwei_projekte, menge):
+    headers = auth_client.auth_headers
+    assert _reservieren(auth_client, zwei_projekte['projekt_id'], menge).status_code == 400
+    assert _verkaufen(auth_client, zwei_projekte['projekt_id'], menge).status_code == 400
+    response = auth_client.post('/api/lager/eingang', json={
+        'artikelnummer': 'TEST-001', 'menge': menge, 'einkaufspreis': 50.00
+    }, headers=headers)
+    assert response.status_code == 400
+    assert _verfuegbarkeit(auth_client) == {'artikelnummer': 'TEST-001', 'bestand': 10, 'reserviert': 0, 'verfuegbar': 10}
+
+@pytest.mark.parametrize('gueltig_bis', ['2099-01-01T00:00:00Z', '2099-01-01T00:00:00+02:00'])
+def test_reservation_with_timezone_is_stored_as_local_time(auth_client, zwei_projekte, gueltig_bis):
+    from datetime import datetime
+    response = _reservieren(auth_client, zwei_projekte['projekt_id'], 2, gueltig_bis=gueltig_bis)
+    assert response.status_code == 201
+    erwartet = datetime.fromisoformat(gueltig_bis).astimezone().replace(tzinfo=None)
+    assert response.get_json()['gueltig_bis'] == erwartet.isoformat(timespec='seconds')
+
+    vergangen = gueltig_bis.replace('2099', '2000')
+    assert _reservieren(auth_client, zwei_projekte['projekt_id'], 1, gueltig_bis=vergangen).status_code == 400
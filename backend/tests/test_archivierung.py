@@ -0,0 +1,59 @@
+import pytest
+from database import Database
+from inventory_manager import InventoryManager
+from reports import ReportGenerator
+from manage import main
+
+@pytest.fixture
+def inventory(test_db):
+    inventory = InventoryManager(test_db)
+    lieferant_id = inventory.lieferant_hinzufuegen('Archiv GmbH')
+    inventory.artikel_hinzufuegen('ARC-1', 'Regal', lieferant_id)
+    projekt_id = inventory.projekt_hinzufuegen('Projekt', inventory.kunde_hinzufuegen('Kunde'))
+    inventory.lagereingang('ARC-1', 2, 10.0, '2020-01-01')
+    inventory.lagereingang('ARC-1', 3, 20.0, '2020-02-01')
+    inventory.lagereingang('ARC-1', 5, 30.0, '2020-03-01')
+    inventory.verkauf(projekt_id, 'ARC-1', 5, 50.0, '2020-04-01')  # leert die ersten beiden Chargen
+    return inventory
+
+def _anzahl(db, tabelle):
+    return db.execute_query(f"SELECT COUNT(*) FROM {tabelle}")[0][0]
+
+def test_archiviert_nur_leere_chargen_in_batches(inventory):
+    assert inventory.chargen_archivieren(aufbewahrung_tage=30, batch_groesse=1) == 2
+
+    assert _anzahl(inventory.db, 'lagerbestand') == 1
+    assert _anzahl(inventory.db, 'lagerbestand_archiv') == 2
+    assert [b.verfuegbare_menge for b in inventory.lagerbestand_artikel('ARC-1')] == [5]
+
+    # include_zero liest aktive und archivierte Chargen in FIFO-Reihenfolge
+    chargen = inventory.lagerbestand_artikel('ARC-1', include_zero=True)
+    assert [(c.einlagerungsdatum, c.verfuegbare_menge) for c in chargen] == \
+        [('2020-01-01', 0), ('2020-02-01', 0), ('2020-03-01', 5)]
+
+def test_aufbewahrungsfrist_wird_beachtet(inventory):
+    assert inventory.chargen_archivieren(aufbewahrung_tage=365 * 100) == 0
+    assert _anzahl(inventory.db, 'lagerbestand') == 3
+
+def test_gewinn_analyse_unveraendert_nach_archivierung(inventory):
+    reports = ReportGenerator(inventory.db)
+    vorher = reports.gewinn_analyse()
+
+    main(['--db', inventory.db.db_path, 'chargen-archivieren', '--tage', '30'])
+    inventory.db.close_connections()
+
+    assert _anzahl(inventory.db, 'lagerbestand_archiv') == 2
+    assert reports.gewinn_analyse() == vorher
+
+def test_wartungsbefehle_oeffnen_nur_die_angegebene_datenbank(inventory, monkeypatch):
+    geoeffnet = []
+    original = Database.__init__
+
+    def init(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        geoeffnet.append(self.db_path)
+
+    monkeypatch.setattr(Database, '__init__', init)
+    for befehl in ('chargen-archivieren', 'bestand-neu-aufbauen', 'rollup-neu-aufbauen'):
+        assert main(['--db', inventory.db.db_path, befehl]) == 0
+    assert set(geoeffnet) == {inventory.db.db_path}
@@ -0,0 +1,76 @@
+import asyncio
+import json
+from asgi import WsgiToAsgi
+from app import app
+
+def _request(asgi_app, method, path, body=b'', headers=(), query=b''):
+    nachrichten = []
+    eingang = [{'type': 'http.request', 'body': body[:5], 'more_body': True},
+               {'type': 'http.request', 'body': body[5:], 'more_body': False}]
+
+    async def receive():
+        return eingang.pop(0)
+
+    async def send(message):
+        nachrichten.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query,
+             'headers': [(k.encode(), v.encode()) for k, v in headers],
+             'client': ('10.1.2.3', 5555), 'server': ('testserver', 80)}
+    asyncio.run(asgi_app(scope, receive, send))
+    start = nachrichten[0]
+    inhalt = b''.join(m.get('body', b'') for m in nachrichten[1:])
+    assert nachrichten[-1]['more_body'] is False
+    return start['status'], dict(start['headers']), inhalt
+
+def test_asgi_adapter_serves_flask_app():
+    adapter = WsgiToAsgi(app, max_threads=2)
+    try:
+        status, headers, inhalt = _request(adapter, 'GET', '/api/status')
+        assert status == 200
+        assert headers[b'content-type'] == b'application/json'
+        assert json.loads(inhalt)['status'] == 'ok'
+    finally:
+        adapter.shutdown()
+
+def test_asgi_adapter_passes_body_headers_and_client(client):
+    adapter = WsgiToAsgi(app, max_threads=2)
+    try:
+        body = json.dumps({'username': 'asgi_user', 'password': 'password123'}).encode()
+        status, _, inhalt = _request(adapter, 'POST', '/api/auth/register', body,
+                                     headers=[('Content-Type', 'application/json')])
+        assert status == 201
+        assert json.loads(inhalt)['user']['username'] == 'asgi_user'
+
+        status, _, _ = _request(adapter, 'GET', '/api/lager/bestand')
+        assert status == 401
+    finally:
+        adapter.shutdown()
+
+def test_asgi_lifespan():
+    adapter = WsgiToAsgi(app, max_threads=1)
+    eingang = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    gesendet = []
+
+    async def receive():
+        return eingang.pop(0)
+
+    async def send(message):
+        gesendet.append(message['type'])
+
+    asyncio.run(adapter({'type': 'lifespan'}, receive, send))
+    assert gesendet == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+
+def test_sse_limit_stays_below_executor_threads():
+    from asgi import _sse_begrenzen
+
+    class Konfiguration:
+        ASGI_DB_THREADS = 8
+        SSE_MAX_CLIENTS = 16
+
+    _sse_begrenzen(Konfiguration)
+    assert Konfiguration.SSE_MAX_CLIENTS == 4
+
+    Konfiguration.SSE_MAX_CLIENTS = 2
+    _sse_begrenzen(Konfiguration)
+    assert Konfiguration.SSE_MAX_CLIENTS == 2
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import threading
+import pytest
+from statements import STATEMENTS, sql
+
+def test_connection_reused_within_thread(test_db):
+    assert test_db.get_connection() is test_db.get_connection()
+
+def test_connection_per_thread(test_db):
+    main_conn = test_db.get_connection()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(test_db.get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not main_conn
+
+def test_path_change_opens_new_connection(test_db):
+    conn = test_db.get_connection()
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    try:
+        test_db.db_path = db_path
+        test_db.init_database()
+        assert test_db.get_connection() is not conn
+        assert test_db.execute_query("SELECT COUNT(*) FROM artikel") == [(0,)]
+    finally:
+        test_db.close_connections()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+def test_statement_cache_holds_all_registered_statements(test_db):
+    assert test_db.statement_cache_size >= len(STATEMENTS)
+
+def test_all_registered_statements_are_valid(test_db):
+    conn = test_db.get_connection()
+    for name, statement in STATEMENTS.items():
+        # EXPLAIN parst das Statement, ohne es auszuführen
+        conn.execute(f"EXPLAIN {statement}", (None,) * statement.count('?'))
+
+def test_unknown_statement_raises():
+    with pytest.raises(KeyError):
+        sql('gibt.es.nicht')
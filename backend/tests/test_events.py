@@ -0,0 +1,129 @@
+import threading
+import pytest
+import config
+from exceptions import KapazitaetError
+from events import EventBroker, event_broker
+
+def test_broker_resumes_from_last_event_id():
+    broker = EventBroker(puffer_groesse=3, queue_groesse=10)
+    ids = [broker.veroeffentlichen('bestand', {'n': n}) for n in range(4)]
+
+    abo = broker.abonnieren(ids[1])
+    assert [abo.naechstes(0).daten['n'] for _ in range(2)] == [2, 3]
+    assert abo.naechstes(0) is None
+
+    broker.veroeffentlichen('bestand', {'n': 4})
+    assert abo.naechstes(0).id == f"{broker.kennung}-5"
+    abo.abbestellen()
+    assert len(broker) == 0
+
+@pytest.mark.parametrize('letzte_id', ['unbekannt-1', 'x-y'])
+def test_broker_resets_unknown_or_expired_position(letzte_id):
+    broker = EventBroker(puffer_groesse=2, queue_groesse=10)
+    for n in range(5):
+        broker.veroeffentlichen('bestand', {'n': n})
+
+    for position in (letzte_id, f"{broker.kennung}-1"):
+        ereignis = broker.abonnieren(position).naechstes(0)
+        assert ereignis.typ == 'reset' and ereignis.id == ''
+
+def test_slow_client_is_dropped_without_blocking():
+    broker = EventBroker(puffer_groesse=10, queue_groesse=2)
+    langsam = broker.abonnieren()
+    schnell = broker.abonnieren()
+
+    for n in range(3):
+        broker.veroeffentlichen('bestand', {'n': n})
+        assert schnell.naechstes(0).daten['n'] == n
+
+    assert langsam.abgehaengt and len(broker) == 1
+    # Die Queue läuft noch leer, danach endet der Stream
+    assert [langsam.naechstes(1).daten['n'] for _ in range(2)] == [0, 1]
+    assert langsam.naechstes(1) is None
+
+def test_broker_limit_is_checked_atomically():
+    broker = EventBroker(puffer_groesse=10, queue_groesse=2)
+    schranke = threading.Barrier(8)
+    ergebnisse = []
+
+    def verbinden():
+        schranke.wait()
+        try:
+            ergebnisse.append(broker.abonnieren(max_abonnenten=3))
+        except KapazitaetError:
+            ergebnisse.append(None)
+
+    threads = [threading.Thread(target=verbinden) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(broker) == 3
+    assert sum(abo is not None for abo in ergebnisse) == 3
+
+def test_inventory_publishes_committed_changes(auth_client, sample_data):
+    abo = event_broker.abonnieren()
+    try:
+        headers = auth_client.auth_headers
+        auth_client.post('/api/lager/eingang', json={'artikelnummer': 'TEST-001', 'menge': 5, 'einkaufspreis': 10.0},
+                         headers=headers)
+        auth_client.post('/api/verkauf', json={'projekt_id': sample_data['projekt_id'], 'artikelnummer': 'TEST-001',
+                                               'verkaufte_menge': 5, 'verkaufspreis': 20.0}, headers=headers)
+        auth_client.post('/api/verkauf', json={'projekt_id': sample_data['projekt_id'], 'artikelnummer': 'TEST-001',
+                                               'verkaufte_menge': 1, 'verkaufspreis': 20.0}, headers=headers)
+
+        ereignisse = []
+        while (ereignis := abo.naechstes(0)) is not None:
+            ereignisse.append((ereignis.typ, ereignis.daten))
+    finally:
+        abo.abbestellen()
+
+    # Mindestmenge 1: der Eingang hebt das Kennzeichen auf, der Verkauf setzt es wieder
+    assert ereignisse == [
+        ('bestand', {'artikelnummer': 'TEST-001', 'delta': 5, 'bestand': 5}),
+        ('mindestmenge', {'artikelnummer': 'TEST-001', 'unter_mindestmenge': False, 'bestand': 5, 'mindestmenge': 1}),
+        ('bestand', {'artikelnummer': 'TEST-001', 'delta': -5, 'bestand': 0}),
+        ('mindestmenge', {'artikelnummer': 'TEST-001', 'unter_mindestmenge': True, 'bestand': 0, 'mindestmenge': 1}),
+    ]
+
+def test_stream_replays_after_last_event_id(auth_client, sample_data):
+    headers = auth_client.auth_headers
+    abo = event_broker.abonnieren()
+    auth_client.post('/api/lager/eingang', json={'artikelnummer': 'TEST-001', 'menge': 1, 'einkaufspreis': 10.0},
+                     headers=headers)
+    auth_client.post('/api/lager/eingang', json={'artikelnummer': 'TEST-001', 'menge': 2, 'einkaufspreis': 10.0},
+                     headers=headers)
+    erstes = abo.naechstes(0)
+    abo.abbestellen()
+
+    response = auth_client.get('/api/ereignisse/stream', headers={**headers, 'Last-Event-ID': erstes.id},
+                               buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks) == b"retry: 3000\n\n"
+    # Das Mindestmengen-Ereignis des ersten Eingangs, dann der zweite Eingang
+    assert b"event: mindestmenge" in next(chunks)
+    zweites = next(chunks).decode()
+    assert zweites.startswith(f"id: {event_broker.kennung}-")
+    assert 'event: bestand\ndata: {"artikelnummer": "TEST-001", "delta": 2, "bestand": 3}' in zweites
+    response.close()
+    assert len(event_broker) == 0
+
+def test_stream_accepts_token_in_query_string(auth_client):
+    token = auth_client.auth_headers['Authorization'].split()[1]
+    response = auth_client.get(f'/api/ereignisse/stream?jwt={token}', buffered=False)
+    assert response.status_code == 200
+    assert next(iter(response.response)) == b"retry: 3000\n\n"
+    response.close()
+
+    # Nur der Stream nimmt das Token aus der URL an
+    assert auth_client.get(f'/api/artikel?jwt={token}').status_code == 401
+    assert auth_client.get('/api/ereignisse/stream').status_code == 401
+
+def test_stream_rejects_when_full(auth_client, monkeypatch):
+    monkeypatch.setattr(config.TestConfig, 'SSE_MAX_CLIENTS', 0)
+    response = auth_client.get('/api/ereignisse/stream', headers=auth_client.auth_headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
@@ -0,0 +1,55 @@
+import pytest
+from inventory_manager import InventoryManager, fifo_konflikte
+from statements import sql
+
+@pytest.fixture(params=[False, True], ids=['sql', 'index'])
+def inventory(test_db, request):
+    inventory = InventoryManager(test_db)
+    inventory.fifo_index_aktiv = request.param
+    lieferant_id = inventory.lieferant_hinzufuegen('FIFO GmbH')
+    inventory.artikel_hinzufuegen('F-1', 'Sofa', lieferant_id)
+    inventory.projekt_hinzufuegen('Projekt', inventory.kunde_hinzufuegen('Kunde'))
+    inventory.lagereingang('F-1', 3, 100.0, '2024-01-01')
+    inventory.lagereingang('F-1', 5, 120.0, '2024-02-01')
+    return inventory
+
+def _gleichzeitiger_verkauf(inventory, menge):
+    """Liefert beim ersten Planen einen veralteten Stand; dazwischen verkauft jemand anders"""
+    index = inventory.chargen_index
+    ziel, name = (index, 'planen') if index is not None else (inventory, 'lagerbestand_artikel')
+    original = getattr(ziel, name)
+    aufrufe = []
+
+    def lesen(*args):
+        stand = original(*args)
+        if not aufrufe:
+            inventory.db.execute_query("UPDATE lagerbestand SET verfuegbare_menge = verfuegbare_menge - ? WHERE id = 1", (menge,))
+        aufrufe.append(1)
+        return stand
+
+    setattr(ziel, name, lesen)
+    return aufrufe
+
+def test_guarded_update_replans_after_concurrent_change(inventory):
+    konflikte = fifo_konflikte.value()
+    aufrufe = _gleichzeitiger_verkauf(inventory, 2)
+
+    assert inventory.verkauf(1, 'F-1', 3, 200.0, '2024-03-01')
+
+    assert len(aufrufe) == 2
+    assert fifo_konflikte.value() == konflikte + 1
+    assert [(b.id, b.verfuegbare_menge) for b in InventoryManager.lagerbestand_artikel(inventory, 'F-1')] == [(2, 3)]
+    # Wareneinsatz aus dem zweiten Plan: 1 * 100 + 2 * 120
+    assert inventory.db.execute_query("SELECT wareneinsatz FROM verkaeufe") == [(340.0,)]
+
+def test_guarded_update_rejects_when_stock_gone(inventory):
+    _gleichzeitiger_verkauf(inventory, 3)
+
+    assert inventory.verkauf(1, 'F-1', 6, 200.0, '2024-03-01') is False
+    assert inventory.db.execute_query("SELECT SUM(verfuegbare_menge) FROM lagerbestand") == [(5,)]
+    assert inventory.db.execute_query("SELECT COUNT(*) FROM verkaeufe") == [(0,)]
+
+def test_guarded_update_never_goes_negative(inventory):
+    with inventory.db.transaction() as conn:
+        assert inventory.db.execute_in(conn, sql('lager.entnehmen'), (4, 1, 4)).rowcount == 0
+    assert inventory.db.execute_query("SELECT verfuegbare_menge FROM lagerbestand WHERE id = 1") == [(3,)]
@@ -0,0 +1,103 @@
+import pytest
+from database import Database
+from chargenindex import ChargenIndex
+from inventory_manager import InventoryManager
+from models import Lagerbestand
+
+def _charge(id, menge, datum, preis=10.0):
+    return Lagerbestand(id, 'X-1', menge, preis, datum)
+
+def test_index_keeps_fifo_order_and_running_total():
+    geladen = []
+    index = ChargenIndex(lambda artikelnummer: geladen.append(artikelnummer) or [_charge(1, 3, '2024-01-01'), _charge(2, 5, '2024-03-01')])
+
+    assert index.menge('X-1') == 8
+    index.eingelagert(_charge(3, 4, '2024-02-01'))  # nachträglich erfasst, älter als Charge 2
+    plan = index.planen('X-1', 6)
+
+    assert [(c.id, menge) for c, menge in plan] == [(1, 3), (3, 3)]
+    assert index.planen('X-1', 13) is None
+    assert geladen == ['X-1']
+
+    index.entnommen('X-1', plan)
+    assert index.menge('X-1') == 6
+    assert [(c.id, menge) for c, menge in index.planen('X-1', 6)] == [(3, 1), (2, 5)]
+    assert geladen == ['X-1']
+
+def test_index_drops_article_on_mismatching_withdrawal():
+    index = ChargenIndex(lambda artikelnummer: [_charge(1, 3, '2024-01-01')])
+    index.menge('X-1')
+
+    index.entnommen('X-1', [(_charge(1, 3, '2024-01-01'), 4)])
+
+    assert len(index) == 0
+
+def test_load_during_write_is_not_kept():
+    index = ChargenIndex(lambda artikelnummer: [_charge(1, 3, '2024-01-01')])
+
+    with index.schreiben('X-1'):
+        assert index.menge('X-1') == 3
+    assert len(index) == 0
+
+    index.menge('X-1')
+    assert len(index) == 1
+
+@pytest.fixture
+def inventory(test_db):
+    inventory = InventoryManager(test_db)
+    inventory.fifo_index_aktiv = True
+    lieferant_id = inventory.lieferant_hinzufuegen('FIFO GmbH')
+    inventory.artikel_hinzufuegen('F-1', 'Sofa', lieferant_id)
+    inventory.projekt_hinzufuegen('Projekt', inventory.kunde_hinzufuegen('Kunde'))
+    inventory.lagereingang('F-1', 3, 100.0, '2024-01-01')
+    inventory.lagereingang('F-1', 5, 120.0, '2024-02-01')
+    return inventory
+
+def _db_chargen(inventory):
+    return [(b.id, b.verfuegbare_menge) for b in inventory.lagerbestand_artikel('F-1')]
+
+def test_sales_plan_from_index_without_reading_lots(inventory, monkeypatch):
+    assert inventory.verkauf(1, 'F-1', 1, 200.0, '2024-03-01')
+    inventory.lagereingang('F-1', 2, 90.0, '2023-12-01')
+
+    monkeypatch.setattr(inventory, 'lagerbestand_artikel', lambda *args: pytest.fail("Chargen wurden gelesen"))
+    assert inventory.verkauf(1, 'F-1', 5, 200.0, '2024-03-02')
+    assert inventory.chargen_index.menge('F-1') == 4
+    assert inventory.verkauf(1, 'F-1', 5, 200.0, '2024-03-03') is False
+    monkeypatch.undo()
+
+    assert _db_chargen(inventory) == [(2, 4)]
+    # 2 * 90 aus dem nachträglichen Eingang, dann 2 * 100 und 1 * 120
+    assert inventory.db.execute_query("SELECT wareneinsatz FROM verkaeufe ORDER BY id") == [(100.0,), (500.0,)]
+
+def test_external_change_is_detected_and_reloaded(inventory):
+    assert inventory.chargen_index.menge('F-1') == 8
+    inventory.db.execute_query("UPDATE lagerbestand SET verfuegbare_menge = 1 WHERE id = 1")
+
+    assert inventory.verkauf(1, 'F-1', 3, 200.0, '2024-03-01')
+
+    assert _db_chargen(inventory) == [(2, 3)]
+    assert inventory.chargen_index.menge('F-1') == 3
+
+def test_stale_index_is_reloaded_before_rejecting(inventory):
+    assert inventory.chargen_index.menge('F-1') == 8
+    # Eingang eines anderen Prozesses, den der Index nicht mitbekommt
+    andere = InventoryManager(inventory.db)
+    andere.fifo_index_aktiv = False
+    andere.lagereingang('F-1', 4, 130.0, '2024-03-01')
+
+    assert inventory.verkauf(1, 'F-1', 10, 200.0, '2024-03-02')
+    assert _db_chargen(inventory) == [(3, 2)]
+    assert inventory.chargen_index.menge('F-1') == 2
+
+def test_index_is_shared_and_reset_with_database(inventory, test_db):
+    andere = InventoryManager(test_db)
+    andere.fifo_index_aktiv = True
+    assert andere.chargen_index is inventory.chargen_index
+
+    inventory.chargen_index.menge('F-1')
+    Database(test_db.db_path)
+    assert len(inventory.chargen_index) > 0
+
+    test_db.zuruecksetzen()
+    assert len(inventory.chargen_index) == 0
@@ -0,0 +1,117 @@
+import json
+import pytest
+from inventory_manager import InventoryManager
+from database import Database
+from katalog import zeilen_lesen
+from manage import main
+from events import event_broker
+
+KATALOG = (
+    "Artikelnummer;Bezeichnung;Lieferant;Mindestmenge;Lieferant_Kontakt\n"
+    "TEST-001;Test Stuhl gepolstert;Test Möbel GmbH;;\n"
+    "HW-001;Eichentisch;Holzwerk AG;2;info@holzwerk.de\n"
+    "HW-002;Eichenbank;Holzwerk AG;x;\n"
+    ";Ohne Nummer;Holzwerk AG;;\n"
+    "HW-003;Eichenregal;Holzwerk AG;;\n"
+)
+
+def _import(auth_client, body, content_type='text/csv', **params):
+    response = auth_client.post('/api/artikel/import', data=body.encode('utf-8'), content_type=content_type,
+                                query_string=params, headers=auth_client.auth_headers)
+    return response.status_code, response.get_json()
+
+def test_csv_import_creates_updates_and_rejects(auth_client, sample_data):
+    status, bericht = _import(auth_client, KATALOG)
+
+    assert status == 200
+    assert (bericht['angelegt'], bericht['aktualisiert'], bericht['abgelehnt']) == (2, 1, 2)
+    assert bericht['lieferanten_angelegt'] == 1 and bericht['letzte_zeile'] == 5
+    assert [(f['zeile'], f['artikelnummer']) for f in bericht['fehler']] == [(3, 'HW-002'), (4, '')]
+
+    headers = auth_client.auth_headers
+    artikel = auth_client.get('/api/artikel/TEST-001', headers=headers).get_json()
+    assert artikel['bezeichnung'] == 'Test Stuhl gepolstert' and artikel['mindestmenge'] == 1
+    lieferanten = {l['name']: l for l in auth_client.get('/api/lieferanten', headers=headers).get_json()}
+    assert lieferanten['Holzwerk AG']['kontakt'] == 'info@holzwerk.de'
+    assert auth_client.get('/api/artikel/HW-001', headers=headers).get_json()['mindestmenge'] == 2
+    # Suche und Autovervollständigung kennen die neuen Artikel
+    assert auth_client.get('/api/artikel/autocomplete?q=hw', headers=headers).get_json() == ['HW-001', 'HW-003']
+    suche = auth_client.get('/api/artikel/suche?q=eichen', headers=headers).get_json()
+    assert sorted(a['artikelnummer'] for a in suche) == ['HW-001', 'HW-003']
+
+    aenderungen = auth_client.get('/api/aenderungen', headers=headers).get_json()['aenderungen']
+    assert [(a['entitaet'], a['schluessel'], a['aktion']) for a in aenderungen[4:]] == [
+        ('lieferant', str(lieferanten['Holzwerk AG']['id']), 'angelegt'),
+        ('artikel', 'HW-001', 'angelegt'), ('artikel', 'HW-003', 'angelegt'), ('artikel', 'TEST-001', 'geaendert')
+    ]
+
+    # Derselbe Katalog noch einmal ändert nichts
+    status, bericht = _import(auth_client, KATALOG)
+    assert (bericht['angelegt'], bericht['aktualisiert'], bericht['unveraendert']) == (0, 0, 3)
+
+def test_json_import_without_creating_suppliers(auth_client, sample_data):
+    body = json.dumps({'artikel': [
+        {'artikelnummer': 'NEU-1', 'bezeichnung': 'Sessel', 'lieferant': 'Test Möbel GmbH', 'mindestmenge': 3},
+        {'artikelnummer': 'NEU-2', 'bezeichnung': 'Sofa', 'lieferant': 'Unbekannt'},
+        'keine Zeile'
+    ]})
+    status, bericht = _import(auth_client, body, 'application/json', lieferanten_anlegen='false')
+
+    assert status == 200
+    assert (bericht['angelegt'], bericht['abgelehnt'], bericht['lieferanten_angelegt']) == (1, 2, 0)
+    assert bericht['fehler'][0] == {'zeile': 2, 'artikelnummer': 'NEU-2', 'fehler': "Lieferant 'Unbekannt' nicht gefunden"}
+
+    status, bericht = _import(auth_client, '[1, 2', 'application/json')
+    assert status == 400
+    status, bericht = _import(auth_client, KATALOG, 'application/xml')
+    assert status == 400
+
+def test_jsonl_reader_keeps_line_numbers():
+    import io
+    datei = io.StringIO('{"artikelnummer": "A"}\n\nkein json\n{"artikelnummer": "B"}\n')
+
+    assert list(zeilen_lesen(datei, 'jsonl')) == [(1, {'artikelnummer': 'A'}), (2, 'kein json'), (3, {'artikelnummer': 'B'})]
+
+def test_cli_import_resumes_after_last_committed_chunk(test_db, tmp_path):
+    katalog = tmp_path / 'katalog.jsonl'
+    katalog.write_text('\n'.join(json.dumps({'artikelnummer': f'K-{i:03d}', 'bezeichnung': f'Artikel {i}',
+                                             'lieferant': 'Katalog KG'}) for i in range(1, 11)))
+    fortschritt = tmp_path / 'katalog.pos'
+    fortschritt.write_text('4')
+
+    assert main(['--db', test_db.db_path, 'katalog-importieren', str(katalog),
+                 '--fortschritt', str(fortschritt), '--chunk', '3']) == 0
+
+    inventory = InventoryManager(Database(test_db.db_path))
+    assert [a[0] for a in inventory.artikel_auflisten()] == [f'K-{i:03d}' for i in range(5, 11)]
+    assert fortschritt.read_text() == '10'
+
+def test_import_validates_arguments(test_db):
+    inventory = InventoryManager(test_db)
+    from exceptions import ValidationError
+    with pytest.raises(ValidationError):
+        inventory.katalog_importieren([], ab_zeile=-1)
+    with pytest.raises(ValidationError):
+        inventory.katalog_importieren([], chunk_groesse=0)
+
+def test_import_reports_minimum_stock_change(test_db):
+    inventory = InventoryManager(test_db)
+    lieferant_id = inventory.lieferant_hinzufuegen('Katalog KG')
+    inventory.artikel_hinzufuegen('K-001', 'Regal', lieferant_id)
+    inventory.artikel_hinzufuegen('K-002', 'Tisch', lieferant_id)
+    inventory.lagereingang('K-001', 5, 10.0, '2024-01-01')
+    inventory.lagereingang('K-002', 50, 10.0, '2024-01-01')
+
+    abo = event_broker.abonnieren()
+    try:
+        inventory.katalog_importieren([
+            (1, {'artikelnummer': 'K-001', 'bezeichnung': 'Regal', 'lieferant': 'Katalog KG', 'mindestmenge': 10}),
+            (2, {'artikelnummer': 'K-002', 'bezeichnung': 'Tisch', 'lieferant': 'Katalog KG', 'mindestmenge': 10}),
+        ])
+        ereignis = abo.naechstes(0)
+        assert ereignis.typ == 'mindestmenge'
+        assert ereignis.daten == {'artikelnummer': 'K-001', 'unter_mindestmenge': True, 'bestand': 5, 'mindestmenge': 10}
+        assert abo.naechstes(0) is None
+    finally:
+        abo.abbestellen()
+    assert [a[0] for a in inventory.artikel_unter_mindestmenge()] == ['K-001']
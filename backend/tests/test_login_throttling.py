@@ -0,0 +1,57 @@
+import json
+import pytest
+from unittest.mock import patch
+from ratelimit import TokenBucketLimiter
+from exceptions import RateLimitError
+
+def test_token_bucket_allows_burst_then_refills():
+    limiter = TokenBucketLimiter(rate=1.0, burst=2)
+    with patch('ratelimit.time.monotonic', return_value=100.0):
+        assert limiter.versuchen('a') == 0
+        assert limiter.versuchen('a') == 0
+        assert limiter.versuchen('a') == pytest.approx(1.0)
+        assert limiter.versuchen('b') == 0  # eigener Eimer
+    with patch('ratelimit.time.monotonic', return_value=101.0):
+        assert limiter.versuchen('a') == 0
+
+def test_token_bucket_is_bounded():
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, maxsize=3)
+    for key in range(10):
+        limiter.versuchen(key)
+    assert len(limiter) == 3
+
+def _login(client, username, password='falsch123'):
+    return client.post('/api/auth/login', data=json.dumps({'username': username, 'password': password}),
+                       content_type='application/json')
+
+def test_login_throttled_per_username_before_bcrypt(client):
+    client.post('/api/auth/register', data=json.dumps({'username': 'opfer', 'password': 'password123'}),
+                content_type='application/json')
+    import api.auth
+    burst = api.auth.auth_service.login_limit_user.burst
+
+    for _ in range(burst):
+        assert _login(client, 'opfer').status_code == 401
+
+    with patch('models.bcrypt.checkpw') as checkpw:
+        response = _login(client, 'OPFER', 'password123')
+    assert response.status_code == 429
+    assert response.get_json()['type'] == 'rate_limit_error'
+    assert int(response.headers['Retry-After']) >= 1
+    checkpw.assert_not_called()
+
+    # Andere Usernames sind nicht betroffen
+    assert _login(client, 'jemand').status_code == 401
+
+def test_login_throttled_per_ip(client):
+    import api.auth
+    service = api.auth.auth_service
+    service.login_limit_ip = TokenBucketLimiter(rate=0.01, burst=2)
+
+    assert _login(client, 'a').status_code == 401
+    assert _login(client, 'b').status_code == 401
+    assert _login(client, 'c').status_code == 429
+
+    with pytest.raises(RateLimitError):
+        service.authenticate_user('d', 'password123', '127.0.0.1')
+    assert service.authenticate_user('d', 'password123', '10.0.0.1') is None
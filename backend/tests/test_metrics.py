@@ -0,0 +1,64 @@
+import pytest
+import config
+from metrics import MetricsRegistry
+
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry()
+    counter = registry.counter('test_total', 'Test-Zähler', ('art',))
+    gauge = registry.gauge('test_in_flight', 'Test-Gauge')
+
+    counter.inc(art='a')
+    counter.inc(2, art='a')
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    text = registry.render()
+    assert '# TYPE test_total counter' in text
+    assert 'test_total{art="a"} 3' in text
+    assert '# TYPE test_in_flight gauge' in text
+    assert 'test_in_flight 1' in text
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('test_seconds', 'Test-Histogramm', ('route',), buckets=(0.1, 1.0))
+
+    histogram.observe(0.05, route='/x')
+    histogram.observe(0.5, route='/x')
+    histogram.observe(5, route='/x')
+
+    text = registry.render()
+    assert 'test_seconds_bucket{route="/x",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{route="/x",le="1"} 2' in text
+    assert 'test_seconds_bucket{route="/x",le="+Inf"} 3' in text
+    assert 'test_seconds_count{route="/x"} 3' in text
+    assert histogram.count(route='/x') == 3
+
+def test_wrong_labels_raise():
+    registry = MetricsRegistry()
+    counter = registry.counter('test_total', 'Test-Zähler', ('art',))
+    with pytest.raises(ValueError):
+        counter.inc(falsch='x')
+
+def test_metrics_endpoint(auth_client):
+    auth_client.get('/api/status')
+    auth_client.get('/api/lager/bestand', headers=auth_client.auth_headers)
+
+    response = auth_client.get('/api/metrics', headers=auth_client.auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+    text = response.get_data(as_text=True)
+    assert 'lager_http_request_duration_seconds_bucket{blueprint="lager",endpoint="lager.get_lagerbestand",method="GET"' in text
+    assert 'lager_http_requests_in_flight' in text
+    assert 'lager_db_connections_in_use' in text
+    assert 'lager_bcrypt_operations_in_progress' in text
+
+def test_metrics_endpoint_requires_authentication(auth_client, monkeypatch):
+    assert auth_client.get('/api/metrics').status_code == 401
+
+    monkeypatch.setattr(config.TestConfig, 'METRICS_TOKEN', 'scrape-geheim')
+    assert auth_client.get('/api/metrics', headers=auth_client.auth_headers).status_code == 401
+    assert auth_client.get('/api/metrics', headers={'Authorization': 'Bearer falsch'}).status_code == 401
+    response = auth_client.get('/api/metrics', headers={'Authorization': 'Bearer scrape-geheim'})
+    assert response.status_code == 200
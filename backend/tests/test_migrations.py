@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import tempfile
+import pytest
+from database import Database
+from inventory_manager import InventoryManager
+
+ALTES_SCHEMA = """
+CREATE TABLE lieferanten (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE, kontakt TEXT);
+CREATE TABLE artikel (artikelnummer TEXT PRIMARY KEY, bezeichnung TEXT NOT NULL, lieferant_id INTEGER NOT NULL,
+                      FOREIGN KEY (lieferant_id) REFERENCES lieferanten (id));
+CREATE TABLE kunden (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, kontakt TEXT);
+CREATE TABLE projekte (id INTEGER PRIMARY KEY AUTOINCREMENT, projektname TEXT NOT NULL UNIQUE, kunde_id INTEGER NOT NULL,
+                       FOREIGN KEY (kunde_id) REFERENCES kunden (id));
+CREATE TABLE lagerbestand (id INTEGER PRIMARY KEY AUTOINCREMENT, artikelnummer TEXT NOT NULL,
+                           verfuegbare_menge INTEGER NOT NULL, einkaufspreis REAL NOT NULL, einlagerungsdatum TEXT NOT NULL,
+                           FOREIGN KEY (artikelnummer) REFERENCES artikel (artikelnummer));
+CREATE TABLE verkaeufe (id INTEGER PRIMARY KEY AUTOINCREMENT, projekt_id INTEGER NOT NULL, artikelnummer TEXT NOT NULL,
+                        verkaufte_menge INTEGER NOT NULL, verkaufspreis REAL NOT NULL, verkaufsdatum TEXT NOT NULL,
+                        FOREIGN KEY (projekt_id) REFERENCES projekte (id),
+                        FOREIGN KEY (artikelnummer) REFERENCES artikel (artikelnummer));
+INSERT INTO lieferanten (name, kontakt) VALUES ('Alt GmbH', '');
+INSERT INTO artikel VALUES ('ALT-2', 'Tisch', 1);
+INSERT INTO artikel VALUES ('ALT-1', 'Stuhl', 1);
+INSERT INTO kunden (name, kontakt) VALUES ('Kunde', '');
+INSERT INTO projekte (projektname, kunde_id) VALUES ('Projekt', 1);
+INSERT INTO lagerbestand (artikelnummer, verfuegbare_menge, einkaufspreis, einlagerungsdatum) VALUES ('ALT-1', 0, 10.0, '2023-01-01');
+INSERT INTO lagerbestand (artikelnummer, verfuegbare_menge, einkaufspreis, einlagerungsdatum) VALUES ('ALT-1', 4, 12.0, '2023-02-01');
+INSERT INTO verkaeufe (projekt_id, artikelnummer, verkaufte_menge, verkaufspreis, verkaufsdatum) VALUES (1, 'ALT-1', 6, 20.0, '2023-03-01');
+"""
+
+@pytest.fixture
+def alte_datenbank():
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    conn = sqlite3.connect(db_path)
+    conn.executescript(ALTES_SCHEMA)
+    conn.close()
+    yield db_path
+    os.close(db_fd)
+    os.unlink(db_path)
+
+def test_migration_to_artikel_id(alte_datenbank):
+    db = Database(alte_datenbank)
+
+    spalten = [row[1] for row in db.execute_query("PRAGMA table_info(lagerbestand)")]
+    assert 'artikel_id' in spalten and 'artikelnummer' not in spalten
+    spalten = [row[1] for row in db.execute_query("PRAGMA table_info(verkaeufe)")]
+    assert 'artikel_id' in spalten and 'artikelnummer' not in spalten
+    assert db.execute_query("PRAGMA foreign_key_check") == []
+
+    inventory = InventoryManager(db)
+    chargen = inventory.lagerbestand_artikel('ALT-1', include_zero=True)
+    assert [(c.id, c.verfuegbare_menge) for c in chargen] == [(1, 0), (2, 4)]
+    assert inventory.artikel_finden('ALT-1').mindestmenge == 1
+    assert inventory.projekt_verkaeufe(1)[0][0] == 'ALT-1'
+
+def test_migration_runs_only_once(alte_datenbank):
+    Database(alte_datenbank)
+    db = Database(alte_datenbank)
+    assert db.execute_query("SELECT COUNT(*) FROM lagerbestand") == [(2,)]
+
+def test_migration_seeds_monthly_rollup(alte_datenbank):
+    db = Database(alte_datenbank)
+    # Altverkauf ohne Wareneinsatz: Menge * Durchschnitts-Einkaufspreis (6 * 11.0)
+    assert db.execute_query("SELECT monat, menge, umsatz, wareneinsatz, anzahl_verkaeufe FROM verkaeufe_monat") == \
+        [('2023-03', 6, 120.0, 66.0, 1)]
+
+def test_migration_flags_low_stock(alte_datenbank):
+    conn = sqlite3.connect(alte_datenbank)
+    conn.execute("INSERT INTO artikel VALUES ('ALT-3', 'Schrank', 1)")
+    conn.commit()
+    conn.close()
+    db = Database(alte_datenbank)
+    # Bestandsübersicht aus einer Version ohne Kennzeichen
+    db.execute_query("DROP TABLE artikel_bestand")
+    db.execute_query("CREATE TABLE artikel_bestand (artikel_id INTEGER PRIMARY KEY, bestand INTEGER NOT NULL DEFAULT 0, "
+                     "reserviert INTEGER NOT NULL DEFAULT 0)")
+
+    inventory = InventoryManager(Database(alte_datenbank))
+    # ALT-1 hat 4 Stück, ALT-2 und ALT-3 nichts bei Mindestmenge 1
+    assert [a[0] for a in inventory.artikel_unter_mindestmenge()] == ['ALT-2', 'ALT-3']
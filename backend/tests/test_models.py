@@ -0,0 +1,32 @@
+import pytest
+from models import Lagerbestand, User
+
+def test_models_have_no_instance_dict():
+    bestand = Lagerbestand(id=1, artikelnummer='A-1', verfuegbare_menge=5)
+    assert not hasattr(bestand, '__dict__')
+    with pytest.raises(AttributeError):
+        bestand.unbekannt = 1
+
+def test_row_factory_maps_columns_in_order(test_db):
+    test_db.execute_insert("INSERT INTO lieferanten (name, kontakt) VALUES (?, ?)", ('L', ''))
+    test_db.execute_insert("INSERT INTO artikel (artikelnummer, bezeichnung, lieferant_id) VALUES (?, ?, ?)",
+                           ('A-1', 'Stuhl', 1))
+    test_db.execute_insert("""INSERT INTO lagerbestand (artikel_id, verfuegbare_menge, einkaufspreis, einlagerungsdatum)
+                              VALUES (?, ?, ?, ?)""", (1, 7, 12.5, '2024-01-01'))
+
+    rows = test_db.execute_query(
+        """SELECT l.id, a.artikelnummer, l.verfuegbare_menge, l.einkaufspreis, l.einlagerungsdatum
+           FROM lagerbestand l JOIN artikel a ON a.id = l.artikel_id""",
+        row_factory=Lagerbestand.row_factory
+    )
+
+    assert len(rows) == 1
+    assert isinstance(rows[0], Lagerbestand)
+    assert rows[0].verfuegbare_menge == 7
+    assert rows[0].einkaufspreis == 12.5
+    assert rows[0].einlagerungsdatum == '2024-01-01'
+
+def test_user_row_factory_converts_active_flag():
+    user = User.row_factory(None, (1, 'anna', 'hash', '2024-01-01T00:00:00', 1))
+    assert user.active is True
+    assert user.to_dict()['username'] == 'anna'
@@ -0,0 +1,93 @@
+import pytest
+import api.berichte
+from manage import main
+
+def _verkaufen(auth_client, sample_data, menge, datum, preis=80.00):
+    response = auth_client.post('/api/verkauf', json={
+        'projekt_id': sample_data['projekt_id'],
+        'artikelnummer': sample_data['artikelnummer'],
+        'verkaufte_menge': menge,
+        'verkaufspreis': preis,
+        'verkaufsdatum': datum
+    }, headers=auth_client.auth_headers)
+    assert response.status_code == 201
+
+@pytest.fixture
+def zwei_chargen(auth_client, sample_data):
+    for menge, preis, datum in ((5, 40.00, '2024-01-01'), (10, 50.00, '2024-01-05')):
+        auth_client.post('/api/lager/eingang', json={
+            'artikelnummer': sample_data['artikelnummer'],
+            'menge': menge,
+            'einkaufspreis': preis,
+            'einlagerungsdatum': datum
+        }, headers=auth_client.auth_headers)
+    return sample_data
+
+def test_verkauf_maintains_monthly_rollup(auth_client, zwei_chargen):
+    _verkaufen(auth_client, zwei_chargen, 3, '2024-01-15')
+    _verkaufen(auth_client, zwei_chargen, 4, '2024-01-20')  # 2 * 40 + 2 * 50 nach FIFO
+    _verkaufen(auth_client, zwei_chargen, 1, '2024-03-02')
+
+    response = auth_client.get('/api/berichte/monatlich', headers=auth_client.auth_headers)
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert [m['monat'] for m in data['monate']] == ['2024-01', '2024-03']
+    januar = data['monate'][0]
+    assert januar['verkaufte_menge'] == 7
+    assert januar['umsatz'] == 560.00
+    assert januar['wareneinsatz'] == 300.00  # 5 * 40 + 2 * 50
+    assert januar['anzahl_verkaeufe'] == 2
+    assert data['gesamtkosten'] == 350.00
+    assert data['gesamtgewinn'] == 640.00 - 350.00
+
+def test_monatsbericht_zeitraum_und_projekt(auth_client, zwei_chargen):
+    _verkaufen(auth_client, zwei_chargen, 3, '2024-01-15')
+    _verkaufen(auth_client, zwei_chargen, 1, '2024-03-02')
+
+    response = auth_client.get(f"/api/berichte/monatlich?von=2024-02&projekt_id={zwei_chargen['projekt_id']}",
+                               headers=auth_client.auth_headers)
+    assert [m['monat'] for m in response.get_json()['monate']] == ['2024-03']
+
+    response = auth_client.get('/api/berichte/monatlich?projekt_id=999', headers=auth_client.auth_headers)
+    assert response.get_json()['monate'] == []
+
+    response = auth_client.get('/api/berichte/monatlich?von=2024-13', headers=auth_client.auth_headers)
+    assert response.status_code == 400
+
+def test_rebuild_matches_incremental_rollup(auth_client, zwei_chargen):
+    _verkaufen(auth_client, zwei_chargen, 3, '2024-01-15')
+    _verkaufen(auth_client, zwei_chargen, 4, '2024-02-20')
+
+    db = api.berichte.reports.db
+    vorher = db.execute_query("SELECT * FROM verkaeufe_monat ORDER BY monat")
+    db.execute_query("UPDATE verkaeufe_monat SET menge = 0")
+
+    assert main(['--db', db.db_path, 'rollup-neu-aufbauen']) == 0
+    db.close_connections()
+    assert db.execute_query("SELECT * FROM verkaeufe_monat ORDER BY monat") == vorher
+
+def test_gewinn_analyse_uses_same_cost_basis(auth_client, zwei_chargen):
+    _verkaufen(auth_client, zwei_chargen, 7, '2024-01-15')  # 5 * 40 + 2 * 50 nach FIFO
+
+    monatlich = auth_client.get('/api/berichte/monatlich', headers=auth_client.auth_headers).get_json()
+    gewinn = auth_client.get('/api/berichte/gewinn', headers=auth_client.auth_headers).get_json()
+    assert gewinn['gesamtkosten'] == monatlich['gesamtkosten'] == 300.00
+    assert gewinn['artikel_analyse'][0]['durchschnitt_einkaufspreis'] == pytest.approx(300.00 / 7)
+
+@pytest.mark.parametrize('datum', ['15.03.2024', '2024-13-01', 'gestern'])
+def test_verkauf_rejects_invalid_date(auth_client, zwei_chargen, datum):
+    response = auth_client.post('/api/verkauf', json={
+        'projekt_id': zwei_chargen['projekt_id'],
+        'artikelnummer': zwei_chargen['artikelnummer'],
+        'verkaufte_menge': 1,
+        'verkaufspreis': 80.00,
+        'verkaufsdatum': datum
+    }, headers=auth_client.auth_headers)
+    assert response.status_code == 400
+    assert api.berichte.reports.db.execute_query("SELECT COUNT(*) FROM verkaeufe_monat") == [(0,)]
+
+def test_verkauf_normalizes_unpadded_date(auth_client, zwei_chargen):
+    _verkaufen(auth_client, zwei_chargen, 1, '2024-3-2')
+    monate = auth_client.get('/api/berichte/monatlich', headers=auth_client.auth_headers).get_json()['monate']
+    assert [m['monat'] for m in monate] == ['2024-03']
@@ -0,0 +1,37 @@
+from nummernindex import ArtikelnummerIndex
+
+def test_prefix_suggestions_are_sorted_and_case_insensitive():
+    geladen = []
+    index = ArtikelnummerIndex(lambda: geladen.append(True) or ['STUHL-002', 'TISCH-001', 'stuhl-001', 'STUHL-010'])
+
+    assert index.vorschlaege('stu') == ['stuhl-001', 'STUHL-002', 'STUHL-010']
+    assert index.vorschlaege('STUHL-0', limit=2) == ['stuhl-001', 'STUHL-002']
+    assert index.vorschlaege('LAMPE') == []
+    assert index.vorschlaege('') == ['stuhl-001', 'STUHL-002', 'STUHL-010', 'TISCH-001']
+    assert geladen == [True]
+
+def test_added_numbers_are_found_without_reload():
+    geladen = []
+    index = ArtikelnummerIndex(lambda: geladen.append(True) or ['A-1'])
+    index.vorschlaege('A')
+
+    index.hinzufuegen('A-0')
+    index.hinzufuegen('A-0')
+    index.hinzufuegen(*[f'B-{i:03d}' for i in range(100)])
+
+    assert index.vorschlaege('A') == ['A-0', 'A-1']
+    assert index.vorschlaege('B-09') == [f'B-{i:03d}' for i in range(90, 100)]
+    assert len(index) == 102
+    assert geladen == [True]
+
+def test_numbers_added_during_rebuild_are_kept():
+    index = ArtikelnummerIndex(lambda: [])
+
+    def laden():
+        # Ein anderer Thread legt einen Artikel an, nachdem der Stand gelesen wurde
+        index.hinzufuegen('NEU-1')
+        return ['ALT-1']
+    index._laden = laden
+    index.aufbauen()
+
+    assert index.vorschlaege('') == ['ALT-1', 'NEU-1']
@@ -0,0 +1,81 @@
+import pytest
+from inventory_manager import InventoryManager
+from exceptions import DatabaseError
+
+def _feed(auth_client, **params):
+    response = auth_client.get('/api/aenderungen', query_string=params, headers=auth_client.auth_headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_writes_append_to_outbox(auth_client, sample_data):
+    headers = auth_client.auth_headers
+    auth_client.post('/api/lager/eingang', json={'artikelnummer': 'TEST-001', 'menge': 4, 'einkaufspreis': 10.0,
+                                                 'einlagerungsdatum': '2024-01-01'}, headers=headers)
+    auth_client.post('/api/verkauf', json={'projekt_id': sample_data['projekt_id'], 'artikelnummer': 'TEST-001',
+                                           'verkaufte_menge': 3, 'verkaufspreis': 20.0,
+                                           'verkaufsdatum': '2024-01-02'}, headers=headers)
+
+    data = _feed(auth_client)
+    aenderungen = data['aenderungen']
+    assert [(a['entitaet'], a['aktion']) for a in aenderungen] == [
+        ('lieferant', 'angelegt'), ('artikel', 'angelegt'), ('kunde', 'angelegt'), ('projekt', 'angelegt'),
+        ('charge', 'eingelagert'), ('verkauf', 'gebucht')
+    ]
+    assert [a['seq'] for a in aenderungen] == sorted(a['seq'] for a in aenderungen)
+    assert aenderungen[1]['schluessel'] == 'TEST-001'
+    verkauf = aenderungen[-1]['daten']
+    assert (verkauf['verkaufte_menge'], verkauf['wareneinsatz'], verkauf['bestand']) == (3, 30.0, 1)
+    assert verkauf['entnahmen'] == [{'charge_id': aenderungen[4]['daten']['id'], 'menge': 3}]
+    assert data['letzte_seq'] == aenderungen[-1]['seq'] and data['mehr'] is False
+
+def test_feed_pages_with_since(auth_client, sample_data):
+    erste_seite = _feed(auth_client, limit=3)
+    assert len(erste_seite['aenderungen']) == 3 and erste_seite['mehr'] is True
+
+    zweite_seite = _feed(auth_client, since=erste_seite['letzte_seq'], limit=3)
+    assert [a['entitaet'] for a in zweite_seite['aenderungen']] == ['projekt']
+    assert zweite_seite['mehr'] is False
+
+    leer = _feed(auth_client, since=zweite_seite['letzte_seq'])
+    assert leer['aenderungen'] == [] and leer['letzte_seq'] == zweite_seite['letzte_seq']
+
+    response = auth_client.get('/api/aenderungen?limit=100000', headers=auth_client.auth_headers)
+    assert response.status_code == 400
+
+def test_failed_write_leaves_no_outbox_entry(test_db):
+    inventory = InventoryManager(test_db)
+    inventory.kunde_hinzufuegen('Kunde')
+    with pytest.raises(DatabaseError):
+        inventory.projekt_hinzufuegen('Projekt', 999)
+
+    assert [(a['entitaet'], a['aktion']) for a in inventory.aenderungen_seit()] == [('kunde', 'angelegt')]
+
+def test_outbox_cleanup(test_db):
+    inventory = InventoryManager(test_db)
+    for name in ('A', 'B', 'C'):
+        inventory.kunde_hinzufuegen(name)
+    test_db.execute_query("UPDATE outbox SET erstellt_am = '2000-01-01T00:00:00' WHERE seq <= 2")
+
+    assert inventory.outbox_bereinigen(30, batch_groesse=1) == 2
+    assert [a['daten']['name'] for a in inventory.aenderungen_seit()] == ['C']
+
+def test_feed_reports_gap_after_cleanup(auth_client, sample_data):
+    import api.aenderungen
+    inventory = api.aenderungen.inventory
+    inventory.db.execute_query("UPDATE outbox SET erstellt_am = '2000-01-01T00:00:00' WHERE seq <= 2")
+    assert inventory.outbox_bereinigen(30) == 2
+
+    for since in (0, 1):
+        data = _feed(auth_client, since=since)
+        assert data['luecke'] is True and data['aenderungen'] == []
+        assert data['letzte_seq'] == 4
+
+    data = _feed(auth_client, since=2)
+    assert data['luecke'] is False
+    assert [a['entitaet'] for a in data['aenderungen']] == ['kunde', 'projekt']
+
+    # Auch eine vollständig bereinigte Outbox meldet die Lücke
+    inventory.db.execute_query("UPDATE outbox SET erstellt_am = '2000-01-01T00:00:00'")
+    inventory.outbox_bereinigen(30)
+    assert _feed(auth_client, since=2)['luecke'] is True
+    assert _feed(auth_client, since=4) == {'aenderungen': [], 'letzte_seq': 4, 'mehr': False, 'luecke': False}
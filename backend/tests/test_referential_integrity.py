@@ -188,4 +188,45 @@ def test_referential_integrity_chain(auth_client):
     assert auth_client.get(f'/api/lieferanten/{lieferant_id}', headers=auth_client.auth_headers).status_code == 200
     assert auth_client.get(f'/api/kunden/{kunde_id}', headers=auth_client.auth_headers).status_code == 200
     assert auth_client.get('/api/artikel/CHAIN-001', headers=auth_client.auth_headers).status_code == 200
-    assert auth_client.get(f'/api/projekte/{projekt_id}', headers=auth_client.auth_headers).status_code == 200
\ No newline at end of file
+    assert auth_client.get(f'/api/projekte/{projekt_id}', headers=auth_client.auth_headers).status_code == 200
+
+def test_delete_kunde_and_projekt_respect_dependencies(auth_client, sample_data):
+    """Kunden und Projekte lassen sich nur ohne abhängige Datensätze löschen"""
+    headers = auth_client.auth_headers
+    kunde_id, projekt_id = sample_data['kunde_id'], sample_data['projekt_id']
+    
+    response = auth_client.delete(f'/api/kunden/{kunde_id}', headers=headers)
+    assert response.status_code == 409
+    assert 'Projekte sind zugeordnet' in response.get_json()['error']
+    
+    auth_client.post('/api/lager/eingang', json={'artikelnummer': 'TEST-001', 'menge': 5, 'einkaufspreis': 10.0},
+                     headers=headers)
+    auth_client.post('/api/reservierungen', json={'projekt_id': projekt_id, 'artikelnummer': 'TEST-001', 'menge': 2},
+                     headers=headers)
+    response = auth_client.delete(f'/api/projekte/{projekt_id}', headers=headers)
+    assert response.status_code == 409
+    assert 'Reservierungen sind zugeordnet' in response.get_json()['error']
+    
+    auth_client.post('/api/verkauf', json={'projekt_id': projekt_id, 'artikelnummer': 'TEST-001',
+                                           'verkaufte_menge': 1, 'verkaufspreis': 20.0}, headers=headers)
+    response = auth_client.delete(f'/api/projekte/{projekt_id}', headers=headers)
+    assert response.status_code == 409
+    assert 'Verkäufe sind gebucht' in response.get_json()['error']
+
+def test_delete_kunde_after_projekt(auth_client):
+    """Ohne Abhängigkeiten werden Projekt und Kunde gelöscht und im Änderungs-Feed gemeldet"""
+    headers = auth_client.auth_headers
+    kunde_id = auth_client.post('/api/kunden', json={'name': 'Kurzzeit Kunde'}, headers=headers).get_json()['id']
+    projekt_id = auth_client.post('/api/projekte', json={'projektname': 'Kurzzeit Projekt', 'kunde_id': kunde_id},
+                                  headers=headers).get_json()['id']
+    
+    assert auth_client.delete(f'/api/projekte/{projekt_id}', headers=headers).status_code == 200
+    assert auth_client.delete(f'/api/kunden/{kunde_id}', headers=headers).status_code == 200
+    assert auth_client.get(f'/api/kunden/{kunde_id}', headers=headers).status_code == 404
+    
+    aenderungen = auth_client.get('/api/aenderungen', headers=headers).get_json()['aenderungen']
+    assert [(a['entitaet'], a['aktion']) for a in aenderungen[-2:]] == [('projekt', 'geloescht'), ('kunde', 'geloescht')]
+    
+    assert auth_client.delete(f'/api/projekte/{projekt_id}', headers=headers).status_code == 404
+    assert auth_client.delete(f'/api/kunden/{kunde_id}', headers=headers).status_code == 404
+    assert auth_client.put('/api/lieferanten/999999', json={'name': 'Niemand'}, headers=headers).status_code == 404
@@ -0,0 +1,73 @@
+import threading
+import pytest
+from inventory_manager import InventoryManager
+from database import Database
+from writer import db_writer_batch_size, schreib_threads
+from exceptions import DatabaseError
+
+@pytest.fixture
+def inventory(test_db):
+    test_db.single_writer = True
+    inventory = InventoryManager(test_db)
+    lieferant_id = inventory.lieferant_hinzufuegen('Writer GmbH')
+    inventory.artikel_hinzufuegen('W-1', 'Schrank', lieferant_id)
+    inventory.projekt_hinzufuegen('Projekt', inventory.kunde_hinzufuegen('Kunde'))
+    yield inventory
+    test_db.zuruecksetzen()
+
+def test_concurrent_sales_are_serialized(inventory):
+    inventory.lagereingang('W-1', 30, 10.0, '2024-01-01')
+    ergebnisse = []
+
+    def verkaufen():
+        ergebnisse.append(inventory.verkauf(1, 'W-1', 2, 25.0, '2024-02-01'))
+
+    threads = [threading.Thread(target=verkaufen) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert ergebnisse.count(True) == 15
+    assert ergebnisse.count(False) == 5
+    assert inventory.lagerbestand_artikel('W-1') == []
+    assert inventory.db.execute_query("SELECT COUNT(*), SUM(verkaufte_menge) FROM verkaeufe") == [(15, 30)]
+    assert db_writer_batch_size.count() > 0
+
+def test_failing_operation_does_not_affect_batch(inventory):
+    def kaputt(conn):
+        conn.execute("INSERT INTO lagerbestand (artikel_id, verfuegbare_menge, einkaufspreis, einlagerungsdatum) "
+                     "VALUES (1, 5, 1.0, '2024-01-01')")
+        conn.execute("INSERT INTO lagerbestand (artikel_id) VALUES (1)")  # NOT NULL verletzt
+
+    with pytest.raises(DatabaseError):
+        inventory.db.write(kaputt)
+    inventory.lagereingang('W-1', 3, 10.0, '2024-01-02')
+
+    # Die erste Zeile der fehlgeschlagenen Operation wurde zurückgerollt
+    assert [b.verfuegbare_menge for b in inventory.lagerbestand_artikel('W-1')] == [3]
+
+def test_zuruecksetzen_stops_writer(inventory):
+    inventory.lagereingang('W-1', 1, 10.0)
+    writer = inventory.db._get_writer()
+    assert writer._thread.is_alive()
+
+    inventory.db.zuruecksetzen()
+    assert not writer._thread.is_alive()
+    assert inventory.lagereingang('W-1', 1, 10.0)
+
+def test_one_writer_thread_per_database_file(inventory):
+    # Jede Komponente baut ihre eigene Database-Instanz auf dieselbe Datei
+    inventory.db._get_writer()
+    anzahl = len(schreib_threads)
+    threads = sum(t.name == 'db-writer' for t in threading.enumerate())
+    andere = InventoryManager(Database(inventory.db.db_path))
+    andere.db.single_writer = True
+
+    inventory.lagereingang('W-1', 1, 10.0)
+    andere.lagereingang('W-1', 1, 10.0)
+
+    assert andere.db._get_writer() is inventory.db._get_writer()
+    assert len(schreib_threads) == anzahl
+    # Andere Datenbankdateien des Prozesses dürfen eigene Schreib-Threads haben
+    assert sum(t.name == 'db-writer' for t in threading.enumerate()) == threads
@@ -0,0 +1,35 @@
+import pytest
+from unittest.mock import patch
+from database import SlowQueryLog
+
+def test_slow_query_logged_with_plan(test_db):
+    test_db.slow_query_threshold = 0
+    test_db.slow_query_log = SlowQueryLog(max_per_minute=10)
+
+    with patch('database.slow_query_logger') as logger:
+        test_db.execute_query("SELECT * FROM lagerbestand WHERE einlagerungsdatum = ?", ('X-1',))
+
+    assert logger.warning.call_count == 1
+    message = logger.warning.call_args[0][0]
+    assert 'SELECT * FROM lagerbestand WHERE einlagerungsdatum = ?' in message
+    assert 'Parameter (str)' in message
+    assert 'X-1' not in message  # Parameterwerte werden nicht geloggt
+    assert 'SCAN lagerbestand' in message or 'SEARCH lagerbestand' in message
+
+def test_fast_queries_not_logged(test_db):
+    test_db.slow_query_threshold = 10.0
+
+    with patch('database.slow_query_logger') as logger:
+        test_db.execute_query("SELECT COUNT(*) FROM artikel")
+
+    logger.warning.assert_not_called()
+
+def test_slow_query_log_is_rate_limited(test_db):
+    test_db.slow_query_threshold = 0
+    test_db.slow_query_log = SlowQueryLog(max_per_minute=2)
+
+    with patch('database.slow_query_logger') as logger:
+        for _ in range(5):
+            test_db.execute_query("SELECT COUNT(*) FROM artikel")
+
+    assert logger.warning.call_count == 2
@@ -0,0 +1,52 @@
+import pytest
+from unittest.mock import patch
+from auth_service import AuthService
+from cache import TTLCache
+from exceptions import NotFoundError, ValidationError
+
+@pytest.fixture
+def auth(test_db):
+    return AuthService(test_db)
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache('test', maxsize=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+def test_ttl_cache_entries_expire():
+    cache = TTLCache('test', maxsize=2, ttl=10)
+    with patch('cache.time.monotonic', return_value=100.0):
+        cache.put('a', 1)
+    with patch('cache.time.monotonic', return_value=111.0):
+        assert cache.get('a') is None
+    assert len(cache) == 0
+
+def test_user_lookups_served_from_cache(auth):
+    user_id = auth.create_user('cache_user', 'password123')
+
+    with patch.object(auth.db, 'execute_query', side_effect=AssertionError('keine DB-Abfrage erwartet')):
+        assert auth.find_user_by_id(user_id).username == 'cache_user'
+        assert auth.find_user_by_username('Cache_User').id == user_id
+
+def test_deactivate_invalidates_cache(auth):
+    user_id = auth.create_user('weg_user', 'password123')
+    assert auth.find_user_by_id(user_id) is not None
+
+    auth.deactivate_user(user_id)
+
+    assert auth.find_user_by_id(user_id) is None
+    assert auth.find_user_by_username('weg_user') is None
+    with pytest.raises(NotFoundError):
+        auth.deactivate_user(user_id)
+
+def test_duplicate_username_rejected_before_hashing(auth):
+    auth.create_user('doppelt_user', 'password123')
+    auth.user_cache.clear()
+
+    with patch('auth_service.User.hash_password', side_effect=AssertionError('kein Hashen erwartet')):
+        with pytest.raises(ValidationError, match='existiert bereits'):
+            auth.create_user('Doppelt_User', 'password456')
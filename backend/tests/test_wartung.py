@@ -0,0 +1,57 @@
+import time
+import pytest
+from auth_service import AuthService
+from scheduler import MaintenanceScheduler
+
+@pytest.fixture
+def auth(test_db):
+    service = AuthService()
+    service.db = test_db
+    return service
+
+def test_cleanup_removes_only_expired_tokens(auth):
+    vergangen = int(time.time()) - 60
+    for i in range(5):
+        auth.blacklist_token(f'alt-{i}', vergangen)
+    auth.blacklist_token('aktiv', int(time.time()) + 3600)
+    auth.blacklist_token('ohne-ablauf')
+
+    assert auth.cleanup_blacklisted_tokens(batch_size=2) == 5
+    assert not auth.is_token_blacklisted('alt-0')
+    assert auth.is_token_blacklisted('aktiv')
+    assert auth.is_token_blacklisted('ohne-ablauf')
+    assert auth.cleanup_blacklisted_tokens() == 0
+
+def test_scheduler_runs_jobs_in_background():
+    scheduler = MaintenanceScheduler()
+    laeufe = []
+    scheduler.add_job('test', 0.01, lambda: laeufe.append(1) or 3)
+    scheduler.start()
+    try:
+        frist = time.monotonic() + 2
+        while len(laeufe) < 2 and time.monotonic() < frist:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+
+    assert len(laeufe) >= 2
+    status = scheduler.status()[0]
+    assert status['job'] == 'test'
+    assert status['letztes_ergebnis'] == 3
+    assert status['letzter_fehler'] is None
+
+def test_scheduler_records_job_errors():
+    scheduler = MaintenanceScheduler()
+
+    def fehler():
+        raise RuntimeError('kaputt')
+
+    scheduler.add_job('fehler', 60, fehler)
+    with pytest.raises(RuntimeError):
+        scheduler.run_job('fehler')
+    assert scheduler.status()[0]['letzter_fehler'] == 'kaputt'
+
+def test_wartung_status_endpoint(auth_client):
+    response = auth_client.get('/api/wartung', headers=auth_client.auth_headers)
+    assert response.status_code == 200
+    assert [job['job'] for job in response.get_json()] == ['token_blacklist', 'reservierungen', 'outbox', 'autocomplete']
@@ -0,0 +1,172 @@
+"""
+Einzelner Schreib-Thread für Bestandsänderungen
+
+Statt dass jeder Request-Thread um die Schreibsperre von SQLite konkurriert,
+reihen Aufrufer ihre Schreiboperationen in eine Queue ein. Ein Thread mit
+einer langlebigen Verbindung arbeitet sie ab und fasst alle gerade
+wartenden Operationen zu einer Transaktion mit einem gemeinsamen COMMIT
+zusammen. Jede Operation läuft in einem eigenen SAVEPOINT, ein Fehler
+betrifft daher nur die eigene Operation.
+
+Pro Datenbankdatei gibt es im Prozess genau einen Schreib-Thread, den sich
+alle Database-Instanzen über schreib_threads teilen.
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict
+from logger_config import app_logger
+from metrics import registry
+
+db_writer_queue = registry.gauge(
+    'lager_db_writer_queue_depth',
+    'Schreiboperationen in der Queue des Schreib-Threads'
+)
+db_writer_batch_size = registry.histogram(
+    'lager_db_writer_batch_size',
+    'Operationen pro gemeinsamem COMMIT des Schreib-Threads',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+_STOP = object()
+
+
+class WriterGestoppt(RuntimeError):
+    """Der Schreib-Thread nimmt keine Operationen mehr an"""
+
+
+class SingleWriter:
+    """Serialisiert Schreiboperationen über eine Queue und eine Verbindung
+
+    Eine Operation ist ein Callable, das die Verbindung erhält und sein
+    Ergebnis zurückgibt; submit() wartet auf dieses Ergebnis oder wirft
+    die Ausnahme der Operation weiter.
+    """
+
+    def __init__(self, db, max_batch: int = 64):
+        self.db = db
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._gestoppt = False
+        self._submit_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, name='db-writer', daemon=True)
+        self._started = threading.Event()
+        self._start_error = None
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            raise self._start_error
+
+    @property
+    def is_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, operation: Callable):
+        future = Future()
+        # Nach stop() eingereihte Operationen würden nie abgearbeitet
+        with self._submit_lock:
+            if self._gestoppt:
+                raise WriterGestoppt("Schreib-Thread wurde beendet")
+            db_writer_queue.inc()
+            self._queue.put((operation, future))
+        return future.result()
+
+    def stop(self):
+        with self._submit_lock:
+            if self._gestoppt:
+                return
+            self._gestoppt = True
+            if self._thread.is_alive():
+                self._queue.put((_STOP, None))
+        self._thread.join()
+
+    def _loop(self):
+        try:
+            self.conn = sqlite3.connect(self.db.db_path, check_same_thread=False,
+                                        cached_statements=self.db.statement_cache_size)
+            self.conn.execute("PRAGMA foreign_keys = ON")
+        except sqlite3.Error as e:
+            self._start_error = e
+            self._started.set()
+            return
+        self._started.set()
+
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(operation is _STOP for operation, _ in batch)
+                batch = [(operation, future) for operation, future in batch if operation is not _STOP]
+                db_writer_queue.dec(len(batch))
+                if batch:
+                    self._run_batch(batch)
+                if stop:
+                    return
+        finally:
+            self.conn.close()
+
+    def _run_batch(self, batch):
+        db_writer_batch_size.observe(len(batch))
+        ergebnisse = []
+        try:
+            self.db._retry_busy(lambda: self.conn.execute("BEGIN IMMEDIATE"))
+            for operation, future in batch:
+                self.conn.execute("SAVEPOINT operation")
+                try:
+                    ergebnis = operation(self.conn)
+                except BaseException as e:
+                    self.conn.execute("ROLLBACK TO operation")
+                    self.conn.execute("RELEASE operation")
+                    ergebnisse.append((future, None, e))
+                    continue
+                self.conn.execute("RELEASE operation")
+                ergebnisse.append((future, ergebnis, None))
+            self.db._retry_busy(self.conn.commit)
+        except Exception as e:
+            app_logger.error(f"Gemeinsamer COMMIT des Schreib-Threads fehlgeschlagen: {e}")
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, ergebnis, fehler in ergebnisse:
+            if fehler is not None:
+                future.set_exception(fehler)
+            else:
+                future.set_result(ergebnis)
+
+
+class SchreibThreads:
+    """Ein Schreib-Thread pro Datenbankdatei, gemeinsam für alle Database-Instanzen des Prozesses"""
+
+    def __init__(self):
+        self._writer: Dict[str, SingleWriter] = {}
+        self._lock = threading.Lock()
+
+    def fuer(self, db) -> SingleWriter:
+        with self._lock:
+            writer = self._writer.get(db.db_path)
+            if writer is None:
+                writer = self._writer[db.db_path] = SingleWriter(db, db.writer_batch_size)
+            return writer
+
+    def beenden(self, db_path: str):
+        """Beendet den Schreib-Thread der Datei, nachdem er die eingereihten Operationen abgearbeitet hat"""
+        with self._lock:
+            writer = self._writer.pop(db_path, None)
+        if writer is not None:
+            writer.stop()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._writer)
+
+
+schreib_threads = SchreibThreads()
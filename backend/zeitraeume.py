@@ -0,0 +1,49 @@
+"""
+Prüfung von Datumsangaben und Berichtszeiträumen
+
+Datumswerte werden als ISO-Text gespeichert und von SQLite als Text
+verglichen. Deshalb werden alle Eingaben auf YYYY-MM-DD bzw. YYYY-MM
+normalisiert, bevor sie in eine Abfrage oder eine Buchung gehen.
+"""
+
+from datetime import datetime
+from typing import Optional, Tuple
+from exceptions import ValidationError
+
+# Grenzen für offene Zeiträume; so bleibt das Statement gleich und der Datums-Index nutzbar
+FRUEHESTES_DATUM = '0000-01-01'
+SPAETESTES_DATUM = '9999-12-31'
+
+_DATUM_FEHLER = "Ungültiges Datum für '{name}': {wert} (erwartet YYYY-MM-DD)"
+_MONAT_FEHLER = "Ungültiger Monat für '{name}': {wert} (erwartet YYYY-MM)"
+
+def _normalisieren(name: str, wert: Optional[str], format: str, fehler: str) -> Optional[str]:
+    # strptime akzeptiert auch 2024-1-5; SQLite vergleicht die Grenzen aber als Text
+    if wert is None:
+        return None
+    try:
+        return datetime.strptime(wert, format).strftime(format)
+    except (TypeError, ValueError):
+        raise ValidationError(fehler.format(name=name, wert=wert))
+
+def zeitraum(von: Optional[str] = None, bis: Optional[str] = None) -> Tuple[str, str]:
+    """Prüft einen Berichtszeitraum (YYYY-MM-DD, beide Grenzen inklusive) und gibt ihn normalisiert zurück"""
+    von = _normalisieren('von', von, "%Y-%m-%d", _DATUM_FEHLER)
+    bis = _normalisieren('bis', bis, "%Y-%m-%d", _DATUM_FEHLER)
+    if von and bis and von > bis:
+        raise ValidationError("'von' darf nicht nach 'bis' liegen")
+    return von or FRUEHESTES_DATUM, bis or SPAETESTES_DATUM
+
+def monatszeitraum(von: Optional[str] = None, bis: Optional[str] = None) -> Tuple[str, str]:
+    """Prüft einen Zeitraum in Monaten (YYYY-MM, beide Grenzen inklusive) und gibt ihn normalisiert zurück"""
+    von = _normalisieren('von', von, "%Y-%m", _MONAT_FEHLER)
+    bis = _normalisieren('bis', bis, "%Y-%m", _MONAT_FEHLER)
+    if von and bis and von > bis:
+        raise ValidationError("'von' darf nicht nach 'bis' liegen")
+    return von or FRUEHESTES_DATUM[:7], bis or SPAETESTES_DATUM[:7]
+
+def datum_pruefen(name: str, datum: str) -> str:
+    """Prüft ein einzelnes Datum (YYYY-MM-DD) und gibt es normalisiert zurück"""
+    if datum is None:
+        raise ValidationError(f"Datum für '{name}' fehlt")
+    return _normalisieren(name, datum, "%Y-%m-%d", _DATUM_FEHLER)